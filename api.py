@@ -0,0 +1,297 @@
+"""NBA Stats API - JSON over HTTP for dashboards and bots
+
+Serves the same stats functions as the Streamlit app without rendering a page:
+
+    GET /seasons                                  seasons with a cache and their generations
+    GET /players/<player_id>                      get_player_stats
+    GET /teams/<team_id>/offense                  get_team_offense_stats
+    GET /teams/<team_id>/defense                  get_team_defense_stats
+    GET /leaders                                  get_top_30_by_category
+    GET /leaderboard/<category>                   query_leaderboard (k, team, min_games, min_minutes)
+
+Every stats route takes season (default NBA_SEASON) and the form window
+parameters window, trim and halflife. Each request pins the season's
+published generation (data.seasons.pin_generation), and its ETag is that
+generation, so a conditional GET with a current If-None-Match is answered
+304 without computing anything. Bodies are kept in an in-process LRU keyed on
+route, parameters and generation; a fetch publishing a new generation makes
+every old entry unreachable. Only local data is used - every stats call is
+made with source="local", so a route never calls stats.nba.com, whatever
+id a client asks for.
+
+Usage:
+    python api.py --port 8000
+    curl -i 'http://127.0.0.1:8000/leaderboard/PTS?k=10&team=BOS&team=LAL&window=10'
+"""
+
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+import argparse
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data.loader import get_data_generation
+from data.seasons import CURRENT_SEASON, SEASON_PATTERN, available_seasons, current_generation, pin_generation, season_dir
+from stats import get_player_stats, get_team_offense_stats, get_team_defense_stats, get_top_30_by_category, query_leaderboard
+from stats.form_engine import DEFAULT_TRIM, DEFAULT_WINDOW
+from stats.league_leaders import MIN_GAMES
+
+DEFAULT_PORT = int(os.environ.get("NBA_STATS_API_PORT", 8000))
+
+# Response bodies kept in memory (route, parameters and generation)
+RESPONSE_CACHE_SIZE = int(os.environ.get("NBA_STATS_API_CACHE_ENTRIES", 1024))
+
+
+class BadRequest(ValueError):
+    """A parameter that can't be parsed; answered with HTTP 400."""
+
+
+def to_json(value):
+    """Make a stats result JSON-compatible: DataFrames become lists of row objects, NaN becomes null."""
+    if isinstance(value, pd.DataFrame):
+        return json.loads(value.to_json(orient='records'))
+    if isinstance(value, dict):
+        return {str(key): to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def _one(params, name, convert, default):
+    values = params.get(name)
+    if not values or values[-1] == "":
+        return default
+    try:
+        return convert(values[-1])
+    except ValueError:
+        raise BadRequest(f"Invalid {name}: {values[-1]!r}")
+
+
+def parse_season(params):
+    season = _one(params, "season", str, CURRENT_SEASON)
+    if not SEASON_PATTERN.match(season):
+        raise BadRequest(f"Invalid season: {season!r} (expected e.g. 2025-26)")
+    return season
+
+
+def parse_window(params):
+    """Form window keyword arguments from the query string."""
+    window = {
+        'window': _one(params, "window", int, DEFAULT_WINDOW),
+        'trim': _one(params, "trim", int, DEFAULT_TRIM),
+        'halflife': _one(params, "halflife", float, None)
+    }
+    if window['window'] < 1 or window['trim'] < 0:
+        raise BadRequest("window must be at least 1 and trim at least 0")
+    return window
+
+
+def route(path, params, season):
+    """
+    Compute the result for a stats route.
+
+    Returns:
+        The stats result (None when there is no data for it)
+
+    Raises:
+        LookupError: Unknown route
+        BadRequest: Invalid parameter
+    """
+    parts = [unquote(part) for part in path.strip('/').split('/')]
+    window = parse_window(params)
+
+    if len(parts) == 2 and parts[0] == "players" and parts[1].isdigit():
+        return get_player_stats(parts[1], season, source="local", **window)
+
+    if len(parts) == 3 and parts[0] == "teams" and parts[1].isdigit() and parts[2] in ("offense", "defense"):
+        if parts[2] == "offense":
+            return get_team_offense_stats(parts[1], season, source="local", **window)
+        return get_team_defense_stats(parts[1], season, source="local", **window)
+
+    if parts == ["leaders"]:
+        return get_top_30_by_category(season, **window) or None
+
+    if len(parts) == 2 and parts[0] == "leaderboard":
+        # team may be repeated or comma separated
+        teams = [team for value in params.get("team", []) for team in value.split(',') if team]
+        try:
+            return query_leaderboard(
+                parts[1],
+                k=_one(params, "k", int, 30),
+                team=teams or None,
+                min_games=_one(params, "min_games", int, MIN_GAMES),
+                min_minutes=_one(params, "min_minutes", float, 0),
+                season=season,
+                **window
+            )
+        except ValueError as e:
+            raise BadRequest(str(e))
+
+    raise LookupError(path)
+
+
+class StatsAPIServer(ThreadingHTTPServer):
+    """
+    HTTP server holding the response cache and request counters.
+
+    Args:
+        address (tuple): (host, port); port 0 picks a free port
+        cache_size (int): Response bodies kept in memory
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, cache_size=RESPONSE_CACHE_SIZE):
+        super().__init__(address, StatsAPIHandler)
+        self.cache_size = cache_size
+        self.responses = OrderedDict()
+        self.counters = {"requests": 0, "not_modified": 0, "cache_hits": 0, "computed": 0, "errors": 0}
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def cached_response(self, key):
+        with self.lock:
+            body = self.responses.get(key)
+            if body is not None:
+                self.responses.move_to_end(key)
+            return body
+
+    def store_response(self, key, body):
+        with self.lock:
+            self.responses[key] = body
+            while len(self.responses) > self.cache_size:
+                self.responses.popitem(last=False)
+
+
+class StatsAPIHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path = url.path.rstrip('/') or '/'
+        params = parse_qs(url.query, keep_blank_values=True)
+        self.server.count("requests")
+
+        if path == "/seasons":
+            seasons = available_seasons() or [CURRENT_SEASON]
+            body = {"current": CURRENT_SEASON,
+                    "seasons": [{"season": s, "generation": current_generation(s)} for s in seasons]}
+            self._send(200, json.dumps(body).encode(), {"Cache-Control": "no-cache"})
+            return
+        if path == "/__stats__":
+            with self.server.lock:
+                body = dict(self.server.counters, cached_responses=len(self.server.responses))
+            self._send(200, json.dumps(body).encode())
+            return
+
+        try:
+            season = parse_season(params)
+        except BadRequest as e:
+            self._error(400, str(e))
+            return
+
+        # One snapshot for the whole request, and the ETag is its generation
+        pin_generation(season)
+        generation = get_data_generation(season_dir(season))
+        etag = f'"{season}-{generation}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(',')]:
+            self.server.count("not_modified")
+            self._send(304, b"", headers)
+            return
+
+        key = (path, tuple(sorted((name, tuple(values)) for name, values in params.items())), generation)
+        body = self.server.cached_response(key)
+        if body is not None:
+            self.server.count("cache_hits")
+            self._send(200, body, headers)
+            return
+
+        try:
+            result = route(path, params, season)
+        except LookupError:
+            self._error(404, f"Unknown route {path}")
+            return
+        except BadRequest as e:
+            self._error(400, str(e))
+            return
+        except Exception as e:
+            self.server.count("errors")
+            self._error(500, str(e))
+            return
+
+        if result is None:
+            self._error(404, f"No data for {path} in {season}", headers)
+            return
+
+        body = json.dumps({"season": season, "generation": generation, "result": to_json(result)}).encode()
+        self.server.store_response(key, body)
+        self.server.count("computed")
+        self._send(200, body, headers)
+
+    def _error(self, status, message, headers=None):
+        self._send(status, json.dumps({"error": message}).encode(), headers)
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        if status != 304:
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_in_background(host="127.0.0.1", port=0, **options):
+    """
+    Start an API server on a daemon thread.
+
+    Returns:
+        StatsAPIServer: Call .shutdown() when done
+    """
+    server = StatsAPIServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cache-size", type=int, default=RESPONSE_CACHE_SIZE, help="Response bodies kept in memory")
+    args = parser.parse_args()
+
+    server = StatsAPIServer((args.host, args.port), cache_size=args.cache_size)
+    print(f"✓ NBA stats API on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"  {server.counters}")
+
+
+if __name__ == "__main__":
+    main()
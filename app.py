@@ -3,22 +3,42 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import time
 
-# Import stats functions from stats module
-from stats import get_player_stats, get_team_offense_stats, get_team_defense_stats, get_top_30_by_category
+# Stats functions, cached per arguments and data generation
+from utils.cache import (
+    cached_player_stats, cached_team_offense_stats, cached_team_defense_stats, cached_top_30_by_category,
+    cached_leaderboard
+)
 
 # Import from cached data modules
 from data.teams import get_all_teams, get_cache_timestamp as get_teams_timestamp, get_cache_season
 from data.players import get_all_players, get_cache_timestamp as get_players_timestamp
+from data.search import get_player_index
+from data.transport import install_transport
+from data.seasons import CURRENT_SEASON, available_seasons, pin_generation
+from stats.league_leaders import FORM_COLUMNS, LEADERBOARDS, MIN_GAMES
+from stats.form_engine import DEFAULT_HALFLIFE, DEFAULT_TRIM, DEFAULT_WINDOW, WINDOW_OPTIONS, describe_window
+
+# Live refreshes are paced by the shared rate limiter instead of fixed sleeps
+install_transport()
 
 st.set_page_config(page_title="NBA Stats Analyzer", page_icon="🏀", layout="wide")
 
 st.title("🏀 NBA Stats Analyzer")
 
+# Seasons with a cache; only the selected season's files are loaded
+seasons = available_seasons() or [CURRENT_SEASON]
+with st.sidebar:
+    season = st.selectbox(
+        "Season", seasons, index=seasons.index(CURRENT_SEASON) if CURRENT_SEASON in seasons else 0, key="season"
+    )
+
+# Every read in this run comes from one snapshot, even if the fetcher publishes a new one meanwhile
+generation = pin_generation(season)
+
 # Load data from cached modules and filter out WNBA
-all_teams_raw = get_all_teams()
-all_players_raw = get_all_players()
+all_teams_raw = get_all_teams(season)
+all_players_raw = get_all_players(season)
 
 # Filter to NBA teams only (team IDs start with 1610612)
 all_teams = [team for team in all_teams_raw if str(team['TEAM_ID']).startswith('1610612')]
@@ -32,26 +52,45 @@ all_players = [
     if player.get('TEAM_ID') in nba_team_ids or player.get('TEAM_ID') == 0
 ]
 
+# Name lookups - the player index is rebuilt only when the data changes
+player_index = get_player_index(all_players, season)
+teams_by_name = {team['TEAM_NAME']: team for team in all_teams}
+team_names = sorted(teams_by_name)
 
-# Hardcoded season
-season = "2025-26"
 
 # Display cache status in sidebar
 with st.sidebar:
     st.header("📊 Data Status")
     
-    teams_updated = get_teams_timestamp()
+    teams_updated = get_teams_timestamp(season)
     st.info(f"**Teams Cache:**\n{teams_updated}")
     
-    players_updated = get_players_timestamp()
+    players_updated = get_players_timestamp(season)
     st.info(f"**Players Cache:**\n{players_updated}")
     
-    current_season = get_cache_season()
+    current_season = get_cache_season(season)
     st.metric("Season", current_season)
+    if generation:
+        st.caption(f"Snapshot {generation}")
     
     st.metric("Teams Loaded", len(all_teams))
     st.metric("Players Loaded", len(all_players))
     
+    st.markdown("---")
+    st.header("📈 Recent Form")
+    form_window = st.selectbox("Games", WINDOW_OPTIONS, index=WINDOW_OPTIONS.index(DEFAULT_WINDOW), key="form_window")
+    form_weighting = st.radio("Weighting", ["Trimmed", "Exponential"], horizontal=True, key="form_weighting")
+    if form_weighting == "Trimmed":
+        form_trim = st.selectbox("Trim highest/lowest", [0, 1, 2], index=DEFAULT_TRIM, key="form_trim")
+        form_halflife = None
+    else:
+        form_trim = DEFAULT_TRIM
+        form_halflife = DEFAULT_HALFLIFE
+    
+    # Passed to every stats call; one engine serves all tabs
+    window = {'window': form_window, 'trim': form_trim, 'halflife': form_halflife}
+    window_text = describe_window(**window)
+    
     st.markdown("---")
     st.caption("Data is cached and refreshed daily at 3 AM")
 
@@ -62,20 +101,26 @@ tab1, tab2, tab3, tab4 = st.tabs(["👤 Player Stats", "🛡️ Team Defense", "
 with tab1:
     st.header(f"👤 Player Offensive Stats - {season}")
     
+    # Optional typo-tolerant search narrows the dropdown
+    player_query = st.text_input("Search Player", key="player_search", placeholder="e.g. jokic, lebrn jmes")
+    if player_query:
+        matches = [p['DISPLAY_FIRST_LAST'] for p in player_index.search(player_query, limit=25)]
+    else:
+        matches = player_index.names
+    
     # Player selection dropdown
-    player_names = ["Find Player"] + sorted([p['DISPLAY_FIRST_LAST'] for p in all_players])
+    player_names = ["Find Player"] + matches
     selected_player_name = st.selectbox("Find Player", player_names, key="player_select")
     
     # Only show button if a player is selected
     if selected_player_name != "Find Player":
-        selected_player = [p for p in all_players if p['DISPLAY_FIRST_LAST'] == selected_player_name][0]
+        selected_player = player_index.exact(selected_player_name)
         player_id = str(selected_player['PERSON_ID'])
         
         # Single button to fetch stats
         if st.button("Get Player Stats", key="player_button"):
             with st.spinner(f"Loading player data for {season}..."):
-                player_data = get_player_stats(player_id, season)
-                time.sleep(0.6)
+                player_data = cached_player_stats(player_id, season, **window)
                 
                 if player_data:
                     # CONTEXT BOX - Show games played vs missed
@@ -158,7 +203,7 @@ with tab1:
                     
                     # Display
                     st.subheader("📊 Stats Comparison")
-                    st.info("Recent Form removes highest and lowest game from last 7")
+                    st.info(f"Recent Form: {window_text}")
                     st.dataframe(styled_df, use_container_width=True, hide_index=True)
                     
                     st.markdown("---")
@@ -181,16 +226,14 @@ with tab1:
 with tab2:
     st.header(f"⚔️ Team Offensive Stats - {season}")
     
-    team_names = sorted([t['TEAM_NAME'] for t in all_teams])
     selected_team_name = st.selectbox("Select Team", team_names, key="offense_select")
     
-    selected_team = [t for t in all_teams if t['TEAM_NAME'] == selected_team_name][0]
+    selected_team = teams_by_name[selected_team_name]
     team_id = str(selected_team['TEAM_ID'])
     
     if st.button("Get Team Offense", key="offense_button"):
         with st.spinner(f"Loading team offense data for {season}..."):
-            team_data = get_team_offense_stats(team_id, season)
-            time.sleep(0.6)
+            team_data = cached_team_offense_stats(team_id, season, **window)
         
         if team_data:
             # Create comparison table
@@ -279,7 +322,7 @@ with tab2:
             styled_df = comparison_df.style.apply(highlight_offensive_trend, axis=1)
             
             st.subheader("📊 Offensive Stats Comparison")
-            st.info("Recent Form removes highest and lowest game from last 7 for PPG")
+            st.info(f"Recent Form: {window_text}" + (" (trim applies to PPG)" if form_halflife is None else ""))
             st.dataframe(styled_df, use_container_width=True, hide_index=True)
             
             st.markdown("---")
@@ -293,16 +336,14 @@ with tab2:
 with tab3:
     st.header(f"🛡️ Team Defensive Stats - {season}")
     
-    team_names = sorted([t['TEAM_NAME'] for t in all_teams])
     selected_team_name_def = st.selectbox("Select Team", team_names, key="defense_select")
     
-    selected_team_def = [t for t in all_teams if t['TEAM_NAME'] == selected_team_name_def][0]
+    selected_team_def = teams_by_name[selected_team_name_def]
     team_id_def = str(selected_team_def['TEAM_ID'])
     
     if st.button("Get Team Defense", key="defense_button"):
         with st.spinner(f"Loading team defense data for {season}..."):
-            defense_data = get_team_defense_stats(team_id_def, season)
-            time.sleep(0.6)
+            defense_data = cached_team_defense_stats(team_id_def, season, **window)
         
         if defense_data:
             # Create comparison table
@@ -388,7 +429,7 @@ with tab3:
             styled_df = comparison_df.style.apply(highlight_defensive_trend, axis=1)
             
             st.subheader("📊 Defensive Stats Comparison")
-            st.info("Recent Form removes highest and lowest game from last 7 for PPG")
+            st.info(f"Recent Form: {window_text}" + (" (trim applies to opponent PPG)" if form_halflife is None else ""))
             st.dataframe(styled_df, use_container_width=True, hide_index=True)
             
             st.markdown("---")
@@ -399,12 +440,12 @@ with tab3:
 
 # TAB 4: LEAGUE LEADERS
 with tab4:
-    st.header(f"🏆 League Leaders - Last 7 Games - {season}")
-    st.info("📈 Rankings based on recent form (last 7 games, trimmed) from cached data")
+    st.header(f"🏆 League Leaders - Last {form_window} Games - {season}")
+    st.info(f"📈 Rankings based on recent form ({window_text}) from cached data")
     
     if st.button("Load League Leaders", key="leaders_button"):
         with st.spinner("Calculating recent form from cached data..."):
-            leaderboards = get_top_30_by_category()
+            leaderboards = cached_top_30_by_category(season, **window)
             
             if leaderboards:
                 # Display each leaderboard
@@ -437,6 +478,37 @@ with tab4:
                         st.dataframe(leaderboards['Steals Per Game'], use_container_width=True, hide_index=True)
             else:
                 st.error("No cached data found. Please ensure player data is cached.")
+    
+    # Any category, size or filter is an index query on the precomputed form table
+    st.markdown("---")
+    st.subheader("🔎 Custom Leaderboard")
+    
+    team_abbreviations = sorted({p['TEAM_ABBREVIATION'] for p in all_players if p.get('TEAM_ABBREVIATION')})
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        board_category = st.selectbox("Category", list(LEADERBOARDS) + FORM_COLUMNS, key="board_category")
+        board_size = st.number_input("Players", min_value=1, max_value=500, value=30, key="board_size")
+    with col2:
+        board_teams = st.multiselect("Teams", team_abbreviations, key="board_teams")
+    with col3:
+        board_min_games = st.number_input("Min games", min_value=1, max_value=form_window, value=min(MIN_GAMES, form_window), key="board_min_games")
+        board_min_minutes = st.number_input("Min minutes", min_value=0.0, max_value=48.0, value=0.0, step=1.0, key="board_min_minutes")
+    
+    board = cached_leaderboard(
+        board_category, int(board_size), team=board_teams or None,
+        min_games=int(board_min_games), min_minutes=board_min_minutes, season=season, **window
+    )
+    
+    if board.empty:
+        st.warning("No players match these filters.")
+    else:
+        st.dataframe(board, use_container_width=True, hide_index=True)
+        st.download_button(
+            "Download CSV", board.to_csv(index=False),
+            file_name=f"leaders_{board_category.replace(' ', '_').lower()}.csv",
+            mime="text/csv", key="board_download"
+        )
 
 
 # Footer
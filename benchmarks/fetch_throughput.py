@@ -0,0 +1,89 @@
+"""
+Fetcher throughput benchmark against the local nba_api stand-in.
+
+Runs fetch_all_player_stats() for a synthetic league served by
+scripts/nba_api_server.py with different worker counts and compares it to the
+old fixed-sleep schedule. Nothing touches the network or the real cached_data
+directory.
+
+Usage:
+    python benchmarks/fetch_throughput.py --players 60 --latency 0.2 --rate 10 --workers 1 4 8
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The fetcher writes under NBA_CACHE_DIR (season partition and career archive),
+# so point it at a scratch tree before importing it
+OUTPUT_ROOT = tempfile.mkdtemp(prefix="nba_fetch_output_")
+os.environ["NBA_CACHE_DIR"] = OUTPUT_ROOT
+
+from data import transport
+from scripts import fetch_nba_data as fetcher
+from scripts.nba_api_server import serve_in_background
+from synthetic_league import generate_league
+
+# Old serial schedule: 0.6 s after each of the 2 calls per player, 2 s between batches of 10
+LEGACY_DELAY = 0.6
+LEGACY_BATCH_DELAY = 2.0
+LEGACY_BATCH_SIZE = 10
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake endpoint latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--rate", type=float, default=10.0, help="Token bucket requests per second")
+    parser.add_argument("--burst", type=int, default=4)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    league_dir = tempfile.mkdtemp(prefix="nba_league_")
+    with contextlib.redirect_stdout(io.StringIO()):
+        generate_league(league_dir, players=args.players, games=10)
+    server = serve_in_background(cache_dir=league_dir, latency=args.latency, throttle_rate=args.error_rate)
+    transport.use_api_server(server.base_url)
+    transport.BACKOFF_SECONDS = 0.1
+
+    # Warm the career archive first so every timed run makes the same requests
+    # (a game log per player; careers are only fetched again once the archive is due)
+    with contextlib.redirect_stdout(io.StringIO()):
+        fetcher.fetch_all_player_stats()
+
+    legacy_requests = args.players * 2
+    batches = (args.players + LEGACY_BATCH_SIZE - 1) // LEGACY_BATCH_SIZE
+    legacy = legacy_requests * (args.latency + LEGACY_DELAY) + (batches - 1) * LEGACY_BATCH_DELAY
+    print(f"{args.players} players, {args.latency * 1000:.0f} ms latency")
+    print(f"  legacy fixed-sleep schedule, {legacy_requests} requests (estimated): {legacy:.1f}s")
+
+    for workers in args.workers:
+        transport.limiter = transport.TokenBucket(args.rate, args.burst)
+        start = time.perf_counter()
+        before = transport.request_stats()
+        fetcher.FETCH_WORKERS = workers
+        with contextlib.redirect_stdout(io.StringIO()):
+            fetcher.fetch_all_player_stats()
+        elapsed = time.perf_counter() - start
+        after = transport.request_stats()
+        made = after["requests"] - before["requests"]
+        retried = after["retries"] - before["retries"]
+        failed = fetcher.stats["failed_fetches"]
+        print(f"  workers={workers:<3} {elapsed:6.1f}s  {made:4d} requests ({retried} retried)  "
+              f"{made / elapsed:6.1f} req/s  ({failed} failed so far)")
+
+    server.shutdown()
+    shutil.rmtree(league_dir, ignore_errors=True)
+    shutil.rmtree(OUTPUT_ROOT, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
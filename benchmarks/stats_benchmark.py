@@ -0,0 +1,273 @@
+"""
+Stats entry point benchmark on a synthetic league.
+
+Generates a cached_data tree with benchmarks/synthetic_league.py (or reuses
+the synthetic tree NBA_CACHE_DIR points at), runs the fetcher's
+materialization stage on it and times get_top_30_by_category,
+query_leaderboard, get_player_stats and the team offense/defense views.
+With --database the embedded SQLite backend is built and enabled as well, and
+query_period_leaders is timed too.
+Every entry point is timed cold (memoized files and form tables dropped) and
+warm, and the peak traced memory of a cold call is recorded. Results can be
+written as JSON and compared against an earlier run.
+
+Usage:
+    python benchmarks/stats_benchmark.py --players 450 --games 60 --json baseline.json
+    python benchmarks/stats_benchmark.py --players 450 --games 60 --compare baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Cache paths are resolved when the data modules are imported, so point them
+# at the synthetic tree before importing any of them
+OWNS_DATA_DIR = "NBA_CACHE_DIR" not in os.environ
+if OWNS_DATA_DIR:
+    os.environ["NBA_CACHE_DIR"] = tempfile.mkdtemp(prefix="nba_stats_benchmark_")
+DATA_DIR = os.environ["NBA_CACHE_DIR"]
+
+from data import cache_format, database, get_all_players, get_all_teams
+from data.loader import clear_loader_cache
+from data.seasons import season_dir
+from stats import get_player_stats, get_team_offense_stats, get_team_defense_stats
+from stats.league_leaders import clear_form_tables, get_top_30_by_category, query_leaderboard, query_period_leaders
+from stats.materialize import materialize_all
+from synthetic_league import MARKER_FILE, SEASON, generate_league
+
+
+def silenced():
+    """The stats functions log every step; keep the benchmark output readable."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def clear_caches():
+    clear_loader_cache()
+    clear_form_tables()
+
+
+def prepare_data(args):
+    """
+    Generate the synthetic tree unless DATA_DIR already holds one of the requested scale.
+
+    Returns:
+        dict: Seconds spent generating and materializing
+    """
+    scale = {"players": args.players, "seasons": args.seasons, "games": args.games, "seed": args.seed,
+             "format": cache_format.CACHE_FORMAT}
+    marker = os.path.join(DATA_DIR, MARKER_FILE)
+    timings = {"generate_seconds": 0.0, "database_seconds": 0.0, "materialize_seconds": 0.0}
+
+    existing = None
+    if os.path.exists(marker):
+        with open(marker) as f:
+            existing = json.load(f)
+    elif os.listdir(DATA_DIR):
+        sys.exit(f"{DATA_DIR} is not empty and not a synthetic league; refusing to write into it")
+
+    if existing != scale:
+        # A synthetic tree of another scale - start over
+        for name in os.listdir(DATA_DIR):
+            path = os.path.join(DATA_DIR, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        start = time.perf_counter()
+        generate_league(DATA_DIR, args.players, args.seasons, args.games, args.seed)
+        timings["generate_seconds"] = round(time.perf_counter() - start, 3)
+
+    database.USE_DATABASE = args.database
+    database_file = os.path.join(season_dir(SEASON, DATA_DIR), database.DATABASE_FILE)
+    if not args.database:
+        if os.path.exists(database_file):
+            os.remove(database_file)
+    elif not os.path.exists(database_file):
+        start = time.perf_counter()
+        with silenced():
+            database.build_database(season_dir(SEASON, DATA_DIR))
+        timings["database_seconds"] = round(time.perf_counter() - start, 3)
+
+    materialized_dir = os.path.join(season_dir(SEASON, DATA_DIR), "materialized")
+    if not args.materialize:
+        shutil.rmtree(materialized_dir, ignore_errors=True)
+    elif not os.path.isdir(materialized_dir):
+        start = time.perf_counter()
+        with silenced():
+            materialize_all(SEASON, materialized_dir)
+        timings["materialize_seconds"] = round(time.perf_counter() - start, 3)
+
+    return timings
+
+
+def measure(calls, repeat):
+    """
+    Time a list of zero-argument calls: one cold call, then `repeat` warm passes over all of them.
+
+    Returns:
+        dict: Timings in milliseconds and the peak traced memory of a cold call in MB
+    """
+    with silenced():
+        clear_caches()
+        start = time.perf_counter()
+        calls[0]()
+        cold = time.perf_counter() - start
+
+        # Tracing slows the call down, so memory gets its own cold run
+        clear_caches()
+        tracemalloc.start()
+        calls[0]()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        warm = []
+        for _ in range(repeat):
+            for call in calls:
+                start = time.perf_counter()
+                call()
+                warm.append(time.perf_counter() - start)
+
+    warm_ms = np.array(warm) * 1000
+    return {
+        "calls": len(calls),
+        "cold_ms": round(cold * 1000, 3),
+        "warm_median_ms": round(float(np.median(warm_ms)), 3),
+        "warm_p95_ms": round(float(np.percentile(warm_ms, 95)), 3),
+        "warm_min_ms": round(float(warm_ms.min()), 3),
+        "peak_memory_mb": round(peak / 2**20, 2)
+    }
+
+
+def entry_points(args):
+    """Benchmark name -> list of calls."""
+    rng = np.random.default_rng(args.seed)
+    player_ids = [p['PERSON_ID'] for p in get_all_players()]
+    player_ids = rng.choice(player_ids, min(args.sample, len(player_ids)), replace=False).tolist()
+    team_ids = [t['TEAM_ID'] for t in get_all_teams()][:args.sample]
+
+    calls = {
+        "get_top_30_by_category": [lambda: get_top_30_by_category()],
+        "query_leaderboard": [
+            lambda: query_leaderboard('Points Per Game'),
+            lambda: query_leaderboard('PTS', k=10, team=['BOS', 'LAL'], min_minutes=20),
+            lambda: query_leaderboard('TOV', k=50, min_games=5, window=10)
+        ],
+        "get_player_stats": [
+            lambda player_id=player_id: get_player_stats(player_id, SEASON, source="local")
+            for player_id in player_ids
+        ],
+        "get_player_stats[window=10]": [
+            lambda player_id=player_id: get_player_stats(player_id, SEASON, source="local", window=10)
+            for player_id in player_ids
+        ],
+        "get_team_offense_stats": [
+            lambda team_id=team_id: get_team_offense_stats(team_id, SEASON, source="local") for team_id in team_ids
+        ],
+        "get_team_defense_stats": [
+            lambda team_id=team_id: get_team_defense_stats(team_id, SEASON, source="local") for team_id in team_ids
+        ]
+    }
+    if args.database:
+        calls["query_period_leaders"] = [
+            lambda: query_period_leaders('PTS', since='2025-12-01', min_win_pct=0.5),
+            lambda: query_period_leaders('AST', k=10, team=['BOS', 'LAL'], min_games=1),
+            lambda: query_period_leaders('FG3M', since='2025-11-01', until='2025-11-30')
+        ]
+    return calls
+
+
+def compare(results, baseline_file, threshold, log=sys.stdout):
+    """Print the change against a baseline run; returns the names that got slower than threshold x."""
+    with open(baseline_file) as f:
+        baseline = json.load(f)
+    if baseline.get("scale") != results["scale"]:
+        print(f"⚠ Baseline scale {baseline.get('scale')} differs from this run's", file=log)
+
+    regressions = []
+    print(f"\nAgainst {baseline_file}:", file=log)
+    for name, result in results["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            continue
+        ratios = {
+            metric: result[metric] / before[metric] if before[metric] else 1.0
+            for metric in ("cold_ms", "warm_median_ms", "peak_memory_mb")
+        }
+        slower = [metric for metric, ratio in ratios.items() if ratio > threshold]
+        mark = "✗" if slower else "✓"
+        print(f"  {mark} {name:<30} cold x{ratios['cold_ms']:.2f}  warm x{ratios['warm_median_ms']:.2f}  "
+              f"memory x{ratios['peak_memory_mb']:.2f}", file=log)
+        if slower:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=450)
+    parser.add_argument("--seasons", type=int, default=5, help="Seasons in each career archive")
+    parser.add_argument("--games", type=int, default=60, help="Games played by each team this season")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sample", type=int, default=30, help="Players/teams timed per entry point")
+    parser.add_argument("--repeat", type=int, default=5, help="Warm passes over the sample")
+    parser.add_argument("--no-materialize", dest="materialize", action="store_false",
+                        help="Skip the materialization stage so every view is computed")
+    parser.add_argument("--database", action="store_true",
+                        help="Build and enable the embedded SQLite backend (data/database.py)")
+    parser.add_argument("--json", help="Write the results to this file ('-' for stdout)")
+    parser.add_argument("--compare", help="Results file of an earlier run")
+    parser.add_argument("--threshold", type=float, default=1.5,
+                        help="Slowdown ratio reported as a regression (exit code 1)")
+    args = parser.parse_args()
+
+    try:
+        timings = prepare_data(args)
+        results = {
+            "timestamp": datetime.now().isoformat(),
+            "scale": {"players": args.players, "seasons": args.seasons, "games": args.games,
+                      "seed": args.seed, "format": cache_format.CACHE_FORMAT, "materialized": args.materialize,
+                      "database": args.database},
+            "environment": {"python": platform.python_version(), "numpy": np.__version__,
+                            "pandas": pd.__version__, "platform": platform.platform()},
+            **timings,
+            "results": {}
+        }
+
+        log = sys.stderr if args.json == "-" else sys.stdout
+        print(f"{args.players} players, {args.games} games per team, {args.seasons} seasons in {DATA_DIR}", file=log)
+        for name, calls in entry_points(args).items():
+            result = measure(calls, args.repeat)
+            results["results"][name] = result
+            print(f"  {name:<30} cold {result['cold_ms']:9.2f} ms  warm {result['warm_median_ms']:8.3f} ms "
+                  f"(p95 {result['warm_p95_ms']:.3f})  peak {result['peak_memory_mb']:7.2f} MB", file=log)
+    finally:
+        if OWNS_DATA_DIR:
+            shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+    if args.json == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare and compare(results, args.compare, args.threshold, log):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""
+Synthetic league data in the cached_data layout written by scripts/fetch_nba_data.py.
+
+Writes a published generation of the season partition
+(seasons/<season>/generations/<id>/) with players.json,
+teams.json, standings.json, league_games.json, one file per player in
+player_stats/ and one per team in team_gamelogs/, plus one career archive per
+player in player_careers/, with the result set headers of the real nba_api endpoints.
+The fetcher's consolidation stages (player manifest, game stores) are then
+run on the tree, so readers see exactly what a fetch run leaves behind.
+
+Scale is set by the number of players, the seasons in each career archive and
+the games each team (and so each player) has played this season. Output is
+deterministic for a given seed.
+
+Usage:
+    python benchmarks/synthetic_league.py OUTPUT_DIR --players 450 --seasons 5 --games 60
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nba_api.stats.endpoints as nba_endpoints
+from nba_api.stats.static import teams as static_teams
+
+from data import cache_format
+from data.career_archive import current_season_rows, write_career_archive
+from data.game_store import build_player_game_store, build_team_game_store
+from data.manifest import build_player_manifest
+from data.seasons import publish_generation, stage_generation
+
+SEASON = "2025-26"
+SEASON_START = date(2025, 10, 21)
+
+# Written next to the data so a benchmark can tell a synthetic tree from a real cache
+MARKER_FILE = "synthetic_league.json"
+
+FIRST_NAMES = [
+    "Aaron", "Bam", "Caleb", "Darius", "Evan", "Franz", "Gary", "Hugo", "Isaiah", "Jalen",
+    "Kevin", "Luka", "Marcus", "Nikola", "Obi", "Paolo", "Quentin", "Rudy", "Scottie", "Tyrese",
+    "Victor", "Walker", "Xavier", "Zach", "Andre", "Brandon", "Cade", "Dillon", "Jaren", "Keegan"
+]
+LAST_NAMES = [
+    "Adams", "Barnes", "Carter", "Davis", "Edwards", "Fox", "Green", "Holiday", "Irving", "Johnson",
+    "King", "Lopez", "Murray", "Nance", "Okafor", "Porter", "Quickley", "Reid", "Smith", "Thompson",
+    "Vassell", "Walker", "Young", "Zubac", "Allen", "Brown", "Collins", "Dunn", "Ellis", "Flynn"
+]
+
+# Box score columns that add up over games; the percentages are derived from them
+COUNTING_STATS = ['MIN', 'FGM', 'FGA', 'FG3M', 'FG3A', 'FTM', 'FTA', 'OREB', 'DREB', 'REB',
+                  'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS']
+PERCENTAGES = [('FGM', 'FGA', 'FG_PCT'), ('FG3M', 'FG3A', 'FG3_PCT'), ('FTM', 'FTA', 'FT_PCT')]
+
+
+def result_set_headers(endpoint_class):
+    """Result set name -> headers for an nba_api endpoint class."""
+    return endpoint_class.expected_data
+
+
+def make_row(headers, values):
+    """A row dict with every header of the result set (None where no value is generated)."""
+    return {header: values.get(header) for header in headers}
+
+
+def sum_box_scores(box_scores):
+    """Counting stat totals over a list of box scores (or rows), with the shooting percentages."""
+    totals = {col: sum(box[col] or 0 for box in box_scores) for col in COUNTING_STATS}
+    for made, attempts, pct in PERCENTAGES:
+        totals[pct] = round(totals[made] / totals[attempts], 3) if totals[attempts] else 0.0
+    return totals
+
+
+def season_label(start_year):
+    return f"{start_year}-{str(start_year + 1)[2:]}"
+
+
+def player_name(index):
+    first = FIRST_NAMES[index % len(FIRST_NAMES)]
+    last = LAST_NAMES[(index // len(FIRST_NAMES)) % len(LAST_NAMES)]
+    cycle = index // (len(FIRST_NAMES) * len(LAST_NAMES))
+    return f"{first} {last}" + (f" {cycle + 1}" if cycle else "")
+
+
+def shooting(rng, attempts, pct):
+    """(made, attempts, pct) for a number of attempts and a make probability."""
+    attempts = int(attempts)
+    made = int(rng.binomial(attempts, pct)) if attempts > 0 else 0
+    return made, attempts, round(made / attempts, 3) if attempts else 0.0
+
+
+def team_box_score(rng):
+    """Team totals for one game."""
+    fgm, fga, fg_pct = shooting(rng, rng.normal(88, 5), 0.47)
+    fg3m, fg3a, fg3_pct = shooting(rng, min(rng.normal(36, 5), fga), 0.36)
+    fg3m = min(fg3m, fgm)
+    ftm, fta, ft_pct = shooting(rng, max(rng.normal(22, 5), 0), 0.78)
+    oreb, dreb = int(rng.poisson(10)), int(rng.poisson(34))
+    return {
+        'MIN': 240, 'FGM': fgm, 'FGA': fga, 'FG_PCT': fg_pct, 'FG3M': fg3m, 'FG3A': fg3a, 'FG3_PCT': fg3_pct,
+        'FTM': ftm, 'FTA': fta, 'FT_PCT': ft_pct, 'OREB': oreb, 'DREB': dreb, 'REB': oreb + dreb,
+        'AST': int(rng.poisson(26)), 'STL': int(rng.poisson(8)), 'BLK': int(rng.poisson(5)),
+        'TOV': int(rng.poisson(14)), 'PF': int(rng.poisson(19)), 'PTS': 2 * fgm + fg3m + ftm
+    }
+
+
+def make_schedule(teams, games, rng):
+    """
+    Every team plays `games` games: each round pairs all teams at random, one round every other day.
+
+    Returns:
+        list: (game_id, date, home team, away team, home box score, away box score), oldest first
+    """
+    schedule = []
+    for round_number in range(games):
+        game_date = SEASON_START + timedelta(days=2 * round_number)
+        order = rng.permutation(len(teams))
+        for home, away in zip(order[0::2], order[1::2]):
+            home_box, away_box = team_box_score(rng), team_box_score(rng)
+            if home_box['PTS'] == away_box['PTS']:
+                # No ties; the home team wins it at the line
+                home_box['FTM'] += 1
+                home_box['FTA'] += 1
+                home_box['PTS'] += 1
+            game_id = f"00225{len(schedule) + 1:05d}"
+            schedule.append((game_id, game_date, teams[home], teams[away], home_box, away_box))
+    return schedule
+
+
+def team_games(schedule):
+    """Team id -> that team's games as (game_id, date, matchup, WL, box, opponent box), oldest first."""
+    by_team = {}
+    for game_id, game_date, home, away, home_box, away_box in schedule:
+        home_won = home_box['PTS'] > away_box['PTS']
+        by_team.setdefault(home['id'], []).append(
+            (game_id, game_date, f"{home['abbreviation']} vs. {away['abbreviation']}",
+             'W' if home_won else 'L', home_box, away_box))
+        by_team.setdefault(away['id'], []).append(
+            (game_id, game_date, f"{away['abbreviation']} @ {home['abbreviation']}",
+             'L' if home_won else 'W', away_box, home_box))
+    return by_team
+
+
+def player_box_score(rng, role, result):
+    """One player's line in a game; role scales minutes and production."""
+    minutes = float(np.clip(rng.normal(12 + 24 * role, 4), 4, 44))
+    scale = minutes / 36 * (0.6 + 0.8 * role)
+    fgm, fga, fg_pct = shooting(rng, rng.poisson(14 * scale), 0.46)
+    fg3m, fg3a, fg3_pct = shooting(rng, min(rng.poisson(5 * scale), fga), 0.36)
+    fg3m = min(fg3m, fgm)
+    ftm, fta, ft_pct = shooting(rng, rng.poisson(4 * scale), 0.78)
+    oreb, dreb = int(rng.poisson(1.5 * scale)), int(rng.poisson(4.5 * scale))
+    pts = 2 * fgm + fg3m + ftm
+    return {
+        'MIN': round(minutes), 'FGM': fgm, 'FGA': fga, 'FG_PCT': fg_pct, 'FG3M': fg3m, 'FG3A': fg3a,
+        'FG3_PCT': fg3_pct, 'FTM': ftm, 'FTA': fta, 'FT_PCT': ft_pct, 'OREB': oreb, 'DREB': dreb,
+        'REB': oreb + dreb, 'AST': int(rng.poisson(4 * scale)), 'STL': int(rng.poisson(1.1 * scale)),
+        'BLK': int(rng.poisson(0.8 * scale)), 'TOV': int(rng.poisson(2 * scale)), 'PF': int(rng.poisson(2.2 * scale)),
+        'PTS': pts, 'PLUS_MINUS': int(rng.normal(4 if result == 'W' else -4, 8))
+    }
+
+
+def season_totals(player_id, season, team, age, box_scores, headers):
+    """A SeasonTotalsRegularSeason row summing a list of box scores."""
+    totals = sum_box_scores(box_scores)
+    totals.update(
+        PLAYER_ID=player_id, SEASON_ID=season, LEAGUE_ID='00', TEAM_ID=team['id'],
+        TEAM_ABBREVIATION=team['abbreviation'], PLAYER_AGE=float(age), GP=len(box_scores), GS=0
+    )
+    return make_row(headers, totals)
+
+
+def career_data(rng, player_id, team, seasons, current_box_scores, games):
+    """A PlayerCareerStats normalized dict with `seasons` regular seasons ending with the current one."""
+    sets = result_set_headers(nba_endpoints.playercareerstats.PlayerCareerStats)
+    career = {name: [] for name in sets}
+    rows = career['SeasonTotalsRegularSeason']
+    headers = sets['SeasonTotalsRegularSeason']
+
+    start_year = int(SEASON[:4])
+    age = int(rng.integers(20, 34))
+    role = rng.uniform(0, 1)
+    for offset in range(seasons - 1, 0, -1):
+        past = [player_box_score(rng, role, 'W') for _ in range(int(rng.integers(games // 2 + 1, 83)))]
+        rows.append(season_totals(player_id, season_label(start_year - offset), team, age - offset, past, headers))
+    rows.append(season_totals(player_id, SEASON, team, age, current_box_scores, headers))
+
+    totals = sum_box_scores(rows)
+    career['CareerTotalsRegularSeason'] = [make_row(sets['CareerTotalsRegularSeason'], dict(
+        totals, PLAYER_ID=player_id, LEAGUE_ID='00', Team_ID=team['id'],
+        GP=sum(row['GP'] for row in rows), GS=0
+    ))]
+    return career
+
+
+def write_cache(output_dir, filename, data, **metadata):
+    """Write a cache file with the fetcher's metadata envelope."""
+    output = {"last_updated": datetime.now().isoformat(), **metadata, "season": SEASON, "data": data}
+    cache_format.dump(output, os.path.join(output_dir, filename))
+
+
+def generate_league(output_dir, players=450, seasons=5, games=60, seed=0):
+    """
+    Write a synthetic cached_data tree and build its manifest and game stores.
+
+    Args:
+        output_dir (str): Directory to write (created if missing)
+        players (int): Number of players, spread evenly over the 30 teams
+        seasons (int): Regular seasons in each player's career archive, current one included
+        games (int): Games each team has played this season (players sit out about 1 in 10)
+        seed (int): Random seed
+
+    Returns:
+        dict: The scale written, also stored in MARKER_FILE
+    """
+    rng = np.random.default_rng(seed)
+    teams = sorted(static_teams.get_teams(), key=lambda t: t['id'])
+    schedule = make_schedule(teams, games, rng)
+    games_by_team = team_games(schedule)
+
+    # Season files go in the season's partition; the career archive spans seasons
+    generation, partition = stage_generation(SEASON, cache_root=output_dir)
+    career_dir = os.path.join(output_dir, "player_careers")
+    os.makedirs(career_dir, exist_ok=True)
+    for subdir in ("player_stats", "team_gamelogs"):
+        os.makedirs(os.path.join(partition, subdir), exist_ok=True)
+
+    # Team files: per-team game logs, the league-wide game table, season totals and standings
+    team_log_headers = result_set_headers(nba_endpoints.teamgamelog.TeamGameLog)['TeamGameLog']
+    finder_headers = result_set_headers(nba_endpoints.leaguegamefinder.LeagueGameFinder)['LeagueGameFinderResults']
+    dash_headers = result_set_headers(nba_endpoints.leaguedashteamstats.LeagueDashTeamStats)['LeagueDashTeamStats']
+    standings_headers = result_set_headers(nba_endpoints.leaguestandingsv3.LeagueStandingsV3)['Standings']
+
+    finder_rows, dash_rows, standings_rows = [], [], []
+    for team in teams:
+        log_rows = []
+        wins = losses = 0
+        for game_id, game_date, matchup, wl, box, opp_box in games_by_team[team['id']]:
+            wins += wl == 'W'
+            losses += wl == 'L'
+            values = dict(box, GAME_DATE=game_date.strftime("%b %d, %Y"), MATCHUP=matchup, WL=wl,
+                          PLUS_MINUS=box['PTS'] - opp_box['PTS'])
+            log_rows.append(make_row(team_log_headers, dict(
+                values, Team_ID=team['id'], Game_ID=game_id, W=wins, L=losses,
+                W_PCT=round(wins / (wins + losses), 3)
+            )))
+            finder_rows.append(make_row(finder_headers, dict(
+                values, SEASON_ID=f"2{SEASON[:4]}", TEAM_ID=team['id'], TEAM_ABBREVIATION=team['abbreviation'],
+                TEAM_NAME=team['full_name'], GAME_ID=game_id, GAME_DATE=game_date.isoformat()
+            )))
+
+        # Game logs are most recent first
+        write_cache(os.path.join(partition, "team_gamelogs"),
+                    f"{team['id']}_{team['full_name'].replace(' ', '_')}.json",
+                    {"TeamGameLog": log_rows[::-1]}, team_id=team['id'], team_name=team['full_name'])
+
+        played = len(log_rows)
+        dash_rows.append(make_row(dash_headers, dict(
+            sum_box_scores(log_rows), TEAM_ID=team['id'], TEAM_NAME=team['full_name'], GP=played,
+            W=wins, L=losses, W_PCT=round(wins / played, 3) if played else 0.0
+        )))
+        standings_rows.append(make_row(standings_headers, dict(
+            LeagueID='00', SeasonID=f"2{SEASON[:4]}", TeamID=team['id'], TeamCity=team['city'],
+            TeamName=team['nickname'], TeamSlug=team['nickname'].lower(), WINS=wins, LOSSES=losses,
+            WinPCT=round(wins / played, 3) if played else 0.0, Record=f"{wins}-{losses}"
+        )))
+
+    finder_rows.sort(key=lambda row: (row['GAME_DATE'], row['GAME_ID']), reverse=True)
+    write_cache(partition, "league_games.json", {"LeagueGameFinderResults": finder_rows})
+    write_cache(partition, "teams.json", {"LeagueDashTeamStats": dash_rows})
+    write_cache(partition, "standings.json", {"Standings": standings_rows})
+
+    # Player files: current season game log + season rows, career archive, players list
+    game_log_headers = result_set_headers(nba_endpoints.playergamelog.PlayerGameLog)['PlayerGameLog']
+    all_players_headers = result_set_headers(nba_endpoints.commonallplayers.CommonAllPlayers)['CommonAllPlayers']
+
+    player_rows = []
+    for index in range(players):
+        player_id = 1000000 + index
+        name = player_name(index)
+        team = teams[index % len(teams)]
+        role = rng.beta(2, 3)
+
+        box_scores, log_rows = [], []
+        for game_id, game_date, matchup, wl, _, _ in games_by_team[team['id']]:
+            if rng.random() < 0.1:
+                continue
+            box = player_box_score(rng, role, wl)
+            box_scores.append(box)
+            log_rows.append(make_row(game_log_headers, dict(
+                box, SEASON_ID=f"2{SEASON[:4]}", Player_ID=player_id, Game_ID=game_id,
+                GAME_DATE=game_date.strftime("%b %d, %Y"), MATCHUP=matchup, WL=wl, VIDEO_AVAILABLE=0
+            )))
+
+        career = career_data(rng, player_id, team, seasons, box_scores, games)
+        write_career_archive(player_id, name, career, career_dir)
+
+        output = {
+            "last_updated": datetime.now().isoformat(),
+            "player_id": player_id,
+            "player_name": name,
+            "team_abbreviation": team['abbreviation'],
+            "season": SEASON,
+            "data": current_season_rows(career, SEASON),
+            "game_log": {"PlayerGameLog": log_rows[::-1]}
+        }
+        cache_format.dump(output, os.path.join(partition, "player_stats", f"{player_id}_{name.replace(' ', '_')}.json"))
+
+        first, last = name.split(' ', 1)
+        player_rows.append(make_row(all_players_headers, dict(
+            PERSON_ID=player_id, DISPLAY_LAST_COMMA_FIRST=f"{last}, {first}", DISPLAY_FIRST_LAST=name,
+            ROSTERSTATUS=1, FROM_YEAR=str(int(SEASON[:4]) - seasons + 1), TO_YEAR=SEASON[:4],
+            PLAYERCODE=name.lower().replace(' ', '_'), PLAYER_SLUG=name.lower().replace(' ', '-'),
+            TEAM_ID=team['id'], TEAM_CITY=team['city'], TEAM_NAME=team['nickname'],
+            TEAM_ABBREVIATION=team['abbreviation'], TEAM_SLUG=team['nickname'].lower(),
+            TEAM_CODE=team['nickname'].lower(), GAMES_PLAYED_FLAG='Y', OTHERLEAGUE_EXPERIENCE_CH='00'
+        )))
+
+    write_cache(partition, "players.json", {"CommonAllPlayers": player_rows})
+
+    # The fetcher's consolidation stages
+    with contextlib.redirect_stdout(io.StringIO()):
+        build_player_manifest(
+            player_stats_dir=os.path.join(partition, "player_stats"),
+            output_file=os.path.join(partition, "player_manifest.json")
+        )
+        build_player_game_store(
+            player_stats_dir=os.path.join(partition, "player_stats"),
+            output_file=os.path.join(partition, "player_games.npz"),
+            players_file=os.path.join(partition, "players.json")
+        )
+        build_team_game_store(
+            team_logs_dir=os.path.join(partition, "team_gamelogs"),
+            output_file=os.path.join(partition, "team_games.npz"),
+            league_games_file=os.path.join(partition, "league_games.json")
+        )
+
+    publish_generation(SEASON, generation, cache_root=output_dir)
+
+    scale = {"players": players, "seasons": seasons, "games": games, "seed": seed,
+             "format": cache_format.CACHE_FORMAT}
+    with open(os.path.join(output_dir, MARKER_FILE), 'w') as f:
+        json.dump(scale, f, indent=2)
+    return scale
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output_dir")
+    parser.add_argument("--players", type=int, default=450)
+    parser.add_argument("--seasons", type=int, default=5, help="Seasons in each career archive")
+    parser.add_argument("--games", type=int, default=60, help="Games played by each team this season")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=cache_format.available_formats(), default=cache_format.CACHE_FORMAT)
+    args = parser.parse_args()
+
+    if os.path.isdir(args.output_dir) and os.listdir(args.output_dir) \
+            and not os.path.exists(os.path.join(args.output_dir, MARKER_FILE)):
+        sys.exit(f"{args.output_dir} is not empty and not a synthetic league; refusing to write into it")
+
+    cache_format.CACHE_FORMAT = args.format
+    start = datetime.now()
+    scale = generate_league(args.output_dir, args.players, args.seasons, args.games, args.seed)
+    elapsed = (datetime.now() - start).total_seconds()
+    print(f"✓ {args.output_dir}: {scale['players']} players, {scale['games']} games per team, "
+          f"{scale['seasons']} seasons ({elapsed:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
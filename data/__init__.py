@@ -2,5 +2,10 @@
 
 from .players import get_all_players
 from .teams import get_all_teams
+from . import transport
+
+# The fetcher and the live stats paths both import this package first
+if transport.API_BASE_URL:
+    transport.use_api_server(transport.API_BASE_URL)
 
 __all__ = ['get_all_players', 'get_all_teams']
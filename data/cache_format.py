@@ -0,0 +1,159 @@
+"""Cache serialization - JSON, gzipped JSON or msgpack files behind one reader
+
+The fetcher picks the format (--format / NBA_CACHE_FORMAT). Every cache file
+keeps its logical ".json" name in the code; load() finds whichever format is on
+disk and detects it from the file's first bytes, so readers never need to know
+which one was written. Plain JSON is the default because the daily workflow
+commits cached_data/ and git can only delta-compress text between runs;
+gzip and msgpack are opt-in for deployments that don't keep the cache in git.
+"""
+
+import glob
+import gzip
+import json
+import os
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Format name -> file extension
+FORMATS = {
+    "json": ".json",
+    "json.gz": ".json.gz",
+    "msgpack": ".msgpack"
+}
+
+CACHE_FORMAT = os.environ.get("NBA_CACHE_FORMAT", "json")
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def available_formats():
+    """Formats that can be written with the installed packages."""
+    return [fmt for fmt in FORMATS if fmt != "msgpack" or msgpack is not None]
+
+
+def base_path(path):
+    """Strip a cache format extension: "x/1_A.json.gz" -> "x/1_A"."""
+    # Longest first so ".json.gz" wins over ".json"
+    for ext in sorted(FORMATS.values(), key=len, reverse=True):
+        if path.endswith(ext):
+            return path[:-len(ext)]
+    return path
+
+
+def format_path(path, fmt):
+    """Path of a cache file in the given format."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown cache format: {fmt}")
+    return base_path(path) + FORMATS[fmt]
+
+
+def resolve(path):
+    """
+    Find the file on disk for a logical cache path, in any format.
+
+    Returns:
+        str: Existing path (the newest one if several formats exist), or None
+    """
+    candidates = [p for p in (format_path(path, fmt) for fmt in FORMATS) if os.path.exists(p)]
+    if not candidates:
+        return None
+    return max(candidates, key=os.path.getmtime)
+
+
+def glob_cache(pattern):
+    """
+    Glob cache files in any format, one path per logical file.
+
+    Args:
+        pattern (str): Pattern without extension, e.g. "cached_data/player_stats/*"
+
+    Returns:
+        list: Sorted existing paths
+    """
+    found = {}
+    for ext in FORMATS.values():
+        for path in glob.glob(pattern + ext):
+            found.setdefault(base_path(path), []).append(path)
+    return sorted(max(paths, key=os.path.getmtime) for paths in found.values())
+
+
+def dumps(obj, fmt="json"):
+    """Serialize an object to bytes in the given format."""
+    if fmt == "json":
+        return json.dumps(obj, indent=2).encode()
+    if fmt == "json.gz":
+        # mtime=0 keeps the bytes identical for identical data
+        return gzip.compress(json.dumps(obj, separators=(',', ':')).encode(), mtime=0)
+    if fmt == "msgpack":
+        if msgpack is None:
+            raise ValueError("The msgpack format needs the msgpack package")
+        return msgpack.packb(obj, use_bin_type=True)
+    raise ValueError(f"Unknown cache format: {fmt}")
+
+
+def loads(raw):
+    """Deserialize bytes written by dumps(), detecting the format from the content."""
+    if raw[:2] == GZIP_MAGIC:
+        raw = gzip.decompress(raw)
+    if raw.lstrip()[:1] in (b'{', b'['):
+        return json.loads(raw)
+    if msgpack is None:
+        raise ValueError("Cache file is msgpack but the msgpack package is not installed")
+    return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+
+
+def read_raw(path):
+    """
+    Read the raw bytes of a cache file in any format.
+
+    Returns:
+        tuple: (bytes, path actually read)
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist in any format
+    """
+    found = resolve(path)
+    if found is None:
+        raise FileNotFoundError(path)
+    with open(found, 'rb') as f:
+        return f.read(), found
+
+
+def load(path):
+    """
+    Load a cache file written in any format.
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist in any format
+    """
+    return loads(read_raw(path)[0])
+
+
+def dump(obj, path, fmt=None):
+    """
+    Atomically write a cache file and remove copies of it in other formats.
+
+    Args:
+        obj: JSON-compatible data
+        path (str): Logical path (any format extension)
+        fmt (str): Format name, CACHE_FORMAT by default
+
+    Returns:
+        str: Path written
+    """
+    fmt = fmt or CACHE_FORMAT
+    target = format_path(path, fmt)
+    tmp_file = target + ".tmp"
+    with open(tmp_file, 'wb') as f:
+        f.write(dumps(obj, fmt))
+    os.replace(tmp_file, target)
+
+    for other in FORMATS:
+        stale = format_path(path, other)
+        if stale != target and os.path.exists(stale):
+            os.remove(stale)
+    return target
@@ -0,0 +1,192 @@
+"""Career archive - full PlayerCareerStats history kept apart from the daily player files
+
+The per-player files in each season's player_stats/ only keep that season's
+rows of the career payload (plus the season game log), so the daily refresh
+writes and the app reads a few KB per player. Years of season totals, rankings,
+highs and college/all-star sections live in cached_data/player_careers (shared
+by all seasons) and are only downloaded again when they are older than
+CAREER_REFRESH_DAYS - until then the daily refresh rebuilds the season's totals
+from the game log (season_rows_from_game_log).
+"""
+
+from datetime import datetime, timedelta
+import os
+
+from . import cache_format
+from .seasons import CACHE_ROOT, season_path
+
+CAREER_DIR = os.path.join(CACHE_ROOT, "player_careers")
+
+CAREER_REFRESH_DAYS = float(os.environ.get("NBA_CAREER_REFRESH_DAYS", 30))
+
+# Result sets with per-season rows that the daily files keep for the current season
+CURRENT_SEASON_SETS = ("SeasonTotalsRegularSeason", "SeasonTotalsPostSeason")
+
+# Season row columns that are sums over the game log, and the percentages derived from them
+TOTAL_COLUMNS = ('MIN', 'FGM', 'FGA', 'FG3M', 'FG3A', 'FTM', 'FTA', 'OREB', 'DREB', 'REB',
+                 'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS')
+PCT_COLUMNS = (('FG_PCT', 'FGM', 'FGA'), ('FG3_PCT', 'FG3M', 'FG3A'), ('FT_PCT', 'FTM', 'FTA'))
+
+
+def current_season_rows(career_data, season):
+    """
+    Reduce a PlayerCareerStats normalized dict to the current season's rows.
+
+    Args:
+        career_data (dict): PlayerCareerStats.get_normalized_dict() output
+        season (str): Season in format "2025-26"
+
+    Returns:
+        dict: Only the CURRENT_SEASON_SETS, filtered to rows of `season`
+    """
+    return {
+        name: [row for row in career_data.get(name, []) if season in (row.get('SEASON_ID') or '')]
+        for name in CURRENT_SEASON_SETS
+    }
+
+
+def _sum_games(row, games):
+    row = dict(row, GP=len(games))
+    for col in TOTAL_COLUMNS:
+        row[col] = sum(game.get(col) or 0 for game in games)
+    for pct, made, attempted in PCT_COLUMNS:
+        row[pct] = round(row[made] / row[attempted], 3) if row[attempted] else 0.0
+    return row
+
+
+def season_rows_from_game_log(career_data, game_log, season):
+    """
+    Rebuild the current season's rows from the archived career and a fresh season game log.
+
+    The archived rows give the fields a game log doesn't have (team, age, GS);
+    the totals and percentages are recomputed from the log's games, per team
+    by the MATCHUP abbreviation (a "TOT" row sums them all).
+
+    Args:
+        career_data (dict): The player's archived PlayerCareerStats normalized dict
+        game_log (dict): PlayerGameLog.get_normalized_dict() output for `season`
+        season (str): Season in format "2025-26"
+
+    Returns:
+        dict: Like current_season_rows, or None when the archive can't be the template -
+              no row for the season yet, a team the archive doesn't know (a trade),
+              postseason rows, or no games in the log
+    """
+    archived = current_season_rows(career_data or {}, season)
+    regular = archived['SeasonTotalsRegularSeason']
+    games = (game_log or {}).get('PlayerGameLog', [])
+    if not regular or archived['SeasonTotalsPostSeason'] or not games:
+        return None
+
+    by_team = {}
+    for game in games:
+        by_team.setdefault((game.get('MATCHUP') or '').split(' ')[0], []).append(game)
+    if not set(by_team) <= {row.get('TEAM_ABBREVIATION') for row in regular}:
+        return None
+
+    return {
+        'SeasonTotalsRegularSeason': [
+            _sum_games(row, games if row.get('TEAM_ABBREVIATION') == 'TOT' else by_team.get(row.get('TEAM_ABBREVIATION'), []))
+            for row in regular
+        ],
+        'SeasonTotalsPostSeason': []
+    }
+
+
+def career_file(player_id, career_dir=CAREER_DIR):
+    return os.path.join(career_dir, f"{player_id}.json")
+
+
+def career_is_fresh(player_id, max_age_days=None, career_dir=CAREER_DIR):
+    """
+    Whether the player's archive exists and was written less than max_age_days ago.
+
+    Uses the archive's own last_updated rather than the file's mtime, which a
+    git checkout resets on every run.
+    """
+    if max_age_days is None:
+        max_age_days = CAREER_REFRESH_DAYS
+    try:
+        last_updated = datetime.fromisoformat(cache_format.load(career_file(player_id, career_dir))['last_updated'])
+    except (OSError, KeyError, TypeError, ValueError):
+        # Missing, unreadable or written before archives carried last_updated
+        return False
+    return datetime.now() - last_updated < timedelta(days=max_age_days)
+
+
+def write_career_archive(player_id, player_name, career_data, career_dir=CAREER_DIR):
+    """Write the full career payload for one player."""
+    os.makedirs(career_dir, exist_ok=True)
+    output = {
+        "last_updated": datetime.now().isoformat(),
+        "player_id": player_id,
+        "player_name": player_name,
+        "data": career_data
+    }
+    path = career_file(player_id, career_dir)
+    cache_format.dump(output, path)
+
+
+def load_player_career(player_id, career_dir=CAREER_DIR, player_stats_dir=None):
+    """
+    Load a player's full career history.
+
+    Falls back to the player's daily file (the current season's by default) for
+    caches written before the split, which still carry the whole career payload.
+
+    Returns:
+        dict: PlayerCareerStats normalized dict, or None if the player isn't cached
+    """
+    try:
+        return cache_format.load(career_file(player_id, career_dir)).get('data', {})
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error loading career archive for {player_id}: {e}")
+
+    player_stats_dir = player_stats_dir or season_path(None, "player_stats")
+    for cache_file in cache_format.glob_cache(os.path.join(player_stats_dir, f"{player_id}_*")):
+        try:
+            return cache_format.load(cache_file).get('data', {})
+        except Exception as e:
+            print(f"Error loading player cache {cache_file}: {e}")
+    return None
+
+
+def split_player_files(player_stats_dir=None, career_dir=CAREER_DIR):
+    """
+    Move the career history out of player files written before the split.
+
+    Each legacy file's full payload goes to the archive (unless one already
+    exists) and the file is rewritten with only its season's rows.
+
+    Returns:
+        int: Number of files split
+    """
+    split = 0
+    player_stats_dir = player_stats_dir or season_path(None, "player_stats")
+    for cache_file in cache_format.glob_cache(os.path.join(player_stats_dir, "*")):
+        try:
+            cached = cache_format.load(cache_file)
+        except Exception as e:
+            print(f"  ✗ Skipping {cache_file}: {e}")
+            continue
+
+        data = cached.get('data', {})
+        season = cached.get('season')
+        if not season or set(data) <= set(CURRENT_SEASON_SETS):
+            continue
+
+        if cache_format.resolve(career_file(cached['player_id'], career_dir)) is None:
+            write_career_archive(cached['player_id'], cached.get('player_name'), data, career_dir)
+
+        cached['data'] = current_season_rows(data, season)
+        cache_format.dump(cached, cache_file)
+        split += 1
+
+    print(f"  ✓ Split career history out of {split} player files")
+    return split
+
+
+if __name__ == "__main__":
+    split_player_files()
@@ -0,0 +1,274 @@
+"""Embedded SQLite database of a season's cache - indexed tables for ad-hoc queries
+
+Optional backend next to the columnar game stores. When enabled (--database on
+the fetcher, or NBA_STATS_DATABASE=1) the fetcher loads the season's players,
+teams, standings and game stores into one SQLite file in the season's
+directory:
+
+    players       (player_id, player_name, team_id, team_abbreviation, ...)
+    teams         (team_id, team_name, abbreviation, gp, w, l, w_pct)
+    standings     (team_id, conference, division, wins, losses, win_pct, ...)
+    player_games  (player_id, team_id, game_id, season_id, game_date, matchup, wl, box score...)
+    team_games    (team_id, game_id, season_id, game_date, matchup, wl, box score...)
+
+Game tables are indexed on player_id, team_id, game_id and game_date, and
+game_date is stored as an ISO date so date ranges are index range scans. The
+stats modules read game logs from here when the backend is enabled and the
+file exists, and fall back to the game stores otherwise.
+"""
+
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from . import cache_format
+from .game_store import (GAMELOG_DATE_FORMAT, LEAGUE_DATE_FORMAT, PLAYER_STAT_COLUMNS, TEAM_STAT_COLUMNS,
+                         format_game_date, restore_integer_columns, season_to_id)
+from .seasons import season_path
+
+# Inside each season's directory
+DATABASE_FILE = "stats.sqlite"
+
+# Readers only use the database when it is enabled; the fetcher only builds it then
+USE_DATABASE = os.environ.get("NBA_STATS_DATABASE", "0").lower() in ("1", "true", "yes")
+
+_PLAYER_STAT_DDL = ",\n    ".join(f"{col} REAL" for col in PLAYER_STAT_COLUMNS)
+_TEAM_STAT_DDL = ",\n    ".join(f"{col} REAL" for col in TEAM_STAT_COLUMNS)
+
+SCHEMA = f"""
+CREATE TABLE players (
+    player_id INTEGER PRIMARY KEY,
+    player_name TEXT NOT NULL,
+    team_id INTEGER,
+    team_abbreviation TEXT,
+    roster_status INTEGER,
+    from_year TEXT,
+    to_year TEXT
+);
+CREATE TABLE teams (
+    team_id INTEGER PRIMARY KEY,
+    team_name TEXT NOT NULL,
+    abbreviation TEXT,
+    gp INTEGER,
+    w INTEGER,
+    l INTEGER,
+    w_pct REAL
+);
+CREATE TABLE standings (
+    team_id INTEGER PRIMARY KEY,
+    conference TEXT,
+    division TEXT,
+    playoff_rank INTEGER,
+    wins INTEGER,
+    losses INTEGER,
+    win_pct REAL,
+    record TEXT
+);
+CREATE TABLE player_games (
+    player_id INTEGER NOT NULL,
+    team_id INTEGER,
+    game_id INTEGER NOT NULL,
+    season_id INTEGER,
+    game_date TEXT,
+    matchup TEXT,
+    wl TEXT,
+    {_PLAYER_STAT_DDL},
+    PRIMARY KEY (player_id, game_id)
+);
+CREATE TABLE team_games (
+    team_id INTEGER NOT NULL,
+    game_id INTEGER NOT NULL,
+    season_id INTEGER,
+    game_date TEXT,
+    matchup TEXT,
+    wl TEXT,
+    {_TEAM_STAT_DDL},
+    PRIMARY KEY (team_id, game_id)
+);
+CREATE INDEX player_games_team ON player_games (team_id, game_date);
+CREATE INDEX player_games_game ON player_games (game_id);
+CREATE INDEX player_games_date ON player_games (game_date);
+CREATE INDEX team_games_game ON team_games (game_id);
+CREATE INDEX team_games_date ON team_games (game_date);
+CREATE INDEX players_team ON players (team_id);
+"""
+
+# Per-thread read-only connections: database path -> (file signature, connection)
+# (sqlite3 connections can't be shared across threads)
+_connections = threading.local()
+
+
+def _result_rows(path, result_set):
+    try:
+        return cache_format.load(path).get("data", {}).get(result_set, [])
+    except FileNotFoundError:
+        return []
+
+
+def _store_rows(path, id_columns, stat_columns):
+    """Rows of a columnar game store file, with dates as ISO strings."""
+    if not os.path.exists(path):
+        return []
+    with np.load(path, allow_pickle=False) as store:
+        dates = [None if np.isnat(d) else str(d) for d in store['GAME_DATE']]
+        columns = [store[col].tolist() for col in id_columns] + [dates, store['MATCHUP'].tolist(), store['WL'].tolist()]
+        # NaN stats become NULL
+        columns += [[None if v != v else v for v in store[col].tolist()] for col in stat_columns]
+    return list(zip(*columns))
+
+
+def build_database(source_dir=None, output_file=None):
+    """
+    Load a season's cache files into a new SQLite database.
+
+    Reads players.json, teams.json, standings.json and the two game stores,
+    so it runs after the game stores are built. The file is written under a
+    temporary name and moved into place, so readers never open a partial one.
+
+    Args:
+        source_dir (str): Season directory to read (the current season's when None)
+        output_file (str): Database path (DATABASE_FILE in source_dir by default)
+
+    Returns:
+        dict: Table name -> rows written
+    """
+    source_dir = source_dir or season_path(None)
+    output_file = output_file or os.path.join(source_dir, DATABASE_FILE)
+    tmp_file = output_file + ".tmp"
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+
+    players = [
+        (p['PERSON_ID'], p['DISPLAY_FIRST_LAST'], p.get('TEAM_ID') or None, p.get('TEAM_ABBREVIATION') or None,
+         p.get('ROSTERSTATUS'), p.get('FROM_YEAR'), p.get('TO_YEAR'))
+        for p in _result_rows(os.path.join(source_dir, "players.json"), 'CommonAllPlayers')
+    ]
+    abbreviations = {p[2]: p[3] for p in players if p[2] and p[3]}
+    teams = [
+        (t['TEAM_ID'], t['TEAM_NAME'], abbreviations.get(t['TEAM_ID']), t.get('GP'), t.get('W'), t.get('L'),
+         t.get('W_PCT'))
+        for t in _result_rows(os.path.join(source_dir, "teams.json"), 'LeagueDashTeamStats')
+    ]
+    standings = [
+        (s['TeamID'], s.get('Conference'), s.get('Division'), s.get('PlayoffRank'), s.get('WINS'),
+         s.get('LOSSES'), s.get('WinPCT'), s.get('Record'))
+        for s in _result_rows(os.path.join(source_dir, "standings.json"), 'Standings')
+    ]
+    player_games = _store_rows(os.path.join(source_dir, "player_games.npz"),
+                               ['PLAYER_ID', 'TEAM_ID', 'GAME_ID', 'SEASON_ID'], PLAYER_STAT_COLUMNS)
+    team_games = _store_rows(os.path.join(source_dir, "team_games.npz"),
+                             ['TEAM_ID', 'GAME_ID', 'SEASON_ID'], TEAM_STAT_COLUMNS)
+
+    counts = {}
+    connection = sqlite3.connect(tmp_file)
+    try:
+        connection.executescript(SCHEMA)
+        for table, rows in (("players", players), ("teams", teams), ("standings", standings),
+                            ("player_games", player_games), ("team_games", team_games)):
+            if rows:
+                placeholders = ", ".join("?" * len(rows[0]))
+                connection.executemany(f"INSERT OR REPLACE INTO {table} VALUES ({placeholders})", rows)
+            counts[table] = len(rows)
+        connection.commit()
+        connection.execute("ANALYZE")
+    finally:
+        connection.close()
+    os.replace(tmp_file, output_file)
+
+    print(f"  ✓ {os.path.basename(output_file)} ({counts['player_games']} player games, "
+          f"{counts['team_games']} team games)")
+    return counts
+
+
+def connect(season=None):
+    """
+    Read-only connection to a season's database, reused per thread.
+
+    Returns:
+        sqlite3.Connection: Or None if the backend is disabled or the database hasn't been built
+    """
+    if not USE_DATABASE:
+        return None
+    path = os.path.abspath(season_path(season, DATABASE_FILE))
+    try:
+        file_stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    signature = (file_stat.st_ino, file_stat.st_mtime_ns)
+
+    cache = getattr(_connections, "by_path", None)
+    if cache is None:
+        cache = _connections.by_path = {}
+    cached = cache.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    # Drop connections to databases that have since been replaced or pruned
+    for stale in [p for p in cache if p == path or not os.path.exists(p)]:
+        cache.pop(stale)[1].close()
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    cache[path] = (signature, connection)
+    return connection
+
+
+def query(sql, params=(), season=None):
+    """
+    Run an ad-hoc SQL query against a season's database.
+
+    Returns:
+        DataFrame: The result, or None if the database isn't available
+    """
+    connection = connect(season)
+    if connection is None:
+        return None
+    return pd.read_sql_query(sql, connection, params=params)
+
+
+def _game_frame(frame, id_columns, stat_columns, date_format):
+    """Turn game rows from SQL into the game-log layout of data.game_store.rows_to_frame."""
+    frame = frame.rename(columns=str.upper)
+    frame['GAME_DATE'] = [format_game_date(np.datetime64(d, 'D'), date_format) if d else '' for d in frame['GAME_DATE']]
+    frame['GAME_ID'] = [f"{gid:010d}" for gid in frame['GAME_ID']]
+    for col in stat_columns:
+        frame[col] = frame[col].astype(np.float64)
+    frame = frame[id_columns + ['GAME_ID', 'GAME_DATE', 'MATCHUP', 'WL'] + stat_columns].copy()
+    return restore_integer_columns(frame)
+
+
+def load_player_game_log(season, player_id):
+    """
+    A player's games in a season from the database, most recent first.
+
+    Returns:
+        DataFrame: Game log columns (GAME_ID, GAME_DATE, MATCHUP, WL and the box score),
+                   or None if the database isn't available or has no games for the player
+    """
+    frame = query(
+        "SELECT * FROM player_games WHERE player_id = ? AND season_id = ? ORDER BY game_date DESC, game_id DESC",
+        (int(player_id), season_to_id(season)), season
+    )
+    if frame is None or frame.empty:
+        return None
+    return _game_frame(frame, [], PLAYER_STAT_COLUMNS, GAMELOG_DATE_FORMAT)
+
+
+def load_team_games_frame(season, team_id=None):
+    """
+    Database version of data.game_store.load_team_games_frame.
+
+    Returns:
+        DataFrame: Team games (most recent first), or None if the database
+                   isn't available or has no games
+    """
+    sql = "SELECT * FROM team_games WHERE season_id = ?"
+    params = [season_to_id(season)]
+    if team_id is not None:
+        sql += " AND team_id = ?"
+        params.append(int(team_id))
+    frame = query(sql + " ORDER BY game_date DESC, game_id DESC, team_id", params, season)
+    if frame is None or frame.empty:
+        return None
+    return _game_frame(frame, ['TEAM_ID'], TEAM_STAT_COLUMNS, LEAGUE_DATE_FORMAT)
@@ -0,0 +1,362 @@
+"""Columnar game-log store - one row per player-game / team-game in a single .npz file
+
+The fetcher writes the per-player and per-team JSON caches first and then
+consolidates their game logs here, so readers can load every game of the
+season with one file read instead of parsing hundreds of JSON files.
+"""
+
+import io
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from . import cache_format
+from .loader import load_cached
+from .seasons import season_path
+
+# Inside each season's directory
+PLAYER_STATS_DIR = "player_stats"
+TEAM_GAMELOGS_DIR = "team_gamelogs"
+PLAYERS_FILE = "players.json"
+LEAGUE_GAMES_FILE = "league_games.json"
+PLAYER_GAMES_FILE = "player_games.npz"
+TEAM_GAMES_FILE = "team_games.npz"
+
+# Numeric box score columns stored as float64 (missing values become NaN)
+PLAYER_STAT_COLUMNS = [
+    'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT', 'FTM', 'FTA', 'FT_PCT',
+    'OREB', 'DREB', 'REB', 'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS', 'PLUS_MINUS'
+]
+TEAM_STAT_COLUMNS = [
+    'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT', 'FTM', 'FTA', 'FT_PCT',
+    'OREB', 'DREB', 'REB', 'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS', 'PLUS_MINUS'
+]
+
+# Counts the endpoints return as integers; the stores keep every stat as float64 (NaN for
+# missing values), and game-log frames cast these back when none is missing
+INTEGER_STAT_COLUMNS = [col for col in PLAYER_STAT_COLUMNS if not col.endswith('_PCT') and col != 'PLUS_MINUS']
+
+DATE_FORMATS = ("%b %d, %Y", "%Y-%m-%d", "%Y-%m-%dT%H:%M:%S")
+
+# GAME_DATE as the endpoints return it: game logs ("Nov 17, 2025") and LeagueGameFinder ("2025-11-17")
+GAMELOG_DATE_FORMAT = "%b %d, %Y"
+LEAGUE_DATE_FORMAT = "%Y-%m-%d"
+
+
+def season_to_id(season):
+    """Convert a season string like "2025-26" to the NBA regular season id 22025."""
+    return int(f"2{season[:4]}")
+
+
+def parse_game_date(value):
+    """Parse the GAME_DATE formats used by the game log endpoints."""
+    for fmt in DATE_FORMATS:
+        try:
+            return np.datetime64(datetime.strptime(value, fmt).date(), 'D')
+        except (TypeError, ValueError):
+            continue
+    return np.datetime64('NaT', 'D')
+
+
+def format_game_date(value, date_format=GAMELOG_DATE_FORMAT):
+    """Format a stored datetime64 date back to the "Nov 17, 2025" game log format (or date_format)."""
+    if np.isnat(value):
+        return ''
+    return value.astype(datetime).strftime(date_format)
+
+
+def _to_float(value):
+    return np.nan if value is None else float(value)
+
+
+def _load_team_abbreviations(players_file):
+    """Map team abbreviations to team ids using the cached players list."""
+    try:
+        players = cache_format.load(players_file).get("data", {}).get("CommonAllPlayers", [])
+    except Exception as e:
+        print(f"Warning: could not read team abbreviations: {e}")
+        return {}
+    return {
+        p['TEAM_ABBREVIATION']: int(p['TEAM_ID'])
+        for p in players
+        if p.get('TEAM_ABBREVIATION') and p.get('TEAM_ID')
+    }
+
+
+def _build_columns(rows, string_columns, stat_columns):
+    """Turn a list of row dicts into a dict of typed numpy arrays."""
+    columns = {
+        'GAME_DATE': np.array([parse_game_date(r['GAME_DATE']) for r in rows], dtype='datetime64[D]')
+    }
+    for col, dtype in string_columns.items():
+        columns[col] = np.array([r.get(col) or '' for r in rows], dtype=dtype)
+    for col in stat_columns:
+        columns[col] = np.array([_to_float(r.get(col)) for r in rows], dtype=np.float64)
+    return columns
+
+
+def build_player_game_store(player_stats_dir=None, output_file=None, players_file=None):
+    """
+    Consolidate every cached player game log into one columnar file.
+
+    Rows are grouped by player and keep the game log order (most recent first).
+    The player table (PLAYERS_*) holds each player's row offset and count so a
+    single player's games are a contiguous slice. Paths default to the current
+    season's.
+
+    Returns:
+        int: Number of player-game rows written
+    """
+    player_stats_dir = player_stats_dir or season_path(None, PLAYER_STATS_DIR)
+    output_file = output_file or season_path(None, PLAYER_GAMES_FILE)
+    players_file = players_file or season_path(None, PLAYERS_FILE)
+    team_ids = _load_team_abbreviations(players_file)
+    rows = []
+    players = []
+
+    for cache_file in cache_format.glob_cache(os.path.join(player_stats_dir, "*")):
+        try:
+            cached = cache_format.load(cache_file)
+        except Exception as e:
+            print(f"  ✗ Skipping {cache_file}: {e}")
+            continue
+
+        game_log = cached.get('game_log') or {}
+        games = game_log.get('PlayerGameLog', []) if isinstance(game_log, dict) else []
+        season_id = season_to_id(cached.get('season', '0000'))
+
+        players.append((
+            int(cached['player_id']),
+            cached['player_name'],
+            cached.get('team_abbreviation', 'FA'),
+            len(rows),
+            len(games)
+        ))
+        for game in games:
+            abbr = (game.get('MATCHUP') or '').split(' ')[0]
+            rows.append(dict(
+                game,
+                PLAYER_ID=int(cached['player_id']),
+                TEAM_ID=team_ids.get(abbr, 0),
+                GAME_ID=int(game.get('Game_ID') or game.get('GAME_ID') or 0),
+                SEASON_ID=season_id
+            ))
+
+    columns = _build_columns(rows, {'MATCHUP': str, 'WL': str}, PLAYER_STAT_COLUMNS)
+    columns['PLAYER_ID'] = np.array([r['PLAYER_ID'] for r in rows], dtype=np.int64)
+    columns['TEAM_ID'] = np.array([r['TEAM_ID'] for r in rows], dtype=np.int64)
+    columns['GAME_ID'] = np.array([r['GAME_ID'] for r in rows], dtype=np.int64)
+    columns['SEASON_ID'] = np.array([r['SEASON_ID'] for r in rows], dtype=np.int32)
+
+    columns['PLAYERS_ID'] = np.array([p[0] for p in players], dtype=np.int64)
+    columns['PLAYERS_NAME'] = np.array([p[1] for p in players], dtype=str)
+    columns['PLAYERS_TEAM'] = np.array([p[2] for p in players], dtype=str)
+    columns['PLAYERS_START'] = np.array([p[3] for p in players], dtype=np.int64)
+    columns['PLAYERS_COUNT'] = np.array([p[4] for p in players], dtype=np.int64)
+
+    _save_columns(columns, output_file)
+    print(f"  ✓ {os.path.basename(output_file)} ({len(rows)} games, {len(players)} players)")
+    return len(rows)
+
+
+def _load_league_game_rows(league_games_file):
+    """Team-game rows from the cached league-wide LeagueGameFinder table."""
+    try:
+        cached = cache_format.load(league_games_file)
+    except FileNotFoundError:
+        return []
+    except Exception as e:
+        print(f"  ✗ Skipping {league_games_file}: {e}")
+        return []
+
+    return [
+        dict(game, TEAM_ID=int(game['TEAM_ID']), GAME_ID=int(game['GAME_ID']), SEASON_ID=int(game['SEASON_ID']))
+        for game in cached.get('data', {}).get('LeagueGameFinderResults', [])
+    ]
+
+
+def _load_team_log_rows(team_logs_dir):
+    """Team-game rows from the per-team TeamGameLog files."""
+    rows = []
+
+    for cache_file in cache_format.glob_cache(os.path.join(team_logs_dir, "*")):
+        try:
+            cached = cache_format.load(cache_file)
+        except Exception as e:
+            print(f"  ✗ Skipping {cache_file}: {e}")
+            continue
+
+        season_id = season_to_id(cached.get('season', '0000'))
+        for game in cached.get('data', {}).get('TeamGameLog', []):
+            rows.append(dict(
+                game,
+                TEAM_ID=int(cached['team_id']),
+                GAME_ID=int(game.get('Game_ID') or game.get('GAME_ID') or 0),
+                SEASON_ID=season_id
+            ))
+    return rows
+
+
+def build_team_game_store(team_logs_dir=None, output_file=None, league_games_file=None):
+    """
+    Consolidate the season's team games into one columnar file.
+
+    The league-wide game table is used when it has been fetched; the per-team
+    game logs are the fallback. Rows keep the source order (most recent first).
+    Paths default to the current season's.
+
+    Returns:
+        int: Number of team-game rows written
+    """
+    team_logs_dir = team_logs_dir or season_path(None, TEAM_GAMELOGS_DIR)
+    output_file = output_file or season_path(None, TEAM_GAMES_FILE)
+    league_games_file = league_games_file or season_path(None, LEAGUE_GAMES_FILE)
+    rows = _load_league_game_rows(league_games_file) or _load_team_log_rows(team_logs_dir)
+
+    columns = _build_columns(rows, {'MATCHUP': str, 'WL': str}, TEAM_STAT_COLUMNS)
+    columns['TEAM_ID'] = np.array([r['TEAM_ID'] for r in rows], dtype=np.int64)
+    columns['GAME_ID'] = np.array([r['GAME_ID'] for r in rows], dtype=np.int64)
+    columns['SEASON_ID'] = np.array([r['SEASON_ID'] for r in rows], dtype=np.int32)
+
+    _save_columns(columns, output_file)
+    print(f"  ✓ {os.path.basename(output_file)} ({len(rows)} games)")
+    return len(rows)
+
+
+def _save_columns(columns, output_file):
+    """Write the columns to a temp file first so readers never see a partial store."""
+    tmp_file = output_file + ".tmp.npz"
+    np.savez(tmp_file, **columns)
+    os.replace(tmp_file, output_file)
+
+
+def _parse_columns(raw):
+    with np.load(io.BytesIO(raw), allow_pickle=False) as store:
+        columns = {key: store[key] for key in store.files}
+    # The loaded store is shared between callers
+    for values in columns.values():
+        values.flags.writeable = False
+    return columns
+
+
+def _load_columns(path):
+    try:
+        return load_cached(path, _parse_columns)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Error loading game store {path}: {e}")
+        return None
+
+
+def load_player_games(season=None):
+    """
+    Load a season's player-game store (the current season's by default).
+
+    Returns:
+        dict: Column name -> numpy array, or None if the store hasn't been built
+    """
+    return _load_columns(season_path(season, PLAYER_GAMES_FILE))
+
+
+def load_team_games(season=None):
+    """
+    Load a season's team-game store (the current season's by default).
+
+    Returns:
+        dict: Column name -> numpy array, or None if the store hasn't been built
+    """
+    return _load_columns(season_path(season, TEAM_GAMES_FILE))
+
+
+def player_slice(store, player_id):
+    """Return the row slice of one player's games, or None if the player isn't stored."""
+    matches = np.flatnonzero(store['PLAYERS_ID'] == int(player_id))
+    if len(matches) == 0:
+        return None
+    idx = matches[0]
+    start = int(store['PLAYERS_START'][idx])
+    return slice(start, start + int(store['PLAYERS_COUNT'][idx]))
+
+
+def restore_integer_columns(frame):
+    """Cast the counting stats of a game-log frame back to int64 where no value is missing."""
+    for col in INTEGER_STAT_COLUMNS:
+        if col in frame.columns and frame[col].notna().all():
+            frame[col] = frame[col].astype(np.int64)
+    return frame
+
+
+def rows_to_frame(store, rows, columns, date_format=GAMELOG_DATE_FORMAT):
+    """Build a pandas DataFrame (game log layout) for the selected rows of a store."""
+    frame = pd.DataFrame({col: store[col][rows] for col in columns if col not in ('GAME_DATE', 'GAME_ID')})
+    if 'GAME_DATE' in columns:
+        frame['GAME_DATE'] = [format_game_date(d, date_format) for d in store['GAME_DATE'][rows]]
+    if 'GAME_ID' in columns:
+        # The API returns game ids as zero-padded strings ("0022500243")
+        frame['GAME_ID'] = [f"{gid:010d}" for gid in store['GAME_ID'][rows]]
+    return restore_integer_columns(frame[columns].copy())
+
+
+def load_team_games_frame(season, team_id=None):
+    """
+    Get a season's team games from the team-game store as a LeagueGameFinder-style DataFrame
+    (GAME_DATE as "2025-11-17", like the endpoint).
+
+    Args:
+        season (str): Season in format "2025-26"
+        team_id: Only return this team's games (all teams when None)
+
+    Returns:
+        DataFrame: Team games (most recent first per team), or None if nothing is stored
+    """
+    store = load_team_games(season)
+    if store is None:
+        return None
+    mask = store['SEASON_ID'] == season_to_id(season)
+    if team_id is not None:
+        mask &= store['TEAM_ID'] == int(team_id)
+    rows = np.flatnonzero(mask)
+    if len(rows) == 0:
+        return None
+    columns = ['TEAM_ID', 'GAME_ID', 'GAME_DATE', 'MATCHUP', 'WL'] + TEAM_STAT_COLUMNS
+    return rows_to_frame(store, rows, columns, LEAGUE_DATE_FORMAT)
+
+
+def load_team_schedule(season, team_id):
+    """
+    Get the games a team has played in a season from local data only.
+
+    Uses the team-game store when it has the team, otherwise derives the schedule
+    from the player-game store (every game one of the team's players appeared in).
+
+    Returns:
+        DataFrame: GAME_ID, GAME_DATE ("2025-11-17"), MATCHUP (most recent first), empty if unknown
+    """
+    columns = ['GAME_ID', 'GAME_DATE', 'MATCHUP']
+
+    team_games = load_team_games_frame(season, team_id)
+    if team_games is not None:
+        return team_games[columns]
+
+    store = load_player_games(season)
+    if store is None:
+        return pd.DataFrame(columns=columns)
+
+    rows = np.flatnonzero((store['TEAM_ID'] == int(team_id)) & (store['SEASON_ID'] == season_to_id(season)))
+    _, first = np.unique(store['GAME_ID'][rows], return_index=True)
+    rows = rows[first]
+    rows = rows[np.argsort(store['GAME_DATE'][rows], kind='stable')[::-1]]
+    return rows_to_frame(store, rows, columns, LEAGUE_DATE_FORMAT)
+
+
+def build_game_stores():
+    """Rebuild both columnar stores from the JSON caches already on disk."""
+    build_player_game_store()
+    build_team_game_store()
+
+
+if __name__ == "__main__":
+    build_game_stores()
@@ -0,0 +1,183 @@
+"""Memoized cache file loader - parse each file once and serve it from memory
+
+Every Streamlit rerun asks for the same players/teams/manifest/game store
+files. load_cached() keeps the parsed value per file and only looks at the
+file again when its mtime or size changes; even then the content hash decides
+whether it has to be parsed again.
+
+Files in season partitions (cached_data/seasons/<season>/) are evicted a
+whole season at a time: only the MAX_LOADED_SEASONS most recently used
+seasons stay in memory, however many seasons are on disk. Once a newer
+generation of a season is read, its older generations are dropped.
+
+Parsed values are shared between callers and must be treated as read-only.
+"""
+
+from collections import OrderedDict
+import hashlib
+import os
+import re
+import threading
+
+from . import cache_format
+
+CACHE_ROOT = os.environ.get("NBA_CACHE_DIR", os.path.join(os.path.dirname(__file__), "..", "cached_data"))
+
+# Files rewritten by every fetch run; together they identify the data generation
+GENERATION_FILES = [
+    "players.json",
+    "teams.json",
+    "league_games.json",
+    "player_manifest.json",
+    "player_games.npz",
+    "team_games.npz"
+]
+
+# Seasons whose parsed files are kept in memory
+MAX_LOADED_SEASONS = int(os.environ.get("NBA_MAX_LOADED_SEASONS", 2))
+
+# Season and (for published snapshots) generation of a file in a partition
+PARTITION_PATTERN = re.compile(r"[\\/]seasons[\\/](\d{4}-\d{2})[\\/](?:generations[\\/]([^\\/]+)[\\/])?")
+
+# (path, parser) -> {"signature": (path on disk, mtime_ns, size), "sha256": ..., "value": ...}
+_entries = {}
+_counters = {"hits": 0, "misses": 0, "revalidations": 0, "evictions": 0}
+_lock = threading.Lock()
+
+# (season, generation) -> keys of its memoized files, least recently used first
+_partitions = OrderedDict()
+
+
+def _find(path):
+    """The file on disk for a path: any cache format of it, or the path itself."""
+    found = cache_format.resolve(path)
+    if found is None and os.path.exists(path):
+        found = path
+    return found
+
+
+def _evict(partition):
+    for key in _partitions.pop(partition):
+        _entries.pop(key, None)
+    _counters["evictions"] += 1
+
+
+def _touch_partition(key):
+    """
+    Mark the key's season as used, then evict superseded generations and the
+    least recently used seasons. Call with _lock held.
+    """
+    match = PARTITION_PATTERN.search(key[0])
+    if match is None:
+        return
+    season, generation = match.group(1), match.group(2) or ""
+    if (season, generation) not in _partitions:
+        # A newer snapshot of the season replaces the ones before it
+        for stale in [p for p in _partitions if p[0] == season and p[1] < generation]:
+            _evict(stale)
+    _partitions.setdefault((season, generation), set()).add(key)
+    _partitions.move_to_end((season, generation))
+    while len({season for season, _ in _partitions}) > MAX_LOADED_SEASONS:
+        _evict(next(iter(_partitions)))
+
+
+def load_cached(path, parser=None):
+    """
+    Load and parse a cache file, reusing the parsed value while the file is unchanged.
+
+    Args:
+        path (str): Cache file path (cache files may be in any cache_format format)
+        parser (callable): bytes -> value, cache_format.loads by default
+
+    Returns:
+        The parsed value (shared, don't modify it)
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+    """
+    parser = parser or cache_format.loads
+    key = (os.path.abspath(path), parser)
+
+    found = _find(path)
+    if found is None:
+        with _lock:
+            _entries.pop(key, None)
+        raise FileNotFoundError(path)
+
+    file_stat = os.stat(found)
+    signature = (found, file_stat.st_mtime_ns, file_stat.st_size)
+
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry["signature"] == signature:
+            _counters["hits"] += 1
+            _touch_partition(key)
+            return entry["value"]
+
+    with open(found, 'rb') as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry["sha256"] == digest:
+            # Touched or rewritten with the same content - keep the parsed value
+            entry["signature"] = signature
+            _counters["revalidations"] += 1
+            _touch_partition(key)
+            return entry["value"]
+
+    value = parser(raw)
+    with _lock:
+        _entries[key] = {"signature": signature, "sha256": digest, "value": value}
+        _counters["misses"] += 1
+        _touch_partition(key)
+    return value
+
+
+def loader_stats():
+    """
+    Hit/miss counters of the memoized loader.
+
+    Returns:
+        dict: hits, misses, revalidations (mtime changed, content didn't), evicted
+              seasons, cached files and the seasons in memory
+    """
+    with _lock:
+        seasons = list(dict.fromkeys(season for season, _ in _partitions))
+        return dict(_counters, files=len(_entries), seasons=seasons)
+
+
+def clear_loader_cache():
+    """Drop every memoized file and reset the counters."""
+    with _lock:
+        _entries.clear()
+        _partitions.clear()
+        for name in _counters:
+            _counters[name] = 0
+
+
+def get_data_generation(cache_root=CACHE_ROOT):
+    """
+    Token that changes whenever the fetcher rewrites the cache.
+
+    Pass a season's directory (data.seasons.season_dir) for that season's
+    generation. A published snapshot directory's token is its generation id;
+    for other directories it is built from the mtime and size of
+    GENERATION_FILES, so it costs a few stat calls and no reads.
+
+    Returns:
+        str: Generation id or short hex token
+    """
+    match = PARTITION_PATTERN.search(os.path.abspath(cache_root) + os.sep)
+    if match is not None and match.group(2):
+        return match.group(2)
+
+    signature = []
+    for name in GENERATION_FILES:
+        found = _find(os.path.join(cache_root, name))
+        if found is None:
+            continue
+        file_stat = os.stat(found)
+        signature.append(f"{os.path.basename(found)}:{file_stat.st_mtime_ns}:{file_stat.st_size}")
+    return hashlib.sha256("|".join(signature).encode()).hexdigest()[:16]
@@ -0,0 +1,147 @@
+"""Player cache manifest - index of the per-player JSON files written by the fetcher"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from . import cache_format
+from .game_store import parse_game_date
+from .loader import load_cached
+from .seasons import season_path
+
+# Inside each season's directory
+PLAYER_STATS_DIR = "player_stats"
+MANIFEST_FILE = "player_manifest.json"
+
+
+def _count_games(cached):
+    """Return (games played, last game date) for a cached player file."""
+    game_log = cached.get('game_log') or {}
+    games = game_log.get('PlayerGameLog', []) if isinstance(game_log, dict) else []
+
+    if games:
+        played = [g for g in games if (g.get('MIN') or 0) > 0]
+        last_date = parse_game_date(games[0].get('GAME_DATE'))
+        return len(played), None if np.isnat(last_date) else str(last_date)
+
+    # Older files have no game log; use the season totals row instead
+    season = cached.get('season', '')
+    season_rows = [
+        row for row in cached.get('data', {}).get('SeasonTotalsRegularSeason', [])
+        if season and season in row.get('SEASON_ID', '')
+    ]
+    return max((row.get('GP', 0) for row in season_rows), default=0), None
+
+
+def manifest_path(season=None):
+    return season_path(season, MANIFEST_FILE)
+
+
+def build_player_manifest(player_stats_dir=None, output_file=None):
+    """
+    Write the manifest mapping player_id -> file path, size, mtime, content hash,
+    games played and last game date.
+
+    Args:
+        player_stats_dir (str): Player files to index (the current season's by default)
+        output_file (str): Manifest to write (the current season's by default)
+
+    Returns:
+        int: Number of players in the manifest
+    """
+    player_stats_dir = player_stats_dir or season_path(None, PLAYER_STATS_DIR)
+    output_file = output_file or manifest_path()
+    root = os.path.dirname(os.path.abspath(output_file))
+    players = {}
+
+    for cache_file in cache_format.glob_cache(os.path.join(player_stats_dir, "*")):
+        try:
+            raw, cache_file = cache_format.read_raw(cache_file)
+            cached = cache_format.loads(raw)
+        except Exception as e:
+            print(f"  ✗ Skipping {cache_file}: {e}")
+            continue
+
+        games_played, last_game_date = _count_games(cached)
+        file_stat = os.stat(cache_file)
+        players[str(cached['player_id'])] = {
+            "path": os.path.relpath(os.path.abspath(cache_file), root),
+            "size": file_stat.st_size,
+            "mtime": file_stat.st_mtime,
+            "sha256": hashlib.sha256(raw).hexdigest(),
+            "season": cached.get('season'),
+            "team_abbreviation": cached.get('team_abbreviation'),
+            "games_played": games_played,
+            "last_game_date": last_game_date,
+            "last_updated": cached.get('last_updated')
+        }
+
+    tmp_file = output_file + ".tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump({"players": players}, f, indent=2)
+    os.replace(tmp_file, output_file)
+
+    print(f"  ✓ {os.path.basename(output_file)} ({len(players)} players)")
+    return len(players)
+
+
+def read_player_manifest(manifest_file=None):
+    """
+    Read a manifest file without caching (used by the fetcher for change detection).
+
+    Returns:
+        dict: player_id (str) -> manifest entry, empty if the file doesn't exist
+    """
+    try:
+        with open(manifest_file or manifest_path(), 'r') as f:
+            return json.load(f).get("players", {})
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"Error reading player manifest {manifest_file}: {e}")
+        return {}
+
+
+def load_player_manifest(season=None):
+    """
+    Load a season's player manifest, parsing the file only when it has changed.
+
+    Returns:
+        dict: player_id (str) -> manifest entry, empty if there is no manifest
+    """
+    try:
+        return load_cached(manifest_path(season)).get("players", {})
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"Error loading player manifest: {e}")
+        return {}
+
+
+def get_player_entry(player_id, season=None):
+    """Return the player's entry in a season's manifest, or None."""
+    return load_player_manifest(season).get(str(player_id))
+
+
+def entry_path(entry, season=None):
+    """Absolute path of the cache file a manifest entry points to."""
+    return os.path.join(os.path.dirname(os.path.abspath(manifest_path(season))), entry["path"])
+
+
+def active_player_files(season=None):
+    """
+    Cache files of a season's players with at least one game, without opening any of them.
+
+    Returns:
+        list: File paths, or None if there is no manifest
+    """
+    entries = load_player_manifest(season)
+    if not entries:
+        return None
+    return [
+        entry_path(entry, season)
+        for entry in entries.values()
+        if entry.get("games_played", 0) > 0 and (season is None or entry.get("season") == season)
+    ]
@@ -0,0 +1,99 @@
+"""Materialized stats views - stats results precomputed by the fetcher, keyed by id
+
+The last stage of a fetch run computes what get_player_stats,
+get_team_offense_stats and get_team_defense_stats return for every player and
+team and stores it here, one file per view in the season's materialized/. Serving a tab is then a
+dict lookup in a memoized file instead of a computation over the game logs.
+"""
+
+from datetime import datetime
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from . import cache_format
+from .loader import load_cached
+from .seasons import season_path
+
+# Inside each season's directory
+MATERIALIZED_DIR = "materialized"
+
+VIEWS = ("player_stats", "team_offense", "team_defense")
+
+
+def view_file(view, season, materialized_dir=None):
+    return os.path.join(materialized_dir or season_path(season, MATERIALIZED_DIR), f"{view}_{season}.json")
+
+
+def encode_result(value):
+    """Make a stats result JSON-compatible (DataFrames keep their index and column order)."""
+    if isinstance(value, pd.DataFrame):
+        return {"__frame__": json.loads(value.to_json(orient='split'))}
+    if isinstance(value, dict):
+        return {key: encode_result(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode_result(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def decode_result(value):
+    """Inverse of encode_result."""
+    if isinstance(value, dict):
+        if "__frame__" in value:
+            frame = value["__frame__"]
+            return pd.DataFrame(frame["data"], index=frame["index"], columns=frame["columns"])
+        return {key: decode_result(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [decode_result(item) for item in value]
+    return value
+
+
+def write_view(view, season, results, materialized_dir=None):
+    """
+    Store one view's results for a season.
+
+    Args:
+        view (str): One of VIEWS
+        season (str): Season in format "2025-26"
+        results (dict): id -> stats result (None for ids without data)
+        materialized_dir (str): Directory to write to (the season's by default)
+
+    Returns:
+        str: Path written
+    """
+    if view not in VIEWS:
+        raise ValueError(f"Unknown materialized view: {view}")
+    path = view_file(view, season, materialized_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    output = {
+        "last_updated": datetime.now().isoformat(),
+        "season": season,
+        "results": {str(key): encode_result(result) for key, result in results.items()}
+    }
+    return cache_format.dump(output, path)
+
+
+def get_materialized(view, season, key):
+    """
+    Look up a precomputed result.
+
+    Returns:
+        dict: {"last_updated": ..., "result": ...} where result may be None for an id
+              known to have no data, or None if the id or the view isn't materialized
+    """
+    try:
+        stored = load_cached(view_file(view, season))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Error loading materialized {view} for {season}: {e}")
+        return None
+
+    results = stored.get("results", {})
+    if str(key) not in results:
+        return None
+    return {"last_updated": stored.get("last_updated"), "result": decode_result(results[str(key)])}
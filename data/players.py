@@ -1,22 +1,21 @@
-import json
-import os
+from .loader import load_cached
+from .seasons import season_path
 
-CACHE_FILE = os.path.join(os.path.dirname(__file__), "..", "cached_data", "players.json")
+CACHE_FILE = "players.json"
 
-def load_cached_players_raw():
+def load_cached_players_raw(season=None):
+    cache_file = season_path(season, CACHE_FILE)
     try:
-        if not os.path.exists(CACHE_FILE):
-            print(f"Warning: Cache file not found at {CACHE_FILE}")
-            return None
-        with open(CACHE_FILE, 'r') as f:
-            data = json.load(f)
-        return data
+        return load_cached(cache_file)
+    except FileNotFoundError:
+        print(f"Warning: Cache file not found at {cache_file}")
+        return None
     except Exception as e:
         print(f"Error loading cached players: {str(e)}")
         return None
 
-def get_all_players():
-    cached = load_cached_players_raw()
+def get_all_players(season=None):
+    cached = load_cached_players_raw(season)
     if cached is None:
         return []
     player_data = cached.get("data", {})
@@ -24,14 +23,14 @@ def get_all_players():
         return player_data["CommonAllPlayers"]
     return player_data
 
-def get_cache_timestamp():
-    cached = load_cached_players_raw()
+def get_cache_timestamp(season=None):
+    cached = load_cached_players_raw(season)
     if cached is None:
         return "Unknown"
     return cached.get("last_updated", "Unknown")
 
-def get_cache_season():
-    cached = load_cached_players_raw()
+def get_cache_season(season=None):
+    cached = load_cached_players_raw(season)
     if cached is None:
         return "Unknown"
     return cached.get("season", "Unknown")
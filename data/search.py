@@ -0,0 +1,148 @@
+"""Player name index - exact, prefix and typo-tolerant lookups
+
+The index is built once per data generation (see get_player_index) and holds:
+- a dict from display name to player for exact lookups,
+- a sorted list of normalized name keys ("stephen curry", "curry") searched
+  with bisect for prefix queries,
+- a trigram index over the same keys for fuzzy matching.
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+import re
+import unicodedata
+
+from .loader import get_data_generation
+from .seasons import season_dir
+
+# Fuzzy matches need at least this Dice similarity on trigrams
+MIN_FUZZY_SCORE = 0.3
+
+# Index built for the current data generation and player list
+_index_cache = {"key": None, "index": None}
+
+
+def normalize_name(name):
+    """Lower-case, strip accents and punctuation: "Nikola Jokić" -> "nikola jokic"."""
+    name = unicodedata.normalize('NFKD', name or '')
+    name = ''.join(c for c in name if not unicodedata.combining(c))
+    return ' '.join(re.sub(r"[^a-z0-9]+", ' ', name.casefold()).split())
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PlayerNameIndex:
+    """
+    Name index over a list of player dicts (CommonAllPlayers rows).
+
+    Players are deduplicated by PERSON_ID, keeping the first occurrence, so
+    lists from several seasons can be passed newest first.
+    """
+
+    def __init__(self, players, name_field='DISPLAY_FIRST_LAST'):
+        self.players = []
+        self.by_name = {}
+        seen = set()
+
+        for player in players:
+            if player.get('PERSON_ID') in seen or not player.get(name_field):
+                continue
+            seen.add(player.get('PERSON_ID'))
+            self.players.append(player)
+            self.by_name.setdefault(player[name_field], player)
+            self.by_name.setdefault(normalize_name(player[name_field]), player)
+
+        self.names = sorted(p[name_field] for p in self.players)
+
+        # Every name suffix that starts a word is a key, so "cur" finds "Stephen Curry"
+        keys = []
+        for idx, player in enumerate(self.players):
+            words = normalize_name(player[name_field]).split()
+            keys.extend((' '.join(words[i:]), idx) for i in range(len(words)))
+        keys.sort()
+        self._keys = [key for key, _ in keys]
+        self._key_player = [idx for _, idx in keys]
+
+        self._trigrams = defaultdict(list)
+        self._key_sizes = []
+        for key_id, key in enumerate(self._keys):
+            grams = trigrams(key)
+            self._key_sizes.append(len(grams))
+            for gram in grams:
+                self._trigrams[gram].append(key_id)
+
+    def exact(self, name):
+        """Player with exactly this display name (accents/case ignored), or None."""
+        return self.by_name.get(name) or self.by_name.get(normalize_name(name))
+
+    def prefix(self, query, limit=20):
+        """Players whose name, or any later part of it, starts with the query."""
+        query = normalize_name(query)
+        if not query:
+            return []
+
+        found = []
+        seen = set()
+        for pos in range(bisect_left(self._keys, query), len(self._keys)):
+            if not self._keys[pos].startswith(query) or len(found) >= limit:
+                break
+            idx = self._key_player[pos]
+            if idx not in seen:
+                seen.add(idx)
+                found.append(self.players[idx])
+        return found
+
+    def fuzzy(self, query, limit=20, min_score=MIN_FUZZY_SCORE):
+        """Players ranked by trigram similarity to the query (typo tolerant)."""
+        query = normalize_name(query)
+        if not query:
+            return []
+        query_grams = trigrams(query)
+
+        shared = defaultdict(int)
+        for gram in query_grams:
+            for key_id in self._trigrams.get(gram, ()):
+                shared[key_id] += 1
+
+        best = {}
+        for key_id, count in shared.items():
+            score = 2 * count / (len(query_grams) + self._key_sizes[key_id])
+            idx = self._key_player[key_id]
+            if score >= min_score and score > best.get(idx, 0):
+                best[idx] = score
+
+        ranked = sorted(best, key=lambda idx: -best[idx])[:limit]
+        return [self.players[idx] for idx in ranked]
+
+    def search(self, query, limit=20):
+        """Exact match, else prefix matches topped up with fuzzy matches."""
+        player = self.exact(query)
+        if player is not None:
+            return [player]
+
+        results = self.prefix(query, limit)
+        if len(results) < limit:
+            ids = {p['PERSON_ID'] for p in results}
+            results += [p for p in self.fuzzy(query, limit) if p['PERSON_ID'] not in ids][:limit - len(results)]
+        return results
+
+
+def get_player_index(players, season=None):
+    """
+    Name index for a player list, rebuilt only when the data generation or the list changes.
+
+    Args:
+        players (list): Player dicts, newest season first when spanning several seasons
+        season (str): Season whose data generation the list belongs to (the current one when None)
+
+    Returns:
+        PlayerNameIndex
+    """
+    key = (get_data_generation(season_dir(season)), tuple(p.get('PERSON_ID') for p in players))
+    if _index_cache["key"] != key:
+        _index_cache["index"] = PlayerNameIndex(players)
+        _index_cache["key"] = key
+    return _index_cache["index"]
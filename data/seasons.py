@@ -0,0 +1,358 @@
+"""Season partitions - each season's cache lives in cached_data/seasons/<season>/
+
+A partition holds everything the fetcher writes for one season: the players,
+teams, standings and league game files, player_stats/, team_gamelogs/, the
+manifest, the game stores and the materialized views. The career archive
+(player_careers/) spans seasons and stays in cached_data itself.
+
+Within a partition each fetch run writes a complete snapshot to a new
+generation directory (generations/<id>/) and publishes it by atomically
+replacing the CURRENT pointer file, so readers never see a half-refreshed
+season. A request pins the generation it started with (pin_generation) and
+reads only from it, even if a newer one is published meanwhile.
+
+A cache that is committed to git is flattened after each run instead
+(flatten_partition): the published snapshot moves back into the partition
+itself, so the repository keeps one copy at stable paths rather than a new
+generations/<id>/ tree per run.
+
+Caches written before partitioning hold a single season directly in
+cached_data; season_dir() serves that season from there until the fetcher
+moves it into its partition (migrate_legacy_layout).
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+import os
+import re
+import shutil
+import threading
+
+from .loader import load_cached
+
+CACHE_ROOT = os.environ.get("NBA_CACHE_DIR", os.path.join(os.path.dirname(__file__), "..", "cached_data"))
+SEASONS_DIR = os.path.join(CACHE_ROOT, "seasons")
+
+# Season the fetcher refreshes and the app opens with
+CURRENT_SEASON = os.environ.get("NBA_SEASON", "2025-26")
+
+SEASON_PATTERN = re.compile(r"^\d{4}-\d{2}$")
+
+# Files and directories of one season's snapshot
+SNAPSHOT_ENTRIES = [
+    "players.json",
+    "teams.json",
+    "standings.json",
+    "league_games.json",
+    "player_manifest.json",
+    "player_games.npz",
+    "team_games.npz",
+    "stats.sqlite",
+    "player_stats",
+    "team_gamelogs",
+    "materialized"
+]
+
+# Everything that belongs to one season; the rest of cached_data is shared
+PARTITION_ENTRIES = SNAPSHOT_ENTRIES + ["fetch_journal.jsonl"]
+
+GENERATIONS_DIR = "generations"
+CURRENT_FILE = "CURRENT"
+
+# Published generations kept per season, the current one included; older ones
+# may still be pinned by in-flight requests for a moment after a publish
+KEEP_GENERATIONS = int(os.environ.get("NBA_KEEP_GENERATIONS", 2))
+
+# Season -> generation directory pinned by the current thread's request
+_pins = threading.local()
+
+
+def partition_dir(season=None, cache_root=CACHE_ROOT):
+    """Directory of a season's partition, whether or not it exists yet."""
+    return os.path.join(cache_root, "seasons", season or CURRENT_SEASON)
+
+
+def legacy_season(cache_root=CACHE_ROOT):
+    """Season of a pre-partitioning cache in cache_root itself, or None."""
+    try:
+        return load_cached(os.path.join(cache_root, "players.json")).get("season")
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Error reading legacy cache season: {e}")
+        return None
+
+
+def current_generation(season=None, cache_root=CACHE_ROOT):
+    """
+    Id of a season's published generation.
+
+    Returns:
+        str: Generation id, or None if the partition has no published generation
+    """
+    try:
+        with open(os.path.join(partition_dir(season, cache_root), CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def generation_dir(season, generation, cache_root=CACHE_ROOT):
+    """Directory of one generation of a season's partition."""
+    return os.path.join(partition_dir(season, cache_root), GENERATIONS_DIR, generation)
+
+
+def published_season_dir(season=None, cache_root=CACHE_ROOT):
+    """
+    Directory of a season's currently published data, ignoring pins.
+
+    Returns:
+        str: The current generation, the partition itself if it predates
+             generations, or cache_root for a season still in the legacy layout
+    """
+    season = season or CURRENT_SEASON
+    generation = current_generation(season, cache_root)
+    if generation:
+        return generation_dir(season, generation, cache_root)
+    partition = partition_dir(season, cache_root)
+    if not os.path.isdir(partition) and legacy_season(cache_root) == season:
+        return cache_root
+    return partition
+
+
+def season_dir(season=None, cache_root=CACHE_ROOT):
+    """
+    Directory to read a season's cache from: the generation this thread has
+    pinned for the season, otherwise the published one.
+
+    Returns:
+        str: Directory holding the season's snapshot
+    """
+    season = season or CURRENT_SEASON
+    if cache_root == CACHE_ROOT:
+        pinned = getattr(_pins, "dirs", {}).get(season)
+        if pinned:
+            return pinned
+    return published_season_dir(season, cache_root)
+
+
+def season_path(season, *parts):
+    """Path of a file in a season's cache, e.g. season_path("2025-26", "players.json")."""
+    return os.path.join(season_dir(season), *parts)
+
+
+def available_seasons(cache_root=CACHE_ROOT):
+    """
+    Seasons with a cache, newest first.
+
+    Returns:
+        list: Season strings like "2025-26"
+    """
+    seasons = set()
+    seasons_dir = os.path.join(cache_root, "seasons")
+    if os.path.isdir(seasons_dir):
+        seasons.update(name for name in os.listdir(seasons_dir) if SEASON_PATTERN.match(name))
+    legacy = legacy_season(cache_root)
+    if legacy:
+        seasons.add(legacy)
+    return sorted(seasons, reverse=True)
+
+
+def migrate_legacy_layout(cache_root=CACHE_ROOT):
+    """
+    Move a pre-partitioning cache from cache_root into its season's partition.
+
+    Entries the partition already has are left where they are.
+
+    Returns:
+        list: Names of the moved files and directories
+    """
+    season = legacy_season(cache_root)
+    if not season:
+        return []
+
+    partition = partition_dir(season, cache_root)
+    os.makedirs(partition, exist_ok=True)
+    moved = []
+    for name in os.listdir(cache_root):
+        # Cache files may carry a format extension (players.json.gz)
+        entry = next((e for e in PARTITION_ENTRIES if name == e or name.startswith(e + ".")), None)
+        if entry is None or os.path.exists(os.path.join(partition, name)):
+            continue
+        os.replace(os.path.join(cache_root, name), os.path.join(partition, name))
+        moved.append(name)
+    return moved
+
+
+def pin_generation(season=None):
+    """
+    Pin a season's published generation for the rest of the current request.
+
+    Every read of the season on this thread goes to the pinned generation
+    until the next pin_generation call, which also drops the pins of earlier
+    requests served by the thread.
+
+    Returns:
+        str: The pinned generation id, or None for a season without generations
+    """
+    season = season or CURRENT_SEASON
+    _pins.dirs = {season: published_season_dir(season)}
+    return current_generation(season)
+
+
+@contextmanager
+def pinned(season=None, directory=None):
+    """
+    Read a season from one directory inside the block (the published generation by default).
+
+    The fetcher uses this to run the readers on a generation it hasn't published yet.
+    """
+    season = season or CURRENT_SEASON
+    pins = getattr(_pins, "dirs", {})
+    previous = pins.get(season)
+    _pins.dirs = dict(pins, **{season: directory or published_season_dir(season)})
+    try:
+        yield _pins.dirs[season]
+    finally:
+        if previous is None:
+            _pins.dirs.pop(season, None)
+        else:
+            _pins.dirs[season] = previous
+
+
+def _link_tree(source, target):
+    """Recreate a file tree with hard links (copies where the filesystem can't link)."""
+    if os.path.isdir(source):
+        os.makedirs(target, exist_ok=True)
+        for name in os.listdir(source):
+            _link_tree(os.path.join(source, name), os.path.join(target, name))
+        return
+    if source.endswith(".tmp"):
+        return
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def list_generations(season=None, cache_root=CACHE_ROOT):
+    """Generation ids of a season, oldest first."""
+    generations = os.path.join(partition_dir(season, cache_root), GENERATIONS_DIR)
+    if not os.path.isdir(generations):
+        return []
+    return sorted(name for name in os.listdir(generations) if os.path.isdir(os.path.join(generations, name)))
+
+
+def stage_generation(season=None, resume=False, cache_root=CACHE_ROOT):
+    """
+    Create the generation a fetch run writes to.
+
+    The new generation starts as a hard-linked copy of the published data, so
+    incremental runs only rewrite what changed. Cache files are always
+    replaced, never written in place, so the published generation is never
+    touched through a shared link.
+
+    Args:
+        season (str): Season to stage (the current one when None)
+        resume (bool): Reuse the newest unpublished generation if there is one
+        cache_root (str): cached_data directory
+
+    Returns:
+        tuple: (generation id, generation directory)
+    """
+    season = season or CURRENT_SEASON
+    current = current_generation(season, cache_root)
+    if resume:
+        unpublished = [g for g in list_generations(season, cache_root) if current is None or g > current]
+        if unpublished:
+            return unpublished[-1], generation_dir(season, unpublished[-1], cache_root)
+
+    generation = datetime.now().strftime("%Y%m%dT%H%M%S")
+    existing = list_generations(season, cache_root)
+    if existing and generation <= existing[-1]:
+        # Two runs within a second (or a clock set back) - keep ids unique and
+        # ordered, even when the lower ids of that second were already pruned
+        generation = existing[-1] + "a"
+    target = generation_dir(season, generation, cache_root)
+    os.makedirs(target)
+
+    source = published_season_dir(season, cache_root)
+    if os.path.isdir(source):
+        for name in os.listdir(source):
+            entry = next((e for e in SNAPSHOT_ENTRIES if name == e or name.startswith(e + ".")), None)
+            if entry is not None:
+                _link_tree(os.path.join(source, name), os.path.join(target, name))
+    return generation, target
+
+
+def publish_generation(season, generation, cache_root=CACHE_ROOT, keep=KEEP_GENERATIONS):
+    """
+    Atomically make a staged generation the one readers see, then prune old ones.
+
+    Returns:
+        list: Generation ids removed by the pruning
+    """
+    partition = partition_dir(season, cache_root)
+    tmp_file = os.path.join(partition, CURRENT_FILE + ".tmp")
+    with open(tmp_file, 'w') as f:
+        f.write(generation + "\n")
+    os.replace(tmp_file, os.path.join(partition, CURRENT_FILE))
+
+    # Snapshot files of a partition that predates generations are now in the generation
+    for name in os.listdir(partition):
+        if any(name == e or name.startswith(e + ".") for e in SNAPSHOT_ENTRIES):
+            path = os.path.join(partition, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+    return prune_generations(season, cache_root, keep)
+
+
+def prune_generations(season=None, cache_root=CACHE_ROOT, keep=KEEP_GENERATIONS):
+    """
+    Remove published generations older than the newest `keep`; unpublished ones are left alone.
+
+    Returns:
+        list: Removed generation ids
+    """
+    current = current_generation(season, cache_root)
+    if current is None:
+        return []
+    published = [g for g in list_generations(season, cache_root) if g <= current]
+    # The current generation is always kept
+    removed = published[:-max(keep, 1)]
+    for generation in removed:
+        shutil.rmtree(generation_dir(season, generation, cache_root), ignore_errors=True)
+    return removed
+
+
+def flatten_partition(season=None, cache_root=CACHE_ROOT):
+    """
+    Move a season's published generation into the partition itself and drop its generations.
+
+    Readers then see the partition like one that predates generations. The
+    moves aren't atomic, so only flatten where nothing reads the cache
+    meanwhile (e.g. the scheduled fetch that commits cached_data/).
+
+    Returns:
+        str: Id of the generation that was flattened, or None if the season has none
+    """
+    season = season or CURRENT_SEASON
+    generation = current_generation(season, cache_root)
+    if generation is None:
+        return None
+
+    partition = partition_dir(season, cache_root)
+    source = generation_dir(season, generation, cache_root)
+    for name in os.listdir(source):
+        target = os.path.join(partition, name)
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        elif os.path.exists(target):
+            os.remove(target)
+        os.replace(os.path.join(source, name), target)
+
+    os.remove(os.path.join(partition, CURRENT_FILE))
+    shutil.rmtree(os.path.join(partition, GENERATIONS_DIR), ignore_errors=True)
+    return generation
@@ -0,0 +1,212 @@
+"""HTTP transport for nba_api - shared rate limiting, timeouts, retries and concurrency
+
+Every nba_api request made after install_transport() goes through one
+process-wide token bucket, so any number of worker threads stay under the
+configured request rate. 429s, 5xx responses and timeouts slow the bucket
+down (and are retried); successful requests speed it back up.
+
+NBA_API_BASE_URL sends every nba_api stats request to another server, e.g. the
+local stand-in in scripts/nba_api_server.py, instead of stats.nba.com.
+
+Interactive paths overlap their independent requests with submit(), which
+runs them on one shared pool; the limiter still paces them.
+"""
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+REQUEST_TIMEOUT = int(os.environ.get("REQUESTS_TIMEOUT", 120))
+RATE_LIMIT_PER_SEC = float(os.environ.get("NBA_API_RATE_LIMIT", 2.0))
+RATE_LIMIT_BURST = int(os.environ.get("NBA_API_BURST", 4))
+MAX_WORKERS = int(os.environ.get("NBA_FETCH_WORKERS", 4))
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 2.0
+
+THROTTLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+STATS_BASE_URL = "https://stats.nba.com"
+API_BASE_URL = os.environ.get("NBA_API_BASE_URL")
+
+
+class ThrottledError(Exception):
+    """Raised when stats.nba.com keeps throttling or timing out a request."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket allowing `rate` requests per second with bursts of `burst`.
+
+    penalize() halves the rate (down to min_rate) and reward() grows it back
+    towards the configured rate, so the bucket adapts to upstream throttling.
+    """
+
+    def __init__(self, rate, burst, min_rate=None):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 8
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def penalize(self):
+        """Multiplicative decrease after a 429 or timeout; also drains any burst."""
+        with self._lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+
+    def reward(self):
+        """Additive increase after a successful request."""
+        with self._lock:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+
+limiter = TokenBucket(RATE_LIMIT_PER_SEC, RATE_LIMIT_BURST)
+
+# HTTP requests sent through the transport (every attempt, retries included)
+_counters = {"requests": 0, "throttled": 0, "retries": 0, "failed": 0}
+_counters_lock = threading.Lock()
+
+_installed = {"original": None}
+
+# Shared pool for submit(), created on first use
+_pool = {"executor": None}
+_pool_lock = threading.Lock()
+
+
+def _count(name):
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def request_stats():
+    """
+    Request counters since the process started.
+
+    Returns:
+        dict: requests (HTTP attempts), throttled (429/5xx/timeouts), retries,
+              failed (requests given up after MAX_RETRIES)
+    """
+    with _counters_lock:
+        return dict(_counters)
+
+
+def _is_throttle_error(error):
+    """Timeouts and connection resets are treated like a 429."""
+    name = type(error).__name__
+    return name in ("Timeout", "ReadTimeout", "ConnectTimeout", "ConnectionError")
+
+
+def use_api_server(base_url=None):
+    """
+    Send nba_api stats requests to base_url (e.g. "http://127.0.0.1:8765"), or
+    to stats.nba.com when None. Applies to every request in the process.
+    """
+    import nba_api.stats.library.http as nba_http
+
+    nba_http.NBAStatsHTTP.base_url = f"{(base_url or STATS_BASE_URL).rstrip('/')}/stats/{{endpoint}}"
+
+
+def install_transport():
+    """
+    Route nba_api stats requests through the shared limiter with a longer timeout
+    and retries. Safe to call more than once.
+    """
+    # AGGRESSIVE TIMEOUT FIX: Monkey-patch the nba_api internal request method
+    import nba_api.stats.library.http as nba_http
+
+    if _installed["original"] is not None:
+        return
+
+    original_send = nba_http.NBAStatsHTTP.send_api_request
+    _installed["original"] = original_send
+
+    def send_api_request(self, endpoint, parameters, referer=None, proxy=None, headers=None,
+                         timeout=None, raise_exception_on_error=False):
+        for attempt in range(MAX_RETRIES + 1):
+            limiter.acquire()
+            _count("requests")
+            try:
+                response = original_send(
+                    self, endpoint, parameters, referer=referer, proxy=proxy, headers=headers,
+                    timeout=max(timeout or 0, REQUEST_TIMEOUT),
+                    raise_exception_on_error=raise_exception_on_error
+                )
+                throttled = response._status_code in THROTTLE_STATUS_CODES
+                reason = f"HTTP {response._status_code}"
+            except Exception as e:
+                if not _is_throttle_error(e):
+                    raise
+                throttled, reason = True, str(e)
+
+            if not throttled:
+                limiter.reward()
+                return response
+
+            limiter.penalize()
+            _count("throttled")
+            if attempt < MAX_RETRIES:
+                _count("retries")
+                delay = BACKOFF_SECONDS * (2 ** attempt) * (1 + random.random() / 2)
+                print(f"    ⚠ {endpoint} throttled ({reason}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+        _count("failed")
+        raise ThrottledError(f"{endpoint} throttled after {MAX_RETRIES + 1} attempts ({reason})")
+
+    nba_http.NBAStatsHTTP.send_api_request = send_api_request
+
+
+def submit(fn, *args, **kwargs):
+    """
+    Start fn(*args, **kwargs) on the shared request pool.
+
+    Returns:
+        Future: .result() returns fn's result or raises its exception
+    """
+    with _pool_lock:
+        if _pool["executor"] is None:
+            _pool["executor"] = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="nba-api")
+    return _pool["executor"].submit(fn, *args, **kwargs)
+
+
+def run_concurrent(items, worker, max_workers=None):
+    """
+    Run worker(item) for every item on a thread pool.
+
+    The limiter paces the actual requests, so max_workers only bounds how many
+    requests are in flight at once.
+
+    Returns:
+        list: (item, result, error) tuples in completion order
+    """
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers or MAX_WORKERS) as pool:
+        futures = {pool.submit(worker, item): item for item in items}
+        for future in as_completed(futures):
+            try:
+                results.append((futures[future], future.result(), None))
+            except Exception as e:
+                results.append((futures[future], None, e))
+    return results
@@ -0,0 +1,114 @@
+"""
+Checkpoint journal for fetch runs.
+
+Every work item (an endpoint plus its parameters) is appended to a JSON-lines
+journal as it completes or fails, so a crashed refresh can be resumed and the
+failures of the last run can be retried without redoing finished work.
+"""
+
+from datetime import datetime
+import json
+import os
+import threading
+import uuid
+
+MODES = ("normal", "resume", "retry-failed")
+
+
+def item_key(endpoint, params):
+    """Stable key for a work item: endpoint name plus sorted parameters."""
+    return f"{endpoint} {json.dumps(params, sort_keys=True, default=str)}"
+
+
+class FetchJournal:
+    """
+    Append-only journal of completed and failed work items.
+
+    A normal run starts a fresh journal. --resume skips items completed by any
+    run since the last one that finished cleanly; --retry-failed only runs the
+    items that failed in the last run (and haven't completed since).
+    """
+
+    def __init__(self, path, mode="normal"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown journal mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.run_id = uuid.uuid4().hex[:12]
+        self._lock = threading.Lock()
+
+        entries = self._read() if mode != "normal" else []
+        self.completed, self.failed = self._summarize(entries)
+
+        # A normal run starts a new journal; resume/retry runs keep appending to it
+        if mode == "normal" and os.path.exists(path):
+            os.remove(path)
+        self._append({"event": "run_start", "mode": mode})
+
+    def _read(self):
+        try:
+            with open(self.path, 'r') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # A crash can leave a half-written last line
+                continue
+        return entries
+
+    @staticmethod
+    def _summarize(entries):
+        """Completed keys since the last clean finish, and keys still failing from the last run."""
+        completed = set()
+        last_run = None
+
+        for entry in entries:
+            event = entry.get("event")
+            if event == "run_start":
+                last_run = entry.get("run_id")
+            elif event == "run_end":
+                completed = set()
+            elif event == "completed":
+                completed.add(entry["key"])
+
+        last_run_entries = [entry for entry in entries if entry.get("run_id") == last_run]
+        failed = {entry["key"] for entry in last_run_entries if entry.get("event") == "failed"}
+        failed -= {entry["key"] for entry in last_run_entries if entry.get("event") == "completed"}
+        return completed, failed
+
+    def _append(self, entry):
+        entry = dict(entry, run_id=self.run_id, time=datetime.now().isoformat())
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(entry, default=str) + "\n")
+                f.flush()
+
+    def should_run(self, endpoint, params):
+        """Whether this run needs to do the work item."""
+        key = item_key(endpoint, params)
+        if self.mode == "resume":
+            return key not in self.completed
+        if self.mode == "retry-failed":
+            return key in self.failed
+        return True
+
+    def record(self, endpoint, params, success, error=None):
+        """Append a completed or failed work item."""
+        entry = {
+            "event": "completed" if success else "failed",
+            "key": item_key(endpoint, params),
+            "endpoint": endpoint,
+            "params": params
+        }
+        if error is not None:
+            entry["error"] = str(error)
+        self._append(entry)
+
+    def finish(self):
+        """Mark the run as finished cleanly, so the next --resume starts from scratch."""
+        self._append({"event": "run_end"})
@@ -1,43 +1,62 @@
 """
 Comprehensive NBA Data Fetcher for 2025-26 Season
-Fetches ALL available data in batches and caches locally.
+Fetches ALL available data concurrently under a shared rate limit and caches locally.
 Run this once daily to refresh all cached data.
+
+Each season is written to its own partition (cached_data/seasons/<season>/);
+--season backfills or refreshes an earlier one. A run writes a new generation
+of the partition and only publishes it once everything is rebuilt, so the app
+keeps serving the previous snapshot until then. With --flat (for a cache
+committed to git) the published snapshot is moved back into the partition
+itself afterwards, so the repository never holds generation directories.
 """
 
 from datetime import datetime
-import json
+import argparse
 import os
-import time
-
-# AGGRESSIVE TIMEOUT FIX: Monkey-patch the nba_api internal request method
-import nba_api.stats.library.http as nba_http
+import sys
+import threading
 
-# Store original method
-_original_send = nba_http.NBAStatsHTTP.send_api_request
-
-# Create patched version with longer timeout
-def _patched_send(self, endpoint, parameters, referer=None, proxy=None, headers=None, timeout=120):
-    return _original_send(self, endpoint, parameters, referer=referer, proxy=proxy, headers=headers, timeout=timeout)
+# Allow `python scripts/fetch_nba_data.py` to import the project's data package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data import cache_format, database
+from data.transport import install_transport, request_stats, run_concurrent, MAX_WORKERS
+from data.game_store import build_player_game_store, build_team_game_store
+from data.manifest import build_player_manifest, read_player_manifest
+from data.career_archive import (
+    CAREER_DIR, CAREER_REFRESH_DAYS, career_is_fresh, current_season_rows, load_player_career,
+    season_rows_from_game_log, split_player_files, write_career_archive
+)
+from data.seasons import (
+    CURRENT_SEASON, flatten_partition, migrate_legacy_layout, partition_dir, pinned, publish_generation,
+    stage_generation
+)
+from scripts.fetch_journal import FetchJournal
 
-# Apply the patch
-nba_http.NBAStatsHTTP.send_api_request = _patched_send
+# Route every nba_api request through the shared rate limiter (longer timeout, retries on 429)
+install_transport()
 
 # NOW import endpoints (after patch is applied)
 from nba_api.stats.endpoints import (
     leaguedashteamstats,
+    leaguegamefinder,
     commonallplayers,
     leaguestandingsv3,
     playercareerstats,
     playergamelog,
     teamgamelog
 )
+from stats.materialize import materialize_all
 
 # Configuration
-SEASON = "2025-26"
-OUTPUT_DIR = "cached_data"
-RATE_LIMIT_DELAY = 0.6  # Delay between individual API calls (600ms)
-BATCH_DELAY = 2.0       # Longer delay between batches
-BATCH_SIZE = 10         # Number of items per batch
+SEASON = CURRENT_SEASON
+# Generation directory of the current run (staged in main)
+OUTPUT_DIR = partition_dir(SEASON)
+# Request pacing lives in data/transport.py (NBA_API_RATE_LIMIT, NBA_API_BURST);
+# this bounds how many players/teams are fetched at once
+FETCH_WORKERS = MAX_WORKERS
+# Full career history is only rewritten when the archive is older than this (0 with --full)
+CAREER_MAX_AGE_DAYS = CAREER_REFRESH_DAYS
 
 # Track statistics
 stats = {
@@ -46,6 +65,28 @@ stats = {
     "failed_fetches": 0,
     "start_time": datetime.now()
 }
+stats_lock = threading.Lock()
+
+# Checkpoint journal of the current run (set up in main)
+journal = None
+JOURNAL_FILE = "fetch_journal.jsonl"
+PLAYER_ENDPOINT = "PlayerCareerStats+PlayerGameLog"
+TEAM_ENDPOINT = "TeamGameLog"
+
+def record(outcome, endpoint=None, params=None, error=None):
+    """
+    Count one fetch as successful or failed and add it to the run journal
+    (called from worker threads).
+    """
+    with stats_lock:
+        stats["total_fetches"] += 1
+        stats[f"{outcome}_fetches"] += 1
+    if journal is not None and endpoint is not None:
+        journal.record(endpoint, params, outcome == "successful", error)
+
+def should_fetch(endpoint, params):
+    """Whether the journal says this work item still needs to be done in this run."""
+    return journal is None or journal.should_run(endpoint, params)
 
 def create_output_dir():
     """Create cached_data directory if it doesn't exist."""
@@ -64,7 +105,10 @@ def fetch_and_save(endpoint_func, filename, **kwargs):
     Returns:
         bool: True if successful, False otherwise
     """
-    stats["total_fetches"] += 1
+    endpoint = endpoint_func.__name__
+    if not should_fetch(endpoint, kwargs):
+        print(f"  ↷ {filename} (already fetched)")
+        return True
     
     try:
         # Call endpoint
@@ -78,26 +122,166 @@ def fetch_and_save(endpoint_func, filename, **kwargs):
             "data": data
         }
         
-        # Save to JSON
-        filepath = os.path.join(OUTPUT_DIR, filename)
-        with open(filepath, 'w') as f:
-            json.dump(output, f, indent=2)
+        # Save in the selected cache format
+        cache_format.dump(output, os.path.join(OUTPUT_DIR, filename))
         
-        stats["successful_fetches"] += 1
+        record("successful", endpoint, kwargs)
         print(f"  ✓ {filename}")
-        time.sleep(RATE_LIMIT_DELAY)
         return True
         
     except Exception as e:
-        stats["failed_fetches"] += 1
+        record("failed", endpoint, kwargs, e)
         print(f"  ✗ {filename}: {str(e)}")
-        time.sleep(RATE_LIMIT_DELAY)
         return False
 
-def fetch_all_player_stats():
+def load_team_last_game_dates():
+    """
+    Latest game date per team from the freshly fetched league game table.
+    
+    Returns:
+        dict: team_id -> "YYYY-MM-DD", or None if the table isn't available
+    """
+    try:
+        games = cache_format.load(os.path.join(OUTPUT_DIR, "league_games.json"))['data']['LeagueGameFinderResults']
+    except Exception as e:
+        print(f"  ⚠ No league game table for change detection ({e}), refreshing everything")
+        return None
+    
+    last_game = {}
+    for game in games:
+        team_id = int(game['TEAM_ID'])
+        game_date = game['GAME_DATE'][:10]
+        if game_date > last_game.get(team_id, ''):
+            last_game[team_id] = game_date
+    return last_game
+
+def played_since(team_id, last_updated, team_last_game):
+    """Whether a team has played on or after the day of a cache file's last update."""
+    if not last_updated:
+        return True
+    last_game = team_last_game.get(int(team_id or 0))
+    return last_game is not None and last_game >= last_updated[:10]
+
+def select_changed_players(all_players, team_last_game):
+    """
+    Keep only players whose cache is missing, who changed teams, or whose team
+    played since their file was last updated.
+    """
+    if team_last_game is None:
+        return all_players
+    
+    manifest = read_player_manifest(os.path.join(OUTPUT_DIR, "player_manifest.json"))
+    changed = []
+    
+    for player in all_players:
+        entry = manifest.get(str(player['PERSON_ID']))
+        if (
+            entry is None
+            or not os.path.exists(os.path.join(OUTPUT_DIR, entry['path']))
+            or entry.get('season') != SEASON
+            or entry.get('team_abbreviation') != player.get('TEAM_ABBREVIATION', 'FA')
+            or played_since(player.get('TEAM_ID'), entry.get('last_updated'), team_last_game)
+        ):
+            changed.append(player)
+    
+    return changed
+
+def select_changed_teams(all_teams, team_last_game):
+    """Keep only teams whose game log file is missing or who played since it was written."""
+    if team_last_game is None:
+        return all_teams
+    
+    last_updated = {}
+    for cache_file in cache_format.glob_cache(os.path.join(OUTPUT_DIR, "team_gamelogs", "*")):
+        try:
+            cached = cache_format.load(cache_file)
+            last_updated[cached['team_id']] = cached.get('last_updated')
+        except Exception:
+            continue
+    
+    return [
+        team for team in all_teams
+        if team['TEAM_ID'] not in last_updated
+        or played_since(team['TEAM_ID'], last_updated[team['TEAM_ID']], team_last_game)
+    ]
+
+def player_params(player):
+    return {"player_id": player['PERSON_ID'], "season": SEASON}
+
+def team_params(team):
+    return {"team_id": team['TEAM_ID'], "season": SEASON}
+
+def fetch_player(player):
+    """
+    Fetch the current season game log for one player (and career stats when the
+    archive is due or can't rebuild the season's totals) and write the player's
+    cache file. Runs on a worker thread.
+    """
+    player_id = player['PERSON_ID']
+    player_name = player['DISPLAY_FIRST_LAST']
+    player_stats_dir = os.path.join(OUTPUT_DIR, "player_stats")
+    
+    try:
+        # FETCH GAME LOG FOR CURRENT SEASON
+        game_log_data = []
+        try:
+            gamelog_response = playergamelog.PlayerGameLog(
+                player_id=str(player_id),
+                season=SEASON
+            )
+            game_log_data = gamelog_response.get_normalized_dict()
+            print(f"    ✓ {player_name} (with game log)")
+        except Exception as gl_error:
+            print(f"    ⚠ {player_name} (no game log: {str(gl_error)})")
+        
+        # With a fresh career archive the season totals are rebuilt from the game log,
+        # so unchanged career history isn't downloaded again
+        season_rows = None
+        if game_log_data and career_is_fresh(player_id, CAREER_MAX_AGE_DAYS, CAREER_DIR):
+            season_rows = season_rows_from_game_log(load_player_career(player_id, CAREER_DIR), game_log_data, SEASON)
+        
+        if season_rows is None:
+            # Fetch player career stats (includes current season)
+            career_response = playercareerstats.PlayerCareerStats(
+                player_id=str(player_id)
+            )
+            career_data = career_response.get_normalized_dict()
+            season_rows = current_season_rows(career_data, SEASON)
+            
+            # The archive is due, or can't rebuild this season (new season, trade, playoffs)
+            write_career_archive(player_id, player_name, career_data, CAREER_DIR)
+        
+        # Save to individual player file
+        output = {
+            "last_updated": datetime.now().isoformat(),
+            "player_id": player_id,
+            "player_name": player_name,
+            "team_abbreviation": player.get('TEAM_ABBREVIATION', 'FA'),
+            "season": SEASON,
+            "data": season_rows,
+            "game_log": game_log_data
+        }
+        
+        safe_name = player_name.replace(' ', '_').replace('/', '_')
+        cache_format.dump(output, os.path.join(player_stats_dir, f"{player_id}_{safe_name}.json"))
+        
+        record("successful", PLAYER_ENDPOINT, player_params(player))
+        return True
+        
+    except Exception as e:
+        record("failed", PLAYER_ENDPOINT, player_params(player), e)
+        print(f"    ✗ {player_name}: {str(e)}")
+        return False
+
+def fetch_all_player_stats(team_last_game=None):
     """
     Fetch season stats AND game logs for all active players.
     Uses playercareerstats endpoint and filters for 2025-26 season.
+    Players are fetched concurrently; the shared limiter paces the requests.
+    
+    Args:
+        team_last_game (dict): Latest game date per team; when given, only players
+            whose team played since their last update are refetched
     """
     print("\n📊 Fetching all player season stats and game logs...")
     
@@ -109,77 +293,60 @@ def fetch_all_player_stats():
         print(f"  ✗ Failed to load players: {e}")
         return
     
-    print(f"  Found {len(all_players)} active players")
+    print(f"  Found {len(all_players)} active players ({FETCH_WORKERS} workers)")
     
     # Create a directory for player stats
-    player_stats_dir = os.path.join(OUTPUT_DIR, "player_stats")
-    os.makedirs(player_stats_dir, exist_ok=True)
+    os.makedirs(os.path.join(OUTPUT_DIR, "player_stats"), exist_ok=True)
+    
+    changed_players = select_changed_players(all_players, team_last_game)
+    pending = [p for p in changed_players if should_fetch(PLAYER_ENDPOINT, player_params(p))]
+    print(f"  Refreshing {len(pending)} players ({len(all_players) - len(changed_players)} unchanged, "
+          f"{len(changed_players) - len(pending)} already done)")
+    
+    run_concurrent(pending, fetch_player, max_workers=FETCH_WORKERS)
+
+def fetch_team_gamelog(team):
+    """Fetch the current season game log for one team and write its cache file."""
+    team_id = team['TEAM_ID']
+    team_name = team['TEAM_NAME']
+    team_logs_dir = os.path.join(OUTPUT_DIR, "team_gamelogs")
     
-    # Process players in batches
-    for batch_idx in range(0, len(all_players), BATCH_SIZE):
-        batch = all_players[batch_idx:batch_idx + BATCH_SIZE]
-        batch_num = (batch_idx // BATCH_SIZE) + 1
-        total_batches = (len(all_players) + BATCH_SIZE - 1) // BATCH_SIZE
+    try:
+        # Fetch team game log for current season
+        gamelog_response = teamgamelog.TeamGameLog(
+            team_id=str(team_id),
+            season=SEASON
+        )
+        gamelog_data = gamelog_response.get_normalized_dict()
         
-        print(f"  Batch {batch_num}/{total_batches}...")
+        # Save to individual team file
+        output = {
+            "last_updated": datetime.now().isoformat(),
+            "team_id": team_id,
+            "team_name": team_name,
+            "season": SEASON,
+            "data": gamelog_data
+        }
+        
+        safe_name = team_name.replace(' ', '_').replace('/', '_')
+        cache_format.dump(output, os.path.join(team_logs_dir, f"{team_id}_{safe_name}.json"))
         
-        for player in batch:
-            try:
-                player_id = player['PERSON_ID']
-                player_name = player['DISPLAY_FIRST_LAST']
-                
-                # Fetch player career stats (includes current season)
-                career_response = playercareerstats.PlayerCareerStats(
-                    player_id=str(player_id)
-                )
-                career_data = career_response.get_normalized_dict()
-                
-                time.sleep(RATE_LIMIT_DELAY)
-                
-                # FETCH GAME LOG FOR CURRENT SEASON
-                game_log_data = []
-                try:
-                    gamelog_response = playergamelog.PlayerGameLog(
-                        player_id=str(player_id),
-                        season=SEASON
-                    )
-                    game_log_data = gamelog_response.get_normalized_dict()
-                    print(f"    ✓ {player_name} (with game log)")
-                except Exception as gl_error:
-                    print(f"    ⚠ {player_name} (no game log: {str(gl_error)})")
-                
-                # Save to individual player file
-                output = {
-                    "last_updated": datetime.now().isoformat(),
-                    "player_id": player_id,
-                    "player_name": player_name,
-                    "team_abbreviation": player.get('TEAM_ABBREVIATION', 'FA'),
-                    "season": SEASON,
-                    "data": career_data,
-                    "game_log": game_log_data
-                }
-                
-                safe_name = player_name.replace(' ', '_').replace('/', '_')
-                filename = os.path.join(player_stats_dir, f"{player_id}_{safe_name}.json")
-                with open(filename, 'w') as f:
-                    json.dump(output, f, indent=2)
-                
-                stats["successful_fetches"] += 1
-                time.sleep(RATE_LIMIT_DELAY)
-                
-            except Exception as e:
-                stats["failed_fetches"] += 1
-                print(f"    ✗ {player_name}: {str(e)}")
-                time.sleep(RATE_LIMIT_DELAY)
+        record("successful", TEAM_ENDPOINT, team_params(team))
+        print(f"    ✓ {team_name}")
+        return True
         
-        # Longer delay between batches
-        if batch_num < total_batches:
-            print(f"  Waiting {BATCH_DELAY}s before next batch...")
-            time.sleep(BATCH_DELAY)
+    except Exception as e:
+        record("failed", TEAM_ENDPOINT, team_params(team), e)
+        print(f"    ✗ {team_name}: {str(e)}")
+        return False
 
-def fetch_all_team_gamelogs():
+def fetch_all_team_gamelogs(team_last_game=None):
     """
     Fetch recent game logs for all teams.
+    
+    Args:
+        team_last_game (dict): Latest game date per team; when given, only teams
+            that played since their log was written are refetched
     """
     print("\n🏀 Fetching all team game logs...")
     
@@ -194,65 +361,145 @@ def fetch_all_team_gamelogs():
     print(f"  Found {len(all_teams)} teams")
     
     # Create directory for team game logs
-    team_logs_dir = os.path.join(OUTPUT_DIR, "team_gamelogs")
-    os.makedirs(team_logs_dir, exist_ok=True)
+    os.makedirs(os.path.join(OUTPUT_DIR, "team_gamelogs"), exist_ok=True)
     
-    # Process teams in batches
-    for batch_idx in range(0, len(all_teams), BATCH_SIZE):
-        batch = all_teams[batch_idx:batch_idx + BATCH_SIZE]
-        batch_num = (batch_idx // BATCH_SIZE) + 1
-        total_batches = (len(all_teams) + BATCH_SIZE - 1) // BATCH_SIZE
-        
-        print(f"  Batch {batch_num}/{total_batches}...")
-        
-        for team in batch:
-            try:
-                team_id = team['TEAM_ID']
-                team_name = team['TEAM_NAME']
-                
-                # Fetch team game log for current season
-                gamelog_response = teamgamelog.TeamGameLog(
-                    team_id=str(team_id),
-                    season=SEASON
-                )
-                gamelog_data = gamelog_response.get_normalized_dict()
-                
-                # Save to individual team file
-                output = {
-                    "last_updated": datetime.now().isoformat(),
-                    "team_id": team_id,
-                    "team_name": team_name,
-                    "season": SEASON,
-                    "data": gamelog_data
-                }
-                
-                safe_name = team_name.replace(' ', '_').replace('/', '_')
-                filename = os.path.join(team_logs_dir, f"{team_id}_{safe_name}.json")
-                with open(filename, 'w') as f:
-                    json.dump(output, f, indent=2)
-                
-                stats["successful_fetches"] += 1
-                print(f"    ✓ {team_name}")
-                time.sleep(RATE_LIMIT_DELAY)
-                
-            except Exception as e:
-                stats["failed_fetches"] += 1
-                print(f"    ✗ {team_name}: {str(e)}")
-                time.sleep(RATE_LIMIT_DELAY)
-        
-        # Longer delay between batches
-        if batch_num < total_batches:
-            print(f"  Waiting {BATCH_DELAY}s before next batch...")
-            time.sleep(BATCH_DELAY)
+    changed_teams = select_changed_teams(all_teams, team_last_game)
+    pending = [t for t in changed_teams if should_fetch(TEAM_ENDPOINT, team_params(t))]
+    print(f"  Refreshing {len(pending)} teams ({len(all_teams) - len(changed_teams)} unchanged, "
+          f"{len(changed_teams) - len(pending)} already done)")
+    
+    run_concurrent(pending, fetch_team_gamelog, max_workers=FETCH_WORKERS)
+
+def build_player_index():
+    """Write the player manifest so readers can find player files without globbing."""
+    print("\n🗂️  Building player manifest...")
+    
+    try:
+        build_player_manifest(
+            player_stats_dir=os.path.join(OUTPUT_DIR, "player_stats"),
+            output_file=os.path.join(OUTPUT_DIR, "player_manifest.json")
+        )
+    except Exception as e:
+        print(f"  ✗ Failed to build player manifest: {e}")
+
+def build_game_stores():
+    """
+    Consolidate the cached player and team game logs into the columnar game stores.
+    Readers load these single files instead of parsing every JSON file.
+    """
+    print("\n🗄️  Building columnar game stores...")
+    
+    try:
+        build_player_game_store(
+            player_stats_dir=os.path.join(OUTPUT_DIR, "player_stats"),
+            output_file=os.path.join(OUTPUT_DIR, "player_games.npz"),
+            players_file=os.path.join(OUTPUT_DIR, "players.json")
+        )
+        build_team_game_store(
+            team_logs_dir=os.path.join(OUTPUT_DIR, "team_gamelogs"),
+            output_file=os.path.join(OUTPUT_DIR, "team_games.npz"),
+            league_games_file=os.path.join(OUTPUT_DIR, "league_games.json")
+        )
+    except Exception as e:
+        print(f"  ✗ Failed to build game stores: {e}")
+
+def build_stats_database():
+    """Load the season into the embedded SQLite database for indexed ad-hoc queries."""
+    print("\n🗃️  Building stats database...")
+    
+    try:
+        database.build_database(OUTPUT_DIR)
+    except Exception as e:
+        print(f"  ✗ Failed to build stats database: {e}")
+
+def materialize_views():
+    """
+    Precompute the player, team offense and team defense views for every
+    player and team, so the app serves each tab with a keyed read.
+    """
+    print("\n🧮 Materializing stats views...")
+    
+    try:
+        # The views are computed from this run's generation, before it is published
+        with pinned(SEASON, OUTPUT_DIR):
+            materialize_all(SEASON, materialized_dir=os.path.join(OUTPUT_DIR, "materialized"))
+    except Exception as e:
+        print(f"  ✗ Failed to materialize stats views: {e}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fetch and cache NBA data for the stats app.")
+    parser.add_argument(
+        "--season",
+        default=CURRENT_SEASON,
+        help="Season to fetch, e.g. 2024-25 (default: %(default)s, or NBA_SEASON)"
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Refetch every player and team instead of only those whose team played since the last run"
+    )
+    parser.add_argument(
+        "--format",
+        choices=cache_format.available_formats(),
+        default=cache_format.CACHE_FORMAT,
+        help="Cache file format (default: %(default)s, or NBA_CACHE_FORMAT); readers detect it automatically"
+    )
+    parser.add_argument(
+        "--database",
+        action=argparse.BooleanOptionalAction,
+        default=database.USE_DATABASE,
+        help="Also build the embedded SQLite database (default: NBA_STATS_DATABASE)"
+    )
+    parser.add_argument(
+        "--flat",
+        action="store_true",
+        help="Leave the published snapshot directly in the season's directory instead of generations/<id>/ "
+             "(for a cache committed to git; not safe while the app is reading the cache)"
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run, skipping work items it already completed"
+    )
+    mode.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Only re-run the work items that failed in the last run"
+    )
+    return parser.parse_args()
 
 def main():
     """Main function - fetch all data."""
+    args = parse_args()
+    
+    global journal, CAREER_MAX_AGE_DAYS, SEASON, OUTPUT_DIR
+    SEASON = args.season
     
     print(f"\n{'='*70}")
     print(f"🏀 NBA COMPREHENSIVE DATA FETCHER - {SEASON} Season")
     print(f"{'='*70}\n")
     
+    # A cache from before season partitions moves into its season's directory first
+    moved = migrate_legacy_layout()
+    if moved:
+        print(f"✓ Moved {len(moved)} cache entries into their season partition")
+    
+    # Write into a new generation; an interrupted run's generation is picked up again
+    mode = "resume" if args.resume else "retry-failed" if args.retry_failed else "normal"
+    generation, OUTPUT_DIR = stage_generation(SEASON, resume=mode != "normal")
+    print(f"✓ Generation {generation}")
+    
     create_output_dir()
+    cache_format.CACHE_FORMAT = args.format
+    print(f"✓ Cache format: {args.format}")
+    
+    if args.full:
+        CAREER_MAX_AGE_DAYS = 0
+    split_legacy_files = not os.path.isdir(CAREER_DIR)
+    journal = FetchJournal(os.path.join(partition_dir(SEASON), JOURNAL_FILE), mode=mode)
+    if mode != "normal":
+        print(f"↷ {mode}: {len(journal.completed)} completed, {len(journal.failed)} failed in the journal")
     
     # Fetch base data (fast)
     print("\n📋 Fetching base data...")
@@ -275,16 +522,56 @@ def main():
         season=SEASON
     )
     
-    # Fetch comprehensive data (slower, batch processing)
-    fetch_all_player_stats()
-    fetch_all_team_gamelogs()
+    # League-wide regular season game table - the team tabs slice this locally
+    league_games_fetched = fetch_and_save(
+        leaguegamefinder.LeagueGameFinder,
+        "league_games.json",
+        season_nullable=SEASON,
+        season_type_nullable='Regular Season',
+        league_id_nullable='00'
+    )
+    
+    # Only refetch players/teams whose team played since their cache was written
+    team_last_game = None
+    if not args.full and not args.retry_failed and league_games_fetched:
+        team_last_game = load_team_last_game_dates()
+    
+    # Fetch comprehensive data (slower, concurrent)
+    fetch_all_player_stats(team_last_game)
+    fetch_all_team_gamelogs(team_last_game)
+    
+    # First run with the career archive: move history out of the older player files
+    if split_legacy_files:
+        print("\n📦 Splitting career history out of existing player files...")
+        split_player_files(os.path.join(OUTPUT_DIR, "player_stats"), CAREER_DIR)
+    
+    # Index and consolidate the cache for fast reads
+    build_player_index()
+    build_game_stores()
+    if args.database:
+        build_stats_database()
+    materialize_views()
+    
+    # Readers switch to the new generation in one atomic step
+    pruned = publish_generation(SEASON, generation)
+    print(f"\n✓ Published generation {generation}" + (f" (removed {', '.join(pruned)})" if pruned else ""))
+    
+    # One copy at stable paths for git instead of a new generation tree per run
+    if args.flat:
+        flatten_partition(SEASON)
+        print(f"✓ Flattened generation {generation} into {partition_dir(SEASON)}")
+    
+    journal.finish()
     
     # Print summary
     elapsed = datetime.now() - stats["start_time"]
     print(f"\n{'='*70}")
     print(f"✓ FETCH COMPLETE")
     print(f"{'='*70}")
-    print(f"  Total API calls: {stats['total_fetches']}")
+    requests = request_stats()
+    print(f"  HTTP requests: {requests['requests']} ({requests['throttled']} throttled, "
+          f"{requests['retries']} retried)")
+    print(f"  Work items: {stats['total_fetches']}")
     print(f"  Successful: {stats['successful_fetches']}")
     print(f"  Failed: {stats['failed_fetches']}")
     print(f"  Time elapsed: {elapsed.total_seconds():.1f}s")
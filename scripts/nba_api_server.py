@@ -0,0 +1,336 @@
+"""
+Local stand-in for stats.nba.com - replays nba_api responses offline
+
+Serves the endpoints the fetcher and the live stats paths call
+(LeagueDashTeamStats, CommonAllPlayers, LeagueStandingsV3, PlayerCareerStats,
+PlayerGameLog, TeamGameLog, LeagueGameFinder) with injectable latency,
+server errors, 429s and dropped connections. Point nba_api at it with
+NBA_API_BASE_URL (see data/transport.py).
+
+Each request is answered from the first source that has it:
+1. a recorded fixture for the exact endpoint and parameters (FIXTURES_DIR/<endpoint>/<key>.json),
+2. with --cache-dir, a cached_data tree (a real one or one from benchmarks/synthetic_league.py),
+3. with --record, stats.nba.com itself - the response is saved as a fixture,
+4. otherwise the endpoint's result sets with no rows.
+
+Fault injection happens before the lookup, so recorded and generated
+responses are throttled alike. GET /__stats__ returns the request counters.
+
+Usage:
+    python scripts/nba_api_server.py --cache-dir /tmp/league --latency 0.2 --throttle-rate 0.05
+    NBA_API_BASE_URL=http://127.0.0.1:8765 python scripts/fetch_nba_data.py --full
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+# Allow `python scripts/nba_api_server.py` to import the project's data package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data import cache_format
+from data.seasons import CURRENT_SEASON, season_dir
+from data.transport import STATS_BASE_URL
+
+import nba_api.stats.endpoints as nba_endpoints
+import nba_api.stats.library.http as nba_http
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "nba_api")
+DEFAULT_PORT = 8765
+
+# Endpoint (as in the request path) -> nba_api endpoint class
+ENDPOINTS = {
+    "leaguedashteamstats": nba_endpoints.leaguedashteamstats.LeagueDashTeamStats,
+    "commonallplayers": nba_endpoints.commonallplayers.CommonAllPlayers,
+    "leaguestandingsv3": nba_endpoints.leaguestandingsv3.LeagueStandingsV3,
+    "playercareerstats": nba_endpoints.playercareerstats.PlayerCareerStats,
+    "playergamelog": nba_endpoints.playergamelog.PlayerGameLog,
+    "teamgamelog": nba_endpoints.teamgamelog.TeamGameLog,
+    "leaguegamefinder": nba_endpoints.leaguegamefinder.LeagueGameFinder
+}
+
+
+def fixture_key(params):
+    """Stable key for a request's parameters (order and empty values don't matter)."""
+    canonical = json.dumps(sorted((k, v) for k, v in params.items() if v not in ("", None)))
+    return hashlib.sha1(canonical.encode()).hexdigest()[:16]
+
+
+def fixture_file(endpoint, params, fixtures_dir=FIXTURES_DIR):
+    return os.path.join(fixtures_dir, endpoint, f"{fixture_key(params)}.json")
+
+
+def load_fixture(endpoint, params, fixtures_dir=FIXTURES_DIR):
+    """Recorded (status, body bytes) for a request, or None."""
+    try:
+        with open(fixture_file(endpoint, params, fixtures_dir), 'r') as f:
+            fixture = json.load(f)
+    except FileNotFoundError:
+        return None
+    return fixture["status"], json.dumps(fixture["body"]).encode()
+
+
+def save_fixture(endpoint, params, status, body, fixtures_dir=FIXTURES_DIR):
+    path = fixture_file(endpoint, params, fixtures_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_file = path + ".tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump({"endpoint": endpoint, "params": params, "status": status, "body": body}, f)
+    os.replace(tmp_file, path)
+
+
+def result_sets_body(endpoint, normalized):
+    """
+    Build a stats.nba.com response body from a normalized dict (result set name -> row dicts).
+
+    Headers come from the endpoint's expected_data, so nba_api parses the
+    body exactly like a live response.
+    """
+    sets = []
+    for name, headers in ENDPOINTS[endpoint].expected_data.items():
+        rows = normalized.get(name) or []
+        sets.append({"name": name, "headers": headers, "rowSet": [[row.get(h) for h in headers] for row in rows]})
+    return {"resource": endpoint, "parameters": {}, "resultSets": sets}
+
+
+class CacheResponder:
+    """Answers requests from a cached_data tree written by the fetcher (or the synthetic league)."""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def _season_dir(self, params):
+        """The requested season's published data; the tree itself for a pre-partitioning cache."""
+        season = params.get("Season") or params.get("SeasonNullable") or CURRENT_SEASON
+        directory = season_dir(season, self.cache_dir)
+        return directory if os.path.isdir(directory) else self.cache_dir
+
+    def _load(self, directory, *parts):
+        path = os.path.join(directory, *parts)
+        if cache_format.resolve(path) is None:
+            return None
+        return cache_format.load(path)
+
+    def _load_by_id(self, directory, subdir, entity_id):
+        """The `<id>_<name>` cache file of a player or team."""
+        files = cache_format.glob_cache(os.path.join(directory, subdir, f"{entity_id}_*"))
+        return cache_format.load(files[0]) if files else None
+
+    def normalized(self, endpoint, params):
+        """Normalized dict for a request, or None if the tree doesn't have it."""
+        directory = self._season_dir(params)
+        if endpoint in ("leaguedashteamstats", "commonallplayers", "leaguestandingsv3", "leaguegamefinder"):
+            filename = {
+                "leaguedashteamstats": "teams.json",
+                "commonallplayers": "players.json",
+                "leaguestandingsv3": "standings.json",
+                "leaguegamefinder": "league_games.json"
+            }[endpoint]
+            cached = self._load(directory, filename)
+            if cached and endpoint == "leaguegamefinder" and params.get("TeamID"):
+                # The live paths ask for one team's games
+                team_id = int(params["TeamID"])
+                rows = cached["data"].get("LeagueGameFinderResults", [])
+                return {"LeagueGameFinderResults": [row for row in rows if row.get("TEAM_ID") == team_id]}
+            return cached.get("data") if cached else None
+
+        if endpoint == "playercareerstats":
+            # The career archive spans seasons and lives in the tree itself
+            career = self._load(self.cache_dir, "player_careers", f"{params.get('PlayerID')}.json")
+            if career:
+                return career.get("data")
+            # Trees without the career archive still have the current season rows
+            cached = self._load_by_id(directory, "player_stats", params.get("PlayerID"))
+            return cached.get("data") if cached else None
+
+        if endpoint == "playergamelog":
+            cached = self._load_by_id(directory, "player_stats", params.get("PlayerID"))
+            return (cached.get("game_log") or {}) if cached else None
+
+        if endpoint == "teamgamelog":
+            cached = self._load_by_id(directory, "team_gamelogs", params.get("TeamID"))
+            return cached.get("data") if cached else None
+
+        return None
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    HTTP server holding the stand-in's configuration and counters.
+
+    Args:
+        address (tuple): (host, port); port 0 picks a free port
+        fixtures_dir (str): Recorded fixtures to replay
+        cache_dir (str): cached_data tree to answer from when there is no fixture
+        record (bool): Fetch unknown requests from stats.nba.com and save them as fixtures
+        latency (float): Seconds added to every response
+        jitter (float): Up to this many extra seconds, uniformly random
+        error_rate (float): Fraction of requests answered with HTTP 500
+        throttle_rate (float): Fraction of requests answered with HTTP 429
+        drop_rate (float): Fraction of requests whose connection is closed without a response
+        seed (int): Seed for the fault injection
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, fixtures_dir=FIXTURES_DIR, cache_dir=None, record=False, latency=0.0,
+                 jitter=0.0, error_rate=0.0, throttle_rate=0.0, drop_rate=0.0, seed=None):
+        super().__init__(address, StandInHandler)
+        self.fixtures_dir = fixtures_dir
+        self.cache = CacheResponder(cache_dir) if cache_dir else None
+        self.record = record
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.drop_rate = drop_rate
+        self.random = random.Random(seed)
+        self.counters = {"requests": 0, "fixture": 0, "cache": 0, "recorded": 0, "empty": 0,
+                         "throttled": 0, "errors": 0, "dropped": 0}
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def fault(self):
+        """'drop', 'throttle', 'error' or None for the next request."""
+        with self.lock:
+            roll = self.random.random()
+            delay = self.latency + self.random.uniform(0, self.jitter)
+        time.sleep(delay)
+        for fault, rate in (("drop", self.drop_rate), ("throttle", self.throttle_rate), ("error", self.error_rate)):
+            if roll < rate:
+                return fault
+            roll -= rate
+        return None
+
+    def respond(self, endpoint, params):
+        """(status, body bytes, source) for a request that wasn't faulted."""
+        found = load_fixture(endpoint, params, self.fixtures_dir)
+        if found is not None:
+            return found + ("fixture",)
+
+        if self.cache is not None:
+            normalized = self.cache.normalized(endpoint, params)
+            if normalized is not None:
+                return 200, json.dumps(result_sets_body(endpoint, normalized)).encode(), "cache"
+
+        if self.record:
+            response = nba_http.NBAStatsHTTP().get_session().get(
+                f"{STATS_BASE_URL}/stats/{endpoint}", params=params, headers=nba_http.STATS_HEADERS, timeout=60
+            )
+            if response.status_code == 200:
+                save_fixture(endpoint, params, 200, response.json(), self.fixtures_dir)
+            return response.status_code, response.content, "recorded"
+
+        return 200, json.dumps(result_sets_body(endpoint, {})).encode(), "empty"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        endpoint = url.path.rstrip('/').split('/')[-1].lower()
+
+        if endpoint == "__stats__":
+            with self.server.lock:
+                self._send(200, json.dumps(self.server.counters).encode())
+            return
+
+        if endpoint not in ENDPOINTS:
+            self._send(404, json.dumps({"Message": f"Unknown endpoint {endpoint}"}).encode())
+            return
+
+        self.server.count("requests")
+        fault = self.server.fault()
+        if fault == "drop":
+            self.server.count("dropped")
+            self.close_connection = True
+            return
+        if fault == "throttle":
+            self.server.count("throttled")
+            self._send(429, b'{"Message": "Too Many Requests"}', {"Retry-After": "1"})
+            return
+        if fault == "error":
+            self.server.count("errors")
+            self._send(500, b'{"Message":"An error has occurred."}')
+            return
+
+        try:
+            status, body, source = self.server.respond(endpoint, dict(parse_qsl(url.query, keep_blank_values=True)))
+        except Exception as e:
+            self.server.count("errors")
+            self._send(502, json.dumps({"Message": str(e)}).encode())
+            return
+        self.server.count(source)
+        self._send(status, body)
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_in_background(host="127.0.0.1", port=0, **options):
+    """
+    Start a stand-in server on a daemon thread.
+
+    Returns:
+        StandInServer: Call .shutdown() when done; .base_url is the NBA_API_BASE_URL value
+    """
+    server = StandInServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Recorded fixtures directory")
+    parser.add_argument("--cache-dir", help="Answer from this cached_data tree when there is no fixture")
+    parser.add_argument("--record", action="store_true", help="Fetch unknown requests from stats.nba.com and save them")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many extra seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fraction of connections closed without a response")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    server = StandInServer(
+        (args.host, args.port), fixtures_dir=args.fixtures, cache_dir=args.cache_dir, record=args.record,
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate, drop_rate=args.drop_rate, seed=args.seed
+    )
+    print(f"✓ nba_api stand-in on {server.base_url} (NBA_API_BASE_URL={server.base_url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"  {server.counters}")
+
+
+if __name__ == "__main__":
+    main()
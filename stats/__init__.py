@@ -3,13 +3,17 @@
 
 from .player_stats import get_player_stats
 from .team_offense import get_team_offense_stats
-from .team_defense import get_team_defense_stats
-from .league_leaders import get_top_30_by_category
+from .team_defense import get_team_defense_stats, get_opponent_table
+from .league_leaders import get_top_30_by_category, query_leaderboard, query_period_leaders
 
 
 __all__ = [           # ← THIS IS THE __all__ LIST (starts here)
     'get_player_stats',
     'get_team_offense_stats',
-    'get_team_defense_stats'
+    'get_team_defense_stats',
+    'get_opponent_table',
+    'get_top_30_by_category',
+    'query_leaderboard',
+    'query_period_leaders'
 ]                     # ← ends here
 
@@ -0,0 +1,163 @@
+"""Recent form engine - vectorized windowed means over stacked game logs
+
+A window is the last N played games, averaged either with the k highest and
+lowest games trimmed or with exponential weights favouring the latest games.
+Stack once with the largest window and any smaller window is a slice of it.
+"""
+
+import numpy as np
+
+DEFAULT_WINDOW = 7
+DEFAULT_TRIM = 1
+DEFAULT_HALFLIFE = 3
+WINDOW_OPTIONS = [5, 7, 10, 15]
+
+
+def stack_recent_games(store, columns, n=7, season_id=None):
+    """
+    Stack every player's last N played games into one array.
+
+    Args:
+        store (dict): Player-game store from data.game_store.load_player_games
+        columns (list): Stat columns to stack
+        n (int): Number of most recent played games per player
+        season_id (int): Only use games from this season (all seasons when None)
+
+    Returns:
+        tuple: (stack, counts) where stack is (players x n x stats) padded with NaN
+               and counts is the number of real games per player
+    """
+    num_players = len(store['PLAYERS_ID'])
+    row_player = np.repeat(np.arange(num_players), store['PLAYERS_COUNT'])
+
+    # Games the player actually played (NaN minutes compare False)
+    mask = store['MIN'] > 0
+    if season_id is not None:
+        mask &= store['SEASON_ID'] == season_id
+    rows = np.flatnonzero(mask)
+    players = row_player[rows]
+
+    # Rank of each game within its player (rows are grouped by player, most recent first)
+    group_start = np.r_[True, players[1:] != players[:-1]] if len(rows) else np.zeros(0, dtype=bool)
+    starts = np.flatnonzero(group_start)
+    rank = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+
+    keep = rank < n
+    rows, players, rank = rows[keep], players[keep], rank[keep]
+
+    stack = np.full((num_players, n, len(columns)), np.nan)
+    for s, col in enumerate(columns):
+        # A missing stat in a played game counts as 0 so it sorts like the other values
+        stack[players, rank, s] = np.nan_to_num(store[col][rows])
+
+    counts = np.bincount(players, minlength=num_players)
+    return stack, counts
+
+
+def stack_frame(frame, columns, n=DEFAULT_WINDOW):
+    """
+    Stack the first n rows of one game log (most recent first) like stack_recent_games.
+
+    Returns:
+        tuple: (stack, counts) for a single player or team
+    """
+    values = np.nan_to_num(frame[columns].head(n).to_numpy(dtype=float))
+    stack = np.full((1, n, len(columns)), np.nan)
+    stack[0, :len(values)] = values
+    return stack, np.array([len(values)])
+
+
+def trimmed_means(stack, counts, trim=1):
+    """
+    Trimmed mean of every player and every stat in one pass.
+
+    Removes the `trim` highest and lowest games when a player has at least
+    2 * trim + 1 games, otherwise averages all of them (0 for no games).
+
+    Args:
+        stack (ndarray): (players x games x stats) array, NaN padded after each player's games
+        counts (ndarray): Number of real games per player
+        trim (int): Games to drop from each end
+
+    Returns:
+        ndarray: (players x stats) trimmed means
+    """
+    # NaN padding sorts to the end of the game axis
+    sorted_stack = np.sort(stack, axis=1)
+
+    counts = np.asarray(counts)
+    can_trim = counts >= 2 * trim + 1
+    lo = np.where(can_trim, trim, 0)
+    hi = np.where(can_trim, counts - trim, counts)
+
+    positions = np.arange(stack.shape[1])[None, :]
+    window = (positions >= lo[:, None]) & (positions < hi[:, None])
+
+    totals = np.where(window[:, :, None], sorted_stack, 0).sum(axis=1)
+    sizes = np.maximum(hi - lo, 1)[:, None]
+    return np.where((hi > lo)[:, None], totals / sizes, 0.0)
+
+
+def ewm_means(stack, counts, halflife=DEFAULT_HALFLIFE):
+    """
+    Exponentially weighted mean of every player and stat; the game j games back
+    weighs 0.5 ** (j / halflife) relative to the latest one (0 for no games).
+    """
+    counts = np.asarray(counts)
+    weights = 0.5 ** (np.arange(stack.shape[1]) / halflife)
+    weights = np.where(np.arange(stack.shape[1])[None, :] < counts[:, None], weights[None, :], 0.0)
+
+    totals = (np.nan_to_num(stack) * weights[:, :, None]).sum(axis=1)
+    sizes = weights.sum(axis=1)[:, None]
+    return np.where(sizes > 0, totals / np.where(sizes > 0, sizes, 1), 0.0)
+
+
+def window_stats(stack, counts, n=None, trim=DEFAULT_TRIM, halflife=None, trim_columns=None):
+    """
+    Windowed means of every player and stat in one pass.
+
+    Args:
+        stack (ndarray): (players x games x stats) array from stack_recent_games/stack_frame
+        counts (ndarray): Number of real games per player
+        n (int): Only use each player's latest n games (the whole stack when None)
+        trim (int): Games to drop from each end (flat windows only)
+        halflife (float): Exponentially weighted window instead of a trimmed one
+        trim_columns (list): Indices of the stats that are trimmed; the others get a
+            plain mean (all stats are trimmed when None)
+
+    Returns:
+        ndarray: (players x stats) window means
+    """
+    counts = np.asarray(counts)
+    if n is not None:
+        stack = stack[:, :n]
+        counts = np.minimum(counts, n)
+
+    if halflife is not None:
+        return ewm_means(stack, counts, halflife)
+
+    means = trimmed_means(stack, counts, trim)
+    if trim_columns is not None:
+        trimmed = np.zeros(stack.shape[2], dtype=bool)
+        trimmed[trim_columns] = True
+        means = np.where(trimmed[None, :], means, trimmed_means(stack, counts, 0))
+    return means
+
+
+def describe_window(window=DEFAULT_WINDOW, trim=DEFAULT_TRIM, halflife=None):
+    """Short description of a window spec for the UI."""
+    if halflife is not None:
+        return f"last {window} games, exponentially weighted with a {halflife:g}-game half-life"
+    if trim == 0:
+        return f"last {window} games"
+    return f"last {window} games without the {trim} highest and {trim} lowest"
+
+
+def top_k_indices(values, k):
+    """Indices of the k largest values, largest first, using argpartition."""
+    values = np.asarray(values)
+    k = min(k, len(values))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    top = np.argpartition(-values, k - 1)[:k]
+    return top[np.argsort(-values[top], kind='stable')]
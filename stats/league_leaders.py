@@ -1,31 +1,58 @@
-"""League leaders module - top 30 based on last 7 games from cached data"""
+"""League leaders module - top-K players by recent form from cached data
 
-import json
+Every player's recent form is computed once per season, data generation and
+window spec into a table of per-player arrays (get_form_table). Leaderboards are then
+index queries on that table: a boolean mask for the filters and argpartition
+for the top K, so any category, K or filter costs well under a millisecond.
+
+Leaders over arbitrary date ranges (query_period_leaders) are a single SQL
+query on the embedded database (data.database) when it is enabled.
+"""
+
+from collections import OrderedDict
 import os
-import glob
+import threading
+
 import pandas as pd
 import numpy as np
 
-CACHE_DIR = "cached_data/player_stats"
+from data import cache_format, database
+from data.loader import get_data_generation
+from data.game_store import load_player_games, season_to_id
+from data.manifest import active_player_files
+from data.seasons import CURRENT_SEASON, season_dir, season_path
+from . import single_flight
+from .form_engine import (
+    DEFAULT_TRIM, DEFAULT_WINDOW, stack_frame, stack_recent_games, top_k_indices, window_stats
+)
+
+# Inside each season's directory
+CACHE_DIR = "player_stats"
 
-def calculate_trimmed_mean(values):
-    """Remove highest and lowest value, return average of remaining values."""
-    if len(values) < 3:
-        return np.mean(values) if values else 0
-    sorted_vals = sorted(values)
-    trimmed = sorted_vals[1:-1]
-    return np.mean(trimmed) if trimmed else 0
+FORM_COLUMNS = ['PTS', 'REB', 'AST', 'STL', 'BLK', 'TOV', 'FG3M', 'FG_PCT', 'FT_PCT', 'MIN']
 
-def get_player_last_7_from_cache(cache_file):
+# Games in the window a player needs to be ranked by default
+MIN_GAMES = 3
+
+# Leaderboard name -> (ranking stat, displayed columns)
+LEADERBOARDS = {
+    'Points Per Game': ('PTS', ['PLAYER', 'TEAM', 'GP', 'PTS', 'FG_PCT', 'FG3M']),
+    'Rebounds Per Game': ('REB', ['PLAYER', 'TEAM', 'GP', 'REB', 'MIN']),
+    'Assists Per Game': ('AST', ['PLAYER', 'TEAM', 'GP', 'AST', 'MIN']),
+    '3-Pointers Made': ('FG3M', ['PLAYER', 'TEAM', 'GP', 'FG3M', 'PTS']),
+    'Steals Per Game': ('STL', ['PLAYER', 'TEAM', 'GP', 'STL', 'MIN']),
+    'Blocks Per Game': ('BLK', ['PLAYER', 'TEAM', 'GP', 'BLK', 'MIN'])
+}
+
+def get_player_last_7_from_cache(cache_file, window=DEFAULT_WINDOW, trim=DEFAULT_TRIM, halflife=None):
     """
-    Get a player's last 7 games stats from cached file.
+    Get a player's recent form stats (last `window` games) from cached file.
     
     Returns:
-        dict: Player's recent form stats or None if not enough games
+        dict: Player's recent form stats or None if the player has no games
     """
     try:
-        with open(cache_file, 'r') as f:
-            cached = json.load(f)
+        cached = cache_format.load(cache_file)
         
         player_name = cached['player_name']
         team_abbr = cached.get('team_abbreviation', 'FA')
@@ -34,7 +61,7 @@ def get_player_last_7_from_cache(cache_file):
         game_log_data = cached.get('game_log', {})
         game_log = game_log_data.get('PlayerGameLog', [])
         
-        if not game_log or len(game_log) < 3:
+        if not game_log:
             return None
         
         # Convert to DataFrame
@@ -43,43 +70,49 @@ def get_player_last_7_from_cache(cache_file):
         # Filter to games where player actually played
         games_played = games_df[games_df['MIN'].notna() & (games_df['MIN'] > 0)]
         
-        if len(games_played) < 3:
+        if len(games_played) == 0:
             return None
         
-        # Get last 7 games
-        last_7 = games_played.head(7)
+        # Window stats over the last `window` games
+        stack, counts = stack_frame(games_played, FORM_COLUMNS, window)
+        form = window_stats(stack, counts, trim=trim, halflife=halflife)[0]
         
-        # Calculate trimmed stats
-        return {
-            'PLAYER': player_name,
-            'TEAM': team_abbr,
-            'GP': len(last_7),
-            'PTS': calculate_trimmed_mean(last_7['PTS'].tolist()),
-            'REB': calculate_trimmed_mean(last_7['REB'].tolist()),
-            'AST': calculate_trimmed_mean(last_7['AST'].tolist()),
-            'STL': calculate_trimmed_mean(last_7['STL'].tolist()),
-            'BLK': calculate_trimmed_mean(last_7['BLK'].tolist()),
-            'FG3M': calculate_trimmed_mean(last_7['FG3M'].tolist()),
-            'FG_PCT': calculate_trimmed_mean(last_7['FG_PCT'].tolist()),
-            'MIN': calculate_trimmed_mean(last_7['MIN'].tolist())
-        }
+        stats = {'PLAYER_ID': int(cached['player_id']), 'PLAYER': player_name, 'TEAM': team_abbr, 'GP': int(counts[0])}
+        stats.update(zip(FORM_COLUMNS, form))
+        return stats
         
     except Exception as e:
         print(f"Error reading cache file {cache_file}: {e}")
         return None
 
-def get_top_30_by_category():
+def get_recent_stats_from_store(store, season_id=None, window=DEFAULT_WINDOW, trim=DEFAULT_TRIM, halflife=None,
+                                min_games=MIN_GAMES):
     """
-    Calculate top 30 players in each category based on last 7 games from cached data.
+    Get every player's recent form stats from the columnar game store in one vectorized pass.
     
     Returns:
-        dict: Dictionary with top 30 dataframes for each category
+        dict: Column name -> numpy array, one entry per player with at least min_games recent games
     """
-    print("Reading cached player stats...")
+    stack, counts = stack_recent_games(store, FORM_COLUMNS, n=window, season_id=season_id)
+    means = window_stats(stack, counts, trim=trim, halflife=halflife)
     
-    # Get all cached player files
-    cache_pattern = os.path.join(CACHE_DIR, "*.json")
-    cache_files = glob.glob(cache_pattern)
+    eligible = counts >= max(min_games, 1)
+    table = {
+        'PLAYER_ID': store['PLAYERS_ID'][eligible],
+        'PLAYER': store['PLAYERS_NAME'][eligible],
+        'TEAM': store['PLAYERS_TEAM'][eligible],
+        'GP': counts[eligible]
+    }
+    for s, col in enumerate(FORM_COLUMNS):
+        table[col] = means[eligible, s]
+    return table
+
+def get_recent_stats_from_files(season=None, window=DEFAULT_WINDOW, trim=DEFAULT_TRIM, halflife=None):
+    """Get every player's recent form stats by parsing each of a season's cached player files."""
+    # Only players the manifest says have games; scan the directory without one
+    cache_files = active_player_files(season)
+    if cache_files is None:
+        cache_files = cache_format.glob_cache(os.path.join(season_path(season, CACHE_DIR), "*"))
     
     print(f"Found {len(cache_files)} cached player files")
     
@@ -87,7 +120,7 @@ def get_top_30_by_category():
     
     # Process each cached file
     for i, cache_file in enumerate(cache_files):
-        stats = get_player_last_7_from_cache(cache_file)
+        stats = get_player_last_7_from_cache(cache_file, window, trim, halflife)
         
         if stats:
             recent_stats.append(stats)
@@ -95,64 +128,219 @@ def get_top_30_by_category():
         if (i + 1) % 100 == 0:
             print(f"Processed {i + 1}/{len(cache_files)} files...")
     
-    print(f"Successfully processed {len(recent_stats)} players with recent games")
+    return recent_stats
+
+def build_form_table(season=None, window=DEFAULT_WINDOW, trim=DEFAULT_TRIM, halflife=None):
+    """
+    Compute every player's recent form in a season (the current one when None) into per-player arrays.
+    
+    Returns:
+        dict: Column name -> numpy array (PLAYER_ID, PLAYER, TEAM, GP and FORM_COLUMNS),
+              one entry per player with at least one game in the window
+    """
+    print("Reading cached player stats...")
+    
+    # One read of the columnar store; fall back to the per-player files if it hasn't been built
+    store = load_player_games(season)
+    if store is not None:
+        # Only the requested season's games, even when the store holds earlier ones
+        season_id = season_to_id(season or CURRENT_SEASON)
+        return get_recent_stats_from_store(store, season_id, window, trim, halflife, min_games=1)
+    
+    print("Game store not found, reading individual player files")
+    recent_stats = get_recent_stats_from_files(season, window, trim, halflife)
+    return {
+        col: np.array([stats[col] for stats in recent_stats])
+        for col in ['PLAYER_ID', 'PLAYER', 'TEAM', 'GP'] + FORM_COLUMNS
+    }
+
+# Form tables by (data generation, season, window spec), least recently used first
+FORM_TABLE_CACHE_SIZE = 8
+_form_tables = OrderedDict()
+_form_tables_lock = threading.Lock()
+
+def get_form_table(season=None, window=DEFAULT_WINDOW, trim=DEFAULT_TRIM, halflife=None):
+    """
+    build_form_table, computed once per season, data generation and window spec.
+    
+    The returned arrays are shared between callers and must not be modified.
+    """
+    key = (get_data_generation(season_dir(season)), season, window, trim, halflife)
+    with _form_tables_lock:
+        table = _form_tables.get(key)
+        if table is not None:
+            _form_tables.move_to_end(key)
+            return table
+    
+    # Concurrent misses for the same table build it once
+    table = single_flight.do(('form_table',) + key, build_form_table, season, window, trim, halflife)
+    with _form_tables_lock:
+        _form_tables[key] = table
+        while len(_form_tables) > FORM_TABLE_CACHE_SIZE:
+            _form_tables.popitem(last=False)
+    return table
+
+def clear_form_tables():
+    """Drop every memoized form table."""
+    with _form_tables_lock:
+        _form_tables.clear()
+
+def rank_table(table, stat, k=30, columns=None, team=None, min_games=MIN_GAMES, min_minutes=0):
+    """
+    Top-k rows of a form table by one stat after filtering.
+    
+    Args:
+        table (dict): Form table from get_form_table
+        stat (str): Column to rank by, highest first
+        k (int): Number of players to return
+        columns (list): Displayed columns (PLAYER, TEAM, GP, stat and MIN when None)
+        team (str or list): Only players on these team abbreviations
+        min_games (int): Minimum games played in the window
+        min_minutes (float): Minimum minutes per game in the window
+    
+    Returns:
+        DataFrame: RANK followed by the displayed columns, numeric columns rounded to 1 decimal
+    """
+    if columns is None:
+        columns = ['PLAYER', 'TEAM', 'GP', stat] + (['MIN'] if stat != 'MIN' else [])
+    
+    mask = table['GP'] >= min_games
+    if min_minutes:
+        mask &= table['MIN'] >= min_minutes
+    if team is not None:
+        teams = [team] if isinstance(team, str) else list(team)
+        mask &= np.isin(table['TEAM'], teams)
+    
+    rows = np.flatnonzero(mask)
+    top = rows[top_k_indices(table[stat][rows], k)]
+    
+    # Only the k selected rows become a DataFrame, with float columns rounded to 1 decimal first
+    board = {'RANK': np.arange(1, len(top) + 1)}
+    for col in columns:
+        values = table[col][top]
+        board[col] = values.round(1) if values.dtype.kind == 'f' else values
+    return pd.DataFrame(board, copy=False)
+
+def query_leaderboard(category, k=30, team=None, min_games=MIN_GAMES, min_minutes=0, season=None,
+                      window=DEFAULT_WINDOW, trim=DEFAULT_TRIM, halflife=None):
+    """
+    Top-k players in any category by recent form, with optional filters.
+    
+    Args:
+        category (str): A LEADERBOARDS name (e.g. 'Points Per Game') or a FORM_COLUMNS stat (e.g. 'TOV')
+        k (int): Number of players to return
+        team (str or list): Only players on these team abbreviations
+        min_games (int): Minimum games played in the window
+        min_minutes (float): Minimum minutes per game in the window
+        season (str): Season to rank (e.g. "2025-26"); the current season when None
+        window (int): Number of recent games in the form window
+        trim (int): Highest and lowest games dropped from the window
+        halflife (float): Exponentially weighted window instead of a trimmed one
+    
+    Returns:
+        DataFrame: Ranked leaderboard (empty when no player passes the filters)
+    """
+    if category in LEADERBOARDS:
+        stat, columns = LEADERBOARDS[category]
+    elif category in FORM_COLUMNS:
+        stat, columns = category, None
+    else:
+        raise ValueError(f"Unknown leaderboard category: {category}")
+    
+    table = get_form_table(season, window, trim, halflife)
+    return rank_table(table, stat, k, columns, team=team, min_games=min_games, min_minutes=min_minutes)
+
+def get_top_30_by_category(season=None, window=DEFAULT_WINDOW, trim=DEFAULT_TRIM, halflife=None):
+    """
+    Calculate top 30 players in each category based on recent form from cached data.
+    
+    Args:
+        season (str): Season to rank (e.g. "2025-26"); the current season when None
+        window (int): Number of recent games in the form window
+        trim (int): Highest and lowest games dropped from the window
+        halflife (float): Exponentially weighted window instead of a trimmed one
+    
+    Returns:
+        dict: Dictionary with top 30 dataframes for each category
+    """
+    table = get_form_table(season, window, trim, halflife)
+    
+    num_players = int(np.count_nonzero(table['GP'] >= MIN_GAMES))
+    print(f"Successfully processed {num_players} players with recent games")
     
-    if len(recent_stats) == 0:
+    if num_players == 0:
         print("No player stats found!")
         return {}
     
-    # Convert to DataFrame
-    df = pd.DataFrame(recent_stats)
-    
-    # Create leaderboards for each category
-    leaderboards = {}
-    
-    # Points Per Game
-    leaderboards['Points Per Game'] = (
-        df.nlargest(30, 'PTS')[['PLAYER', 'TEAM', 'GP', 'PTS', 'FG_PCT', 'FG3M']]
-        .reset_index(drop=True)
-    )
-    leaderboards['Points Per Game'].insert(0, 'RANK', range(1, len(leaderboards['Points Per Game']) + 1))
-    
-    # Rebounds Per Game
-    leaderboards['Rebounds Per Game'] = (
-        df.nlargest(30, 'REB')[['PLAYER', 'TEAM', 'GP', 'REB', 'MIN']]
-        .reset_index(drop=True)
-    )
-    leaderboards['Rebounds Per Game'].insert(0, 'RANK', range(1, len(leaderboards['Rebounds Per Game']) + 1))
-    
-    # Assists Per Game
-    leaderboards['Assists Per Game'] = (
-        df.nlargest(30, 'AST')[['PLAYER', 'TEAM', 'GP', 'AST', 'MIN']]
-        .reset_index(drop=True)
-    )
-    leaderboards['Assists Per Game'].insert(0, 'RANK', range(1, len(leaderboards['Assists Per Game']) + 1))
-    
-    # 3-Pointers Made
-    leaderboards['3-Pointers Made'] = (
-        df.nlargest(30, 'FG3M')[['PLAYER', 'TEAM', 'GP', 'FG3M', 'PTS']]
-        .reset_index(drop=True)
-    )
-    leaderboards['3-Pointers Made'].insert(0, 'RANK', range(1, len(leaderboards['3-Pointers Made']) + 1))
-    
-    # Steals Per Game
-    leaderboards['Steals Per Game'] = (
-        df.nlargest(30, 'STL')[['PLAYER', 'TEAM', 'GP', 'STL', 'MIN']]
-        .reset_index(drop=True)
-    )
-    leaderboards['Steals Per Game'].insert(0, 'RANK', range(1, len(leaderboards['Steals Per Game']) + 1))
-    
-    # Blocks Per Game
-    leaderboards['Blocks Per Game'] = (
-        df.nlargest(30, 'BLK')[['PLAYER', 'TEAM', 'GP', 'BLK', 'MIN']]
-        .reset_index(drop=True)
-    )
-    leaderboards['Blocks Per Game'].insert(0, 'RANK', range(1, len(leaderboards['Blocks Per Game']) + 1))
-    
-    # Round all numeric columns to 1 decimal
-    for name, board in leaderboards.items():
-        for col in board.columns:
-            if board[col].dtype in ['float64', 'float32']:
-                board[col] = board[col].round(1)
-    
-    return leaderboards
+    # Each leaderboard is a top-K query on the shared form table
+    return {
+        name: rank_table(table, stat, 30, columns)
+        for name, (stat, columns) in LEADERBOARDS.items()
+    }
+
+def query_period_leaders(category, since=None, until=None, k=30, team=None, min_games=MIN_GAMES,
+                         min_win_pct=None, season=None):
+    """
+    Top-k players by per-game average over a date range, as one indexed query on the embedded database.
+    
+    E.g. top scorers since Dec 1 on teams above .500:
+        query_period_leaders('PTS', since='2025-12-01', min_win_pct=0.5)
+    
+    Args:
+        category (str): A LEADERBOARDS name or a FORM_COLUMNS stat
+        since (str or date): First game date included ("2025-12-01"); the season start when None
+        until (str or date): Last game date included; the latest game when None
+        k (int): Number of players to return
+        team (str or list): Only players on these team abbreviations
+        min_games (int): Minimum games played in the range
+        min_win_pct (float): Only players whose team's standings win percentage is at least this
+        season (str): Season to rank (e.g. "2025-26"); the current season when None
+    
+    Returns:
+        DataFrame: Ranked leaderboard, or None if the database isn't enabled or built
+    """
+    if category in LEADERBOARDS:
+        stat = LEADERBOARDS[category][0]
+    elif category in FORM_COLUMNS:
+        stat = category
+    else:
+        raise ValueError(f"Unknown leaderboard category: {category}")
+    
+    # Column names come from FORM_COLUMNS only; every value is a bound parameter
+    conditions = ["g.season_id = ?"]
+    params = [season_to_id(season or CURRENT_SEASON)]
+    if since is not None:
+        conditions.append("g.game_date >= ?")
+        params.append(str(since))
+    if until is not None:
+        conditions.append("g.game_date <= ?")
+        params.append(str(until))
+    if team is not None:
+        teams = [team] if isinstance(team, str) else list(team)
+        conditions.append(f"p.team_abbreviation IN ({', '.join('?' * len(teams))})")
+        params += teams
+    if min_win_pct is not None:
+        conditions.append("s.win_pct >= ?")
+        params.append(min_win_pct)
+    
+    columns = f"AVG(g.{stat}) AS {stat}" + (", AVG(g.MIN) AS MIN" if stat != 'MIN' else "")
+    sql = f"""
+        SELECT p.player_name AS PLAYER, p.team_abbreviation AS TEAM, COUNT(*) AS GP, {columns}
+        FROM player_games g
+        JOIN players p ON p.player_id = g.player_id
+        LEFT JOIN standings s ON s.team_id = p.team_id
+        WHERE {' AND '.join(conditions)}
+        GROUP BY g.player_id
+        HAVING COUNT(*) >= ?
+        ORDER BY {stat} DESC
+        LIMIT ?
+    """
+    board = database.query(sql, params + [min_games, k], season)
+    if board is None:
+        return None
+    
+    board.insert(0, 'RANK', range(1, len(board) + 1))
+    for col in board.columns:
+        if board[col].dtype in ['float64', 'float32']:
+            board[col] = board[col].round(1)
+    return board
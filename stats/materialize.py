@@ -0,0 +1,77 @@
+"""Materialization stage - precompute every player's and team's stats views
+
+Run by the fetcher after the caches and game stores are rebuilt, so the app
+serves each tab with a keyed read from data.materialized. Everything is
+computed from local data; nothing here calls the API.
+
+Usage:
+    python -m stats.materialize [season]
+"""
+
+import contextlib
+import io
+import sys
+
+from data import get_all_players, get_all_teams
+from data.game_store import load_team_games_frame
+from data.seasons import CURRENT_SEASON
+from data.materialized import write_view
+from .player_stats import compute_player_stats
+from .team_offense import compute_team_offense_stats
+from .team_defense import build_opponent_table, compute_team_defense_stats
+
+# NBA franchises (the team list also carries WNBA teams)
+NBA_TEAM_PREFIX = '1610612'
+
+
+def materialize_player_stats(season, materialized_dir=None):
+    """Compute get_player_stats for every player in the players list; returns the number stored."""
+    results = {}
+    for player in get_all_players(season):
+        player_id = player['PERSON_ID']
+        # Players without games print a line each; keep the fetch log readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[player_id] = compute_player_stats(player_id, season, source="local")
+
+    write_view("player_stats", season, results, materialized_dir)
+    print(f"  ✓ player_stats ({sum(r is not None for r in results.values())}/{len(results)} players)")
+    return len(results)
+
+
+def materialize_team_stats(season, materialized_dir=None):
+    """Compute offense and defense for every NBA team; returns the number of teams stored."""
+    all_games_df = load_team_games_frame(season)
+    if all_games_df is None:
+        # Nothing to compute the team views from
+        print(f"  ⚠ No league game table for {season}, skipping team views")
+        return 0
+
+    opponent_table = build_opponent_table(all_games_df)
+    teams = [t for t in get_all_teams(season) if str(t['TEAM_ID']).startswith(NBA_TEAM_PREFIX)]
+
+    # Teams missing from the table have no views
+    teams_with_games = set(all_games_df['TEAM_ID'].astype(int))
+
+    offense, defense = {}, {}
+    for team in teams:
+        team_id = team['TEAM_ID']
+        if int(team_id) not in teams_with_games:
+            offense[team_id] = defense[team_id] = None
+            continue
+        offense[team_id] = compute_team_offense_stats(team_id, season, source="local")
+        defense[team_id] = compute_team_defense_stats(team_id, season, opponent_table, source="local")
+
+    write_view("team_offense", season, offense, materialized_dir)
+    write_view("team_defense", season, defense, materialized_dir)
+    print(f"  ✓ team_offense, team_defense ({len(teams)} teams)")
+    return len(teams)
+
+
+def materialize_all(season, materialized_dir=None):
+    """Materialize every stats view for a season."""
+    materialize_player_stats(season, materialized_dir)
+    materialize_team_stats(season, materialized_dir)
+
+
+if __name__ == "__main__":
+    materialize_all(sys.argv[1] if len(sys.argv) > 1 else CURRENT_SEASON)
@@ -1,41 +1,178 @@
 """Player statistics module - reads from cached data"""
 
-import json
 import os
-import glob
+from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
 from nba_api.stats.endpoints import playergamelog
 
-CACHE_DIR = "cached_data/player_stats"
+from data import cache_format, database
+from data.loader import load_cached
+from data.materialized import get_materialized
+from data.manifest import get_player_entry, entry_path
+from data.game_store import (
+    PLAYERS_FILE, load_player_games, load_team_schedule, player_slice, rows_to_frame, season_to_id
+)
+from data.seasons import season_path
+from data.transport import submit
+from .form_engine import DEFAULT_TRIM, DEFAULT_WINDOW, stack_frame, window_stats
+from .single_flight import coalesce
 
-def find_player_cache_file(player_id):
-    """Find the cached JSON file for a player by ID."""
-    pattern = os.path.join(CACHE_DIR, f"{player_id}_*.json")
-    files = glob.glob(pattern)
+# Inside each season's directory
+CACHE_DIR = "player_stats"
+
+# Cached player data older than this is refreshed from the live API
+MAX_CACHE_AGE_HOURS = float(os.environ.get("NBA_STATS_MAX_CACHE_AGE_HOURS", 36))
+
+GAMELOG_COLUMNS = ['GAME_ID', 'GAME_DATE', 'MATCHUP', 'WL', 'MIN', 'PTS', 'REB', 'AST',
+                   'STL', 'BLK', 'TOV', 'FG3M', 'FG_PCT', 'FT_PCT']
+
+FORM_COLUMNS = ['PTS', 'REB', 'AST', 'STL', 'BLK', 'TOV', 'FG3M', 'FG_PCT', 'FT_PCT', 'MIN']
+
+def find_player_cache_file(player_id, season=None):
+    """Find a season's cached JSON file for a player by ID."""
+    # O(1) lookup in the manifest written by the fetcher
+    entry = get_player_entry(player_id, season)
+    if entry is not None:
+        path = entry_path(entry, season)
+        if os.path.exists(path):
+            return path
+    
+    # No manifest (or a stale one) - scan the cache directory
+    files = cache_format.glob_cache(os.path.join(season_path(season, CACHE_DIR), f"{player_id}_*"))
     if files:
         return files[0]
     return None
 
-def calculate_trimmed_mean(values):
-    """Remove highest and lowest value, return average of remaining values."""
-    if len(values) < 3:
-        return np.mean(values) if values else 0
-    sorted_vals = sorted(values)
-    trimmed = sorted_vals[1:-1]
-    return np.mean(trimmed) if trimmed else 0
+def is_cache_stale(cached, max_age_hours=None):
+    """Check whether a cached player file is older than the freshness threshold."""
+    if max_age_hours is None:
+        max_age_hours = MAX_CACHE_AGE_HOURS
+    try:
+        last_updated = datetime.fromisoformat(cached['last_updated'])
+    except (KeyError, TypeError, ValueError):
+        return True
+    return datetime.now() - last_updated > timedelta(hours=max_age_hours)
+
+def is_season_stale(season, max_age_hours=None):
+    """
+    Check whether a season's last fetch run is older than the freshness threshold.
+    
+    The incremental fetch leaves the files of players whose team hasn't played
+    untouched, so their own last_updated says when they last changed, not when
+    they were last confirmed current; the run's players.json does.
+    """
+    try:
+        return is_cache_stale(load_cached(season_path(season, PLAYERS_FILE)), max_age_hours)
+    except Exception:
+        return True
+
+def get_player_gamelog(player_id, season, cached=None, live=False):
+    """
+    Get a player's season game log (most recent first).
+    
+    Local data comes from the embedded database when it's enabled, the game
+    store, or the game log in the player's cache file when neither has it.
+    Only `live=True` calls the API.
+    """
+    if live:
+        gamelog = playergamelog.PlayerGameLog(player_id=player_id, season=season)
+        return gamelog.get_data_frames()[0]
+    
+    game_log = database.load_player_game_log(season, player_id)
+    if game_log is not None:
+        return game_log[GAMELOG_COLUMNS]
+    
+    store = load_player_games(season)
+    if store is not None:
+        rows = player_slice(store, player_id)
+        if rows is not None:
+            season_rows = np.arange(rows.start, rows.stop)
+            season_rows = season_rows[store['SEASON_ID'][season_rows] == season_to_id(season)]
+            if len(season_rows) > 0:
+                return rows_to_frame(store, season_rows, GAMELOG_COLUMNS)
+    
+    game_log = (cached or {}).get('game_log') or {}
+    games = game_log.get('PlayerGameLog', []) if isinstance(game_log, dict) else []
+    return pd.DataFrame(games, columns=None if games else GAMELOG_COLUMNS)
+
+def get_team_games(team_id, season, live=False):
+    """Get a team's season games (GAME_ID, GAME_DATE, MATCHUP) locally or from the live API."""
+    if not live:
+        return load_team_schedule(season, team_id)
+    
+    from nba_api.stats.endpoints import leaguegamefinder
+    
+    team_gamefinder = leaguegamefinder.LeagueGameFinder(
+        team_id_nullable=str(team_id),
+        season_nullable=season,
+        season_type_nullable='Regular Season'
+    )
+    return team_gamefinder.get_data_frames()[0]
 
-def get_player_stats(player_id, season="2025-26"):
-    """Get player season statistics from cached data and live game logs."""
+# Sessions opening the same player at once share one computation (and one set of API calls)
+@coalesce
+def get_player_stats(player_id, season="2025-26", source="auto",
+                     window=DEFAULT_WINDOW, trim=DEFAULT_TRIM, halflife=None):
+    """
+    Get player season statistics, from the fetcher's materialized results when possible.
+    
+    Args:
+        player_id (str): The ID of the player
+        season (str): Season in format "2025-26"
+        source (str): "auto" serves the materialized result unless it is older than
+                      MAX_CACHE_AGE_HOURS, "local" never calls the API and "live"
+                      always recomputes with game logs from the API
+        window (int): Number of recent games in the recent form window
+        trim (int): Highest and lowest games dropped from the window
+        halflife (float): Exponentially weighted window instead of a trimmed one
+    
+    Returns:
+        dict: Season averages, recent form ('trimmed_7'), recent and missed games
+    """
+    # Only the default window is materialized
+    default_window = (window, trim, halflife) == (DEFAULT_WINDOW, DEFAULT_TRIM, None)
+    if source != "live" and default_window:
+        entry = get_materialized("player_stats", season, player_id)
+        if entry is not None and (source == "local" or not is_cache_stale(entry)):
+            return entry['result']
+    
+    return compute_player_stats(player_id, season, source, window, trim, halflife)
+
+def compute_player_stats(player_id, season="2025-26", source="auto",
+                         window=DEFAULT_WINDOW, trim=DEFAULT_TRIM, halflife=None):
+    """
+    Compute player season statistics from the player's cached data.
+    
+    Args:
+        player_id (str): The ID of the player
+        season (str): Season in format "2025-26"
+        source (str): "auto" builds everything from local data unless the season's last
+                      fetch run is older than MAX_CACHE_AGE_HOURS, "local" never calls the API and
+                      "live" always fetches game logs from the API
+        window (int): Number of recent games in the recent form window
+        trim (int): Highest and lowest games dropped from the window
+        halflife (float): Exponentially weighted window instead of a trimmed one
+    
+    Returns:
+        dict: Season averages, recent form ('trimmed_7'), recent and missed games
+    """
     try:
-        cache_file = find_player_cache_file(player_id)
+        # The manifest knows who hasn't played this season without opening their file
+        entry = get_player_entry(player_id, season)
+        if entry is not None and entry.get('season') == season and entry.get('games_played', 0) == 0:
+            print(f"Player {player_id} has no games in {season}")
+            return None
+        
+        cache_file = find_player_cache_file(player_id, season)
         
         if not cache_file:
             print(f"Player {player_id} not found in cache")
             return None
         
-        with open(cache_file, 'r') as f:
-            cached = json.load(f)
+        cached = load_cached(cache_file)
+        
+        live = source == "live" or (source == "auto" and is_season_stale(season))
         
         player_name = cached['player_name']
         data = cached['data']
@@ -81,43 +218,44 @@ def get_player_stats(player_id, season="2025-26"):
         total_team_games = games
         missed_games_df = pd.DataFrame()
         
+        # The live team schedule doesn't depend on the game log - request both at once
+        team_games_future = submit(get_team_games, team_id, season, live=True) if live and team_id else None
+        
+        # One game log serves both the missed games and the recent form
+        try:
+            all_games = get_player_gamelog(player_id, season, cached, live=live)
+        except Exception as e:
+            # Stale local data beats no data when the API is unavailable
+            print(f"Error fetching live game log, using cached data: {str(e)}")
+            live = False
+            all_games = get_player_gamelog(player_id, season, cached)
+        
         if team_id:
             try:
-                from nba_api.stats.endpoints import leaguegamefinder
-                
-                # Get all team games
-                team_gamefinder = leaguegamefinder.LeagueGameFinder(
-                    team_id_nullable=str(team_id),
-                    season_nullable=season,
-                    season_type_nullable='Regular Season'
-                )
-                team_games_df = team_gamefinder.get_data_frames()[0]
-                total_team_games = len(team_games_df)
-                
-                # Get all player games
-                player_gamelog_obj = playergamelog.PlayerGameLog(player_id=player_id, season=season)
-                player_games_df = player_gamelog_obj.get_data_frames()[0]
-                
-                print(f"DEBUG: Player gamelog columns: {player_games_df.columns.tolist()}")
+                # Get all team games (a live schedule only goes with a live game log)
+                try:
+                    if team_games_future is not None and live:
+                        team_games_df = team_games_future.result()
+                    else:
+                        team_games_df = get_team_games(team_id, season)
+                except Exception as e:
+                    print(f"Error fetching live team games, using cached data: {str(e)}")
+                    team_games_df = get_team_games(team_id, season)
+                if not team_games_df.empty:
+                    total_team_games = len(team_games_df)
                 
                 # The column might be 'Game_ID' instead of 'GAME_ID'
-                game_id_col = 'Game_ID' if 'Game_ID' in player_games_df.columns else 'GAME_ID'
+                game_id_col = 'Game_ID' if 'Game_ID' in all_games.columns else 'GAME_ID'
                 
                 # Get the game IDs the player participated in
-                player_game_ids = set(player_games_df[game_id_col].tolist())
+                player_game_ids = set(all_games[game_id_col].tolist())
                 
                 # Find team games the player MISSED
                 missed_games_df = team_games_df[~team_games_df['GAME_ID'].isin(player_game_ids)]
                 
-                print(f"DEBUG: Found {len(missed_games_df)} total missed games for {player_name}")
-                
                 # Format for display - get last 5 missed games
                 if len(missed_games_df) > 0:
                     missed_games_df = missed_games_df[['GAME_DATE', 'MATCHUP']].head(5)
-                    print(f"DEBUG: Showing {len(missed_games_df)} missed games")
-                    print(f"DEBUG: Missed games data:\n{missed_games_df}")
-                else:
-                    print("DEBUG: No missed games found")
                 
             except Exception as e:
                 print(f"Error getting team/missed games: {e}")
@@ -127,11 +265,8 @@ def get_player_stats(player_id, season="2025-26"):
         games_missed_count = total_team_games - games
         
         try:
-            gamelog = playergamelog.PlayerGameLog(player_id=player_id, season=season)
-            all_games = gamelog.get_data_frames()[0]
-            
             games_played = all_games[all_games['MIN'].notna() & (all_games['MIN'] > 0)]
-            games_df = games_played.head(7)
+            games_df = games_played.head(window)
             
             if len(games_df) > 0:
                 first_game_date = games_df.iloc[-1]['GAME_DATE']
@@ -140,19 +275,23 @@ def get_player_stats(player_id, season="2025-26"):
             else:
                 date_range = "No games played"
             
-            if len(games_df) >= 3:
+            if len(games_df) >= max(3, 2 * trim + 1):
+                # Every stat in one pass over a (1 player x games x stats) stack
+                stack, counts = stack_frame(games_df, FORM_COLUMNS, window)
+                form = dict(zip(FORM_COLUMNS, window_stats(stack, counts, trim=trim, halflife=halflife)[0]))
+                
                 trimmed_7_stats = {
                     'games': len(games_df),
-                    'ppg': calculate_trimmed_mean(games_df['PTS'].tolist()),
-                    'rpg': calculate_trimmed_mean(games_df['REB'].tolist()),
-                    'apg': calculate_trimmed_mean(games_df['AST'].tolist()),
-                    'spg': calculate_trimmed_mean(games_df['STL'].tolist()),
-                    'bpg': calculate_trimmed_mean(games_df['BLK'].tolist()),
-                    'topg': calculate_trimmed_mean(games_df['TOV'].tolist()),
-                    'fg3m': calculate_trimmed_mean(games_df['FG3M'].tolist()),
-                    'fg_pct': calculate_trimmed_mean(games_df['FG_PCT'].tolist()),
-                    'ft_pct': calculate_trimmed_mean(games_df['FT_PCT'].tolist()),
-                    'minutes': calculate_trimmed_mean(games_df['MIN'].tolist()),
+                    'ppg': form['PTS'],
+                    'rpg': form['REB'],
+                    'apg': form['AST'],
+                    'spg': form['STL'],
+                    'bpg': form['BLK'],
+                    'topg': form['TOV'],
+                    'fg3m': form['FG3M'],
+                    'fg_pct': form['FG_PCT'],
+                    'ft_pct': form['FT_PCT'],
+                    'minutes': form['MIN'],
                     'games_missed_season': games_missed_count,
                     'date_range': date_range
                 }
@@ -180,8 +319,6 @@ def get_player_stats(player_id, season="2025-26"):
                     'MIN': season_avg['minutes']
                 }])
             
-            print(f"DEBUG: Returning missed_games_df with shape: {missed_games_df.shape}")
-            
             return {
                 'season': season_avg,
                 'trimmed_7': trimmed_7_stats,
@@ -0,0 +1,111 @@
+"""Single-flight request coalescing - concurrent identical calls share one computation
+
+When several sessions ask for the same team or player at the same moment,
+only the first call runs; the others wait for it and receive the same result
+(or exception). Keys include the season's data generation, so a call made
+after a fetch publishes new data never joins a computation over the old data.
+
+Nothing is cached once a call finishes - that's the loader's, the form
+tables' and the Streamlit caches' job. Shared results must be treated as
+read-only.
+"""
+
+import functools
+import inspect
+import threading
+
+from data.loader import get_data_generation
+from data.seasons import season_dir
+
+# Key -> _Call of the computation in flight
+_in_flight = {}
+_lock = threading.Lock()
+_counters = {"calls": 0, "coalesced": 0}
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def do(key, fn, *args, **kwargs):
+    """
+    Run fn(*args, **kwargs), or wait for the call already running under the same key.
+
+    Args:
+        key: Hashable identity of the computation
+        fn (callable): The computation
+
+    Returns:
+        fn's result, shared with every caller that joined the flight
+    """
+    with _lock:
+        _counters["calls"] += 1
+        call = _in_flight.get(key)
+        leader = call is None
+        if leader:
+            call = _in_flight[key] = _Call()
+        else:
+            _counters["coalesced"] += 1
+
+    if not leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = fn(*args, **kwargs)
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _lock:
+            del _in_flight[key]
+        call.done.set()
+    return call.result
+
+
+def _freeze(arguments):
+    """Hashable form of bound arguments, or None if any of them can't be hashed."""
+    frozen = tuple(sorted(arguments.items()))
+    try:
+        hash(frozen)
+    except TypeError:
+        return None
+    return frozen
+
+
+def coalesce(fn):
+    """
+    Decorator: concurrent calls with the same arguments and data generation share one computation.
+
+    The decorated function must take a `season` argument; calls with
+    unhashable arguments (e.g. a DataFrame) run on their own.
+    """
+    signature = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = _freeze(bound.arguments)
+        if arguments is None:
+            return fn(*args, **kwargs)
+        generation = get_data_generation(season_dir(bound.arguments.get('season')))
+        return do((fn.__module__, fn.__qualname__, arguments, generation), fn, *args, **kwargs)
+
+    return wrapper
+
+
+def single_flight_stats():
+    """
+    Coalescing counters.
+
+    Returns:
+        dict: calls, coalesced (calls that joined a computation in flight) and in_flight
+    """
+    with _lock:
+        return dict(_counters, in_flight=len(_in_flight))
@@ -1,101 +1,193 @@
 """Team defensive statistics module"""
 
+from collections import OrderedDict
+import threading
+
 from nba_api.stats.endpoints import leaguegamefinder
-import pandas as pd
 import numpy as np
 
-def get_team_defense_stats(team_id, season="2023-24"):
+from data.loader import get_data_generation
+from data.materialized import get_materialized
+from data.seasons import season_dir
+from . import single_flight
+from .form_engine import DEFAULT_TRIM, DEFAULT_WINDOW, stack_frame, window_stats
+from .player_stats import is_cache_stale
+from .single_flight import coalesce
+from .team_offense import is_league_table_stale, load_local_team_games
+
+# Team-game columns kept as-is and opponent columns pulled in by the self-join
+TEAM_COLUMNS = {'STL': 'TEAM_STL', 'BLK': 'TEAM_BLK', 'DREB': 'TEAM_DREB', 'PF': 'TEAM_PF'}
+OPPONENT_COLUMNS = {
+    'TEAM_ID': 'OPP_TEAM_ID', 'PTS': 'OPP_PTS', 'FGM': 'OPP_FGM', 'FGA': 'OPP_FGA',
+    'FG3M': 'OPP_FG3M', 'FG3A': 'OPP_FG3A', 'FTM': 'OPP_FTM', 'FTA': 'OPP_FTA',
+    'REB': 'OPP_REB', 'AST': 'OPP_AST', 'TOV': 'OPP_TOV'
+}
+
+# Recent form key -> opponent table column; only opponent PPG is trimmed
+FORM_COLUMNS = {
+    'opp_ppg': 'OPP_PTS', 'opp_fg_pct': 'OPP_FG_PCT', 'opp_fg3m': 'OPP_FG3M', 'opp_fg3a': 'OPP_FG3A',
+    'opp_fg3_pct': 'OPP_FG3_PCT', 'opp_ft_pct': 'OPP_FT_PCT', 'opp_reb': 'OPP_REB', 'opp_ast': 'OPP_AST',
+    'opp_tov': 'OPP_TOV', 'team_stl': 'TEAM_STL', 'team_blk': 'TEAM_BLK', 'team_dreb': 'TEAM_DREB',
+    'team_pf': 'TEAM_PF'
+}
+TRIMMED_FORM = ['opp_ppg']
+
+def build_opponent_table(all_games_df):
+    """
+    Pair every team-game in the league with its opponent's box score.
+    
+    A single self-join on GAME_ID replaces scanning the league's games once per
+    team game, so the table for all 30 teams costs about the same as one team.
+    
+    Args:
+        all_games_df (DataFrame): League-wide team games (one row per team per game)
+    
+    Returns:
+        DataFrame: One row per team-game with TEAM_ID, game info, OPP_* and TEAM_* columns
+    """
+    games = all_games_df.copy()
+    if 'WL' not in games.columns:
+        games['WL'] = 'N/A'
+    
+    team_side = games[['TEAM_ID', 'GAME_ID', 'GAME_DATE', 'MATCHUP', 'WL'] + list(TEAM_COLUMNS)]
+    team_side = team_side.rename(columns=TEAM_COLUMNS)
+    opp_side = games[['GAME_ID'] + list(OPPONENT_COLUMNS)].rename(columns=OPPONENT_COLUMNS)
+    
+    opp_df = team_side.merge(opp_side, on='GAME_ID', how='inner', sort=False)
+    opp_df = opp_df[opp_df['TEAM_ID'] != opp_df['OPP_TEAM_ID']]
+    opp_df = opp_df.drop_duplicates(subset=['TEAM_ID', 'GAME_ID'], keep='first')
+    
+    # Calculate percentages after getting the data
+    opp_df['OPP_FG_PCT'] = opp_df['OPP_FGM'] / opp_df['OPP_FGA']
+    opp_df['OPP_FG3_PCT'] = opp_df['OPP_FG3M'] / opp_df['OPP_FG3A']
+    opp_df['OPP_FT_PCT'] = opp_df['OPP_FTM'] / opp_df['OPP_FTA']
+    
+    # Replace any inf/nan with 0
+    opp_df = opp_df.replace([np.inf, -np.inf], 0).fillna(0)
+    
+    return opp_df.reset_index(drop=True)
+
+# Opponent tables by (data generation, season), least recently used first
+OPPONENT_TABLE_CACHE_SIZE = 4
+_opponent_tables = OrderedDict()
+_opponent_tables_lock = threading.Lock()
+
+def _build_local_opponent_table(season):
+    # The embedded database when it's enabled, else the game store
+    all_games_df = load_local_team_games(season)
+    if all_games_df is None or all_games_df.empty:
+        return None
+    return build_opponent_table(all_games_df)
+
+def get_opponent_table(season="2023-24"):
+    """
+    The season's league-wide opponent table from the cached league game table,
+    built once per season and data generation.
+    
+    Pass it to get_team_defense_stats as opponent_table= to compute several teams
+    from one table. It is shared between callers and must not be modified.
+    
+    Args:
+        season (str): Season in format "2023-24"
+    
+    Returns:
+        DataFrame: build_opponent_table of the season's games, or None if they haven't been fetched
+    """
+    key = (get_data_generation(season_dir(season)), season)
+    with _opponent_tables_lock:
+        table = _opponent_tables.get(key)
+        if table is not None:
+            _opponent_tables.move_to_end(key)
+            return table
+    
+    # Concurrent misses for the same table build it once
+    table = single_flight.do(('opponent_table',) + key, _build_local_opponent_table, season)
+    if table is not None:
+        with _opponent_tables_lock:
+            _opponent_tables[key] = table
+            while len(_opponent_tables) > OPPONENT_TABLE_CACHE_SIZE:
+                _opponent_tables.popitem(last=False)
+    return table
+
+# Sessions opening the same team at once share one computation (and one set of API calls)
+@coalesce
+def get_team_defense_stats(team_id, season="2023-24", opponent_table=None, source="auto",
+                           window=DEFAULT_WINDOW, trim=DEFAULT_TRIM, halflife=None):
+    """
+    Get a team's defensive statistics, from the fetcher's materialized results when possible.
+    
+    Args:
+        team_id (str): The ID of the team
+        season (str): Season in format "2023-24"
+        opponent_table (DataFrame): League-wide opponent table to compute from
+        source (str): "auto" serves the materialized result unless it is older than
+                      MAX_CACHE_AGE_HOURS, "local" never calls the API and "live"
+                      always recomputes with games from the API
+        window (int): Number of recent games in the recent form window
+        trim (int): Highest and lowest games dropped from the window (opponent PPG only)
+        halflife (float): Exponentially weighted window instead of a trimmed one
+    
+    Returns:
+        dict: Dictionary containing defensive stats
+    """
+    # Only the default window is materialized
+    default_window = (window, trim, halflife) == (DEFAULT_WINDOW, DEFAULT_TRIM, None)
+    if source != "live" and opponent_table is None and default_window:
+        entry = get_materialized("team_defense", season, team_id)
+        if entry is not None and (source == "local" or not is_cache_stale(entry)):
+            return entry['result']
+    
+    return compute_team_defense_stats(team_id, season, opponent_table, source, window, trim, halflife)
+
+def compute_team_defense_stats(team_id, season="2023-24", opponent_table=None, source="auto",
+                               window=DEFAULT_WINDOW, trim=DEFAULT_TRIM, halflife=None):
     """
     Fetches comprehensive defensive statistics for a team.
     
     Args:
         team_id (str): The ID of the team
         season (str): Season in format "2023-24"
+        opponent_table (DataFrame): League-wide table (get_opponent_table) to compute from
+            instead of the season's cached one
+        source (str): "auto" uses the cached league game table unless it is missing or
+                      older than MAX_CACHE_AGE_HOURS, "local" never calls the API (None
+                      when the season isn't cached) and "live" always fetches from the API
+        window (int): Number of recent games in the recent form window
+        trim (int): Highest and lowest games dropped from the window (opponent PPG only)
+        halflife (float): Exponentially weighted window instead of a trimmed one
     
     Returns:
         dict: Dictionary containing defensive stats
     """
     try:
-        # Get team's games
-        gamefinder = leaguegamefinder.LeagueGameFinder(
-            team_id_nullable=team_id,
-            season_nullable=season,
-            season_type_nullable='Regular Season'
-        )
-        
-        games_df = gamefinder.get_data_frames()[0]
-        
-        if games_df.empty:
-            return None
-        
-        # Calculate opponent points
-        if 'PLUS_MINUS' in games_df.columns:
-            games_df['OPP_PTS'] = games_df['PTS'] - games_df['PLUS_MINUS']
-        elif 'PTS_OPP' in games_df.columns:
-            games_df['OPP_PTS'] = games_df['PTS_OPP']
-        else:
-            return None
-        
-        # Get ALL games for the season (not filtered by team)
-        all_gamefinder = leaguegamefinder.LeagueGameFinder(
-            season_nullable=season,
-            season_type_nullable='Regular Season'
-        )
-        
-        all_games_df = all_gamefinder.get_data_frames()[0]
-        
-        if all_games_df.empty:
-            return None
-        
-        # Build opponent stats by matching game IDs
-        opponent_data = []
-        
-        for idx, game in games_df.iterrows():
-            game_id = game['GAME_ID']
-            
-            # Get both teams' data for this game
-            game_matchups = all_games_df[all_games_df['GAME_ID'] == game_id]
+        if opponent_table is None:
+            # Opponents of ALL games in the season, from the cached league game table
+            if source != "live":
+                opponent_table = get_opponent_table(season)
             
-            # Find opponent (the team that's NOT our team_id)
-            opponent = game_matchups[game_matchups['TEAM_ID'] != int(team_id)]
+            # Use the API when asked to refresh or when the table is missing or stale
+            if source == "live" or (source == "auto" and (opponent_table is None or is_league_table_stale(season))):
+                try:
+                    all_gamefinder = leaguegamefinder.LeagueGameFinder(
+                        season_nullable=season,
+                        season_type_nullable='Regular Season'
+                    )
+                    
+                    all_games_df = all_gamefinder.get_data_frames()[0]
+                    opponent_table = build_opponent_table(all_games_df) if not all_games_df.empty else None
+                except Exception as e:
+                    # Stale local data beats no data when the API is unavailable
+                    if opponent_table is None:
+                        raise
+                    print(f"Error fetching live league games, using cached data: {str(e)}")
             
-            if not opponent.empty:
-                opp_game = opponent.iloc[0]
-                
-                # Safely extract stats with defaults
-                opponent_data.append({
-                    'GAME_ID': game_id,
-                    'GAME_DATE': game['GAME_DATE'],
-                    'MATCHUP': game['MATCHUP'],
-                    'WL': game.get('WL', 'N/A'),
-                    'OPP_PTS': opp_game.get('PTS', 0),
-                    'OPP_FGM': opp_game.get('FGM', 0),
-                    'OPP_FGA': opp_game.get('FGA', 1),  # Avoid division by zero
-                    'OPP_FG3M': opp_game.get('FG3M', 0),
-                    'OPP_FG3A': opp_game.get('FG3A', 1),
-                    'OPP_FTM': opp_game.get('FTM', 0),
-                    'OPP_FTA': opp_game.get('FTA', 1),
-                    'OPP_REB': opp_game.get('REB', 0),
-                    'OPP_AST': opp_game.get('AST', 0),
-                    'OPP_TOV': opp_game.get('TOV', 0),
-                    'TEAM_STL': game.get('STL', 0),
-                    'TEAM_BLK': game.get('BLK', 0),
-                    'TEAM_DREB': game.get('DREB', 0),
-                    'TEAM_PF': game.get('PF', 0)
-                })
-        
-        if not opponent_data:
-            return None
+            if opponent_table is None:
+                return None
         
-        opp_df = pd.DataFrame(opponent_data)
+        opp_df = opponent_table[opponent_table['TEAM_ID'] == int(team_id)].reset_index(drop=True)
         
-        # Calculate percentages after getting the data
-        opp_df['OPP_FG_PCT'] = opp_df['OPP_FGM'] / opp_df['OPP_FGA']
-        opp_df['OPP_FG3_PCT'] = opp_df['OPP_FG3M'] / opp_df['OPP_FG3A']
-        opp_df['OPP_FT_PCT'] = opp_df['OPP_FTM'] / opp_df['OPP_FTA']
-        
-        # Replace any inf/nan with 0
-        opp_df = opp_df.replace([np.inf, -np.inf], 0).fillna(0)
+        if opp_df.empty:
+            return None
         
         # Calculate season averages
         season_stats = {
@@ -115,32 +207,16 @@ def get_team_defense_stats(team_id, season="2023-24"):
             'team_pf': opp_df['TEAM_PF'].mean()
         }
         
-        # Get last 7 games
-        last_7 = opp_df.head(min(7, len(opp_df)))
+        # Recent form over the last `window` games (trimming only applies to opponent PPG)
+        last_7 = opp_df.head(window)
         
-        # Calculate trimmed last 7 (remove highest and lowest for PPG)
-        if len(last_7) >= 3:
-            opp_pts_sorted = np.sort(last_7['OPP_PTS'].values)
-            trimmed_ppg = np.mean(opp_pts_sorted[1:-1])
-        else:
-            trimmed_ppg = last_7['OPP_PTS'].mean()
+        keys = list(FORM_COLUMNS)
+        stack, counts = stack_frame(opp_df, list(FORM_COLUMNS.values()), window)
+        form = window_stats(stack, counts, trim=trim, halflife=halflife,
+                            trim_columns=[keys.index(key) for key in TRIMMED_FORM])[0]
         
-        trimmed_7 = {
-            'games': len(last_7),
-            'opp_ppg': trimmed_ppg,
-            'opp_fg_pct': last_7['OPP_FG_PCT'].mean(),
-            'opp_fg3m': last_7['OPP_FG3M'].mean(),
-            'opp_fg3a': last_7['OPP_FG3A'].mean(),
-            'opp_fg3_pct': last_7['OPP_FG3_PCT'].mean(),
-            'opp_ft_pct': last_7['OPP_FT_PCT'].mean(),
-            'opp_reb': last_7['OPP_REB'].mean(),
-            'opp_ast': last_7['OPP_AST'].mean(),
-            'opp_tov': last_7['OPP_TOV'].mean(),
-            'team_stl': last_7['TEAM_STL'].mean(),
-            'team_blk': last_7['TEAM_BLK'].mean(),
-            'team_dreb': last_7['TEAM_DREB'].mean(),
-            'team_pf': last_7['TEAM_PF'].mean()
-        }
+        trimmed_7 = {'games': len(last_7)}
+        trimmed_7.update(zip(keys, form))
         
         # Format display dataframe
         display_df = last_7[['GAME_DATE', 'MATCHUP', 'WL', 'OPP_PTS']].copy()
@@ -154,7 +230,7 @@ def get_team_defense_stats(team_id, season="2023-24"):
         return {
             'season': season_stats,
             'trimmed_7': trimmed_7,
-            'last_7_games': display_df.head(7)
+            'last_7_games': display_df
         }
         
     except Exception as e:
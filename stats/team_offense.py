@@ -1,31 +1,108 @@
 """Team offensive statistics module"""
 
 from nba_api.stats.endpoints import leaguegamefinder
-import pandas as pd
-import numpy as np
 
-def get_team_offense_stats(team_id, season="2023-24"):
+from data import database
+from data.game_store import LEAGUE_GAMES_FILE, load_team_games_frame
+from data.loader import load_cached
+from data.materialized import get_materialized
+from data.seasons import season_path
+from .form_engine import DEFAULT_TRIM, DEFAULT_WINDOW, stack_frame, window_stats
+from .player_stats import is_cache_stale
+from .single_flight import coalesce
+
+# Recent form key -> game log column; only PPG is trimmed
+FORM_COLUMNS = {
+    'ppg': 'PTS', 'fg_pct': 'FG_PCT', 'fgm': 'FGM', 'fga': 'FGA', 'fg3_pct': 'FG3_PCT',
+    'fg3m': 'FG3M', 'fg3a': 'FG3A', 'ft_pct': 'FT_PCT', 'ftm': 'FTM', 'fta': 'FTA',
+    'ast': 'AST', 'tov': 'TOV', 'oreb': 'OREB', 'dreb': 'DREB', 'reb': 'REB'
+}
+TRIMMED_FORM = ['ppg']
+
+def is_league_table_stale(season):
+    """Check whether a season's cached league game table is missing or older than MAX_CACHE_AGE_HOURS."""
+    try:
+        return is_cache_stale(load_cached(season_path(season, LEAGUE_GAMES_FILE)))
+    except Exception:
+        return True
+
+def load_local_team_games(season, team_id=None):
+    """A season's team games (one team's, or the league's) from the embedded database or the game store."""
+    games_df = database.load_team_games_frame(season, team_id)
+    if games_df is None:
+        games_df = load_team_games_frame(season, team_id)
+    return games_df
+
+# Sessions opening the same team at once share one computation (and one set of API calls)
+@coalesce
+def get_team_offense_stats(team_id, season="2023-24", source="auto",
+                           window=DEFAULT_WINDOW, trim=DEFAULT_TRIM, halflife=None):
+    """
+    Get a team's offensive statistics, from the fetcher's materialized results when possible.
+    
+    Args:
+        team_id (str): The ID of the team
+        season (str): Season in format "2023-24"
+        source (str): "auto" serves the materialized result unless it is older than
+                      MAX_CACHE_AGE_HOURS, "local" never calls the API and "live"
+                      always recomputes with games from the API
+        window (int): Number of recent games in the recent form window
+        trim (int): Highest and lowest games dropped from the window (PPG only)
+        halflife (float): Exponentially weighted window instead of a trimmed one
+    
+    Returns:
+        dict: Dictionary containing offensive stats
+    """
+    # Only the default window is materialized
+    if source != "live" and (window, trim, halflife) == (DEFAULT_WINDOW, DEFAULT_TRIM, None):
+        entry = get_materialized("team_offense", season, team_id)
+        if entry is not None and (source == "local" or not is_cache_stale(entry)):
+            return entry['result']
+    
+    return compute_team_offense_stats(team_id, season, source, window, trim, halflife)
+
+def compute_team_offense_stats(team_id, season="2023-24", source="auto",
+                               window=DEFAULT_WINDOW, trim=DEFAULT_TRIM, halflife=None):
     """
     Fetches comprehensive offensive statistics for a team.
     
     Args:
         team_id (str): The ID of the team
         season (str): Season in format "2023-24"
+        source (str): "auto" uses the cached league game table unless it is missing or
+                      older than MAX_CACHE_AGE_HOURS, "local" never calls the API (None
+                      when the team isn't cached) and "live" always fetches from the API
+        window (int): Number of recent games in the recent form window
+        trim (int): Highest and lowest games dropped from the window (PPG only)
+        halflife (float): Exponentially weighted window instead of a trimmed one
     
     Returns:
         dict: Dictionary containing offensive stats
     """
     try:
-        # Get team's games
-        gamefinder = leaguegamefinder.LeagueGameFinder(
-            team_id_nullable=team_id,
-            season_nullable=season,
-            season_type_nullable='Regular Season'
-        )
+        # Slice the team's games out of the cached league game table; use the API
+        # when asked to refresh or when the table is missing or stale
+        games_df = None
+        if source != "live":
+            # Indexed query on the embedded database when it's enabled, else the game store
+            games_df = load_local_team_games(season, team_id)
         
-        games_df = gamefinder.get_data_frames()[0]
+        if source == "live" or (source == "auto" and (games_df is None or is_league_table_stale(season))):
+            try:
+                gamefinder = leaguegamefinder.LeagueGameFinder(
+                    team_id_nullable=team_id,
+                    season_nullable=season,
+                    season_type_nullable='Regular Season'
+                )
+                
+                games_df = gamefinder.get_data_frames()[0]
+            except Exception as e:
+                # Stale local data beats no data when the API is unavailable
+                if games_df is None:
+                    raise
+                print(f"Error fetching live team games, using cached data: {str(e)}")
         
-        if games_df.empty:
+        if games_df is None or games_df.empty:
             return None
         
         # Use games_df directly - it already has all offensive stats
@@ -54,34 +131,16 @@ def get_team_offense_stats(team_id, season="2023-24"):
         # Calculate assist-to-turnover ratio
         season_stats['ast_tov_ratio'] = season_stats['ast'] / season_stats['tov'] if season_stats['tov'] > 0 else 0
         
-        # Get last 7 games
-        last_7 = games_df.head(min(7, len(games_df)))
+        # Recent form over the last `window` games (trimming only applies to PPG)
+        last_7 = games_df.head(window)
         
-        # Calculate trimmed last 7 (remove highest and lowest for PPG)
-        if len(last_7) >= 3:
-            pts_sorted = np.sort(last_7['PTS'].values)
-            trimmed_ppg = np.mean(pts_sorted[1:-1])
-        else:
-            trimmed_ppg = last_7['PTS'].mean()
+        keys = list(FORM_COLUMNS)
+        stack, counts = stack_frame(games_df, list(FORM_COLUMNS.values()), window)
+        form = window_stats(stack, counts, trim=trim, halflife=halflife,
+                            trim_columns=[keys.index(key) for key in TRIMMED_FORM])[0]
         
-        trimmed_7 = {
-            'games': len(last_7),
-            'ppg': trimmed_ppg,
-            'fg_pct': last_7['FG_PCT'].mean(),
-            'fgm': last_7['FGM'].mean(),
-            'fga': last_7['FGA'].mean(),
-            'fg3_pct': last_7['FG3_PCT'].mean(),
-            'fg3m': last_7['FG3M'].mean(),
-            'fg3a': last_7['FG3A'].mean(),
-            'ft_pct': last_7['FT_PCT'].mean(),
-            'ftm': last_7['FTM'].mean(),
-            'fta': last_7['FTA'].mean(),
-            'ast': last_7['AST'].mean(),
-            'tov': last_7['TOV'].mean(),
-            'oreb': last_7['OREB'].mean(),
-            'dreb': last_7['DREB'].mean(),
-            'reb': last_7['REB'].mean()
-        }
+        trimmed_7 = {'games': len(last_7)}
+        trimmed_7.update(zip(keys, form))
         
         # Calculate assist-to-turnover ratio for recent form
         trimmed_7['ast_tov_ratio'] = trimmed_7['ast'] / trimmed_7['tov'] if trimmed_7['tov'] > 0 else 0
@@ -99,7 +158,7 @@ def get_team_offense_stats(team_id, season="2023-24"):
         return {
             'season': season_stats,
             'trimmed_7': trimmed_7,
-            'last_7_games': display_df.head(7)
+            'last_7_games': display_df
         }
         
     except Exception as e:
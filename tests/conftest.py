@@ -0,0 +1,33 @@
+"""Shared test setup - every test module reads one synthetic league"""
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+# The data package reads NBA_CACHE_DIR at import time, so set it before any test module imports it
+CACHE_ROOT = tempfile.mkdtemp(prefix="nba_test_")
+os.environ["NBA_CACHE_DIR"] = CACHE_ROOT
+
+
+@pytest.fixture(scope="session")
+def league():
+    """A small synthetic league in CACHE_ROOT, generated once per test run."""
+    from synthetic_league import generate_league
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        generate_league(CACHE_ROOT, players=60, seasons=2, games=10)
+    return CACHE_ROOT
+
+
+def pytest_sessionfinish(session, exitstatus):
+    # Also when no test asked for the league
+    shutil.rmtree(CACHE_ROOT, ignore_errors=True)
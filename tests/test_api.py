@@ -0,0 +1,71 @@
+"""The JSON API only serves local data - no route may call stats.nba.com"""
+
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+import api
+from data import transport
+from data.game_store import load_team_games_frame
+from data.seasons import CURRENT_SEASON
+from scripts.nba_api_server import serve_in_background as serve_stand_in
+from stats import player_stats
+
+
+@pytest.fixture(scope="module")
+def servers(league):
+    # Every nba_api request goes to the stand-in, which counts them
+    upstream = serve_stand_in(cache_dir=league)
+    transport.use_api_server(upstream.base_url)
+    server = api.serve_in_background()
+    yield server, upstream
+    server.shutdown()
+    upstream.shutdown()
+    transport.use_api_server(None)
+
+
+@pytest.fixture
+def stale_cache(monkeypatch):
+    # Outside the API, stale local data would be refreshed from the live API
+    monkeypatch.setattr(player_stats, "MAX_CACHE_AGE_HOURS", 0)
+
+
+def get(server, path):
+    try:
+        with urllib.request.urlopen(server.base_url + path) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+@pytest.mark.parametrize("path", [
+    "/teams/123/offense",
+    "/teams/123/defense",
+    "/teams/1610612799/offense",
+    "/teams/1610612799/defense",
+    "/players/123",
+])
+def test_unknown_ids_make_no_outbound_request(servers, stale_cache, path):
+    server, upstream = servers
+    before = upstream.counters["requests"]
+
+    status, body = get(server, f"{path}?window=4&season={CURRENT_SEASON}")
+
+    assert status == 404
+    assert "error" in body
+    assert upstream.counters["requests"] == before
+
+
+def test_known_team_is_served_locally_when_stale(servers, stale_cache):
+    server, upstream = servers
+    team_id = int(load_team_games_frame(CURRENT_SEASON)["TEAM_ID"].iloc[0])
+    before = upstream.counters["requests"]
+
+    for side in ("offense", "defense"):
+        status, body = get(server, f"/teams/{team_id}/{side}?window=5")
+        assert status == 200
+        assert set(body["result"]) == {"season", "trimmed_7", "last_7_games"}
+
+    assert upstream.counters["requests"] == before
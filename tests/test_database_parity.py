@@ -0,0 +1,87 @@
+"""The SQLite backend serves the same player and team stats as the game stores"""
+
+import contextlib
+import io
+import os
+
+import pandas as pd
+import pytest
+
+from data import database, get_all_players, get_all_teams, game_store
+from data.seasons import CURRENT_SEASON, season_dir
+from stats.player_stats import compute_player_stats, get_player_gamelog
+from stats.team_defense import build_opponent_table, compute_team_defense_stats
+from stats.team_offense import compute_team_offense_stats, load_local_team_games
+
+
+@pytest.fixture(scope="module")
+def stats_database(league):
+    with contextlib.redirect_stdout(io.StringIO()):
+        database.build_database(season_dir(CURRENT_SEASON))
+    yield
+    os.remove(os.path.join(season_dir(CURRENT_SEASON), database.DATABASE_FILE))
+
+
+def both_backends(monkeypatch, compute):
+    """compute() from the game stores, then from the database."""
+    monkeypatch.setattr(database, "USE_DATABASE", False)
+    local = compute()
+    monkeypatch.setattr(database, "USE_DATABASE", True)
+    return local, compute()
+
+
+def assert_same(local, sqlite):
+    if isinstance(local, pd.DataFrame):
+        pd.testing.assert_frame_equal(local, sqlite)
+    elif isinstance(local, dict):
+        assert local.keys() == sqlite.keys()
+        for key in local:
+            assert_same(local[key], sqlite[key])
+    elif isinstance(local, float):
+        assert sqlite == pytest.approx(local)
+    else:
+        assert local == sqlite
+
+
+def test_database_is_used(stats_database, monkeypatch):
+    monkeypatch.setattr(database, "USE_DATABASE", True)
+    player_id = get_all_players()[0]['PERSON_ID']
+
+    assert database.load_player_game_log(CURRENT_SEASON, player_id) is not None
+    assert database.load_team_games_frame(CURRENT_SEASON) is not None
+
+
+def test_player_game_logs_match(stats_database, monkeypatch):
+    for player in get_all_players():
+        local, sqlite = both_backends(monkeypatch, lambda: get_player_gamelog(player['PERSON_ID'], CURRENT_SEASON))
+        assert_same(local, sqlite)
+
+
+def test_player_stats_match(stats_database, monkeypatch):
+    for player in get_all_players():
+        local, sqlite = both_backends(
+            monkeypatch, lambda: compute_player_stats(player['PERSON_ID'], CURRENT_SEASON, source="local")
+        )
+        assert local is not None
+        assert_same(local, sqlite)
+
+
+def test_team_games_match(stats_database, monkeypatch):
+    local = game_store.load_team_games_frame(CURRENT_SEASON)
+    monkeypatch.setattr(database, "USE_DATABASE", True)
+
+    assert_same(local, database.load_team_games_frame(CURRENT_SEASON))
+
+
+@pytest.mark.parametrize("compute", [compute_team_offense_stats, compute_team_defense_stats])
+def test_team_stats_match(stats_database, monkeypatch, compute):
+    for team in get_all_teams():
+        if compute is compute_team_defense_stats:
+            # Skip the memoized opponent table so each backend builds its own
+            run = lambda: compute(team['TEAM_ID'], CURRENT_SEASON, source="local",
+                                  opponent_table=build_opponent_table(load_local_team_games(CURRENT_SEASON)))
+        else:
+            run = lambda: compute(team['TEAM_ID'], CURRENT_SEASON, source="local")
+        local, sqlite = both_backends(monkeypatch, run)
+        assert local is not None
+        assert_same(local, sqlite)
@@ -0,0 +1,107 @@
+"""--resume skips finished work and --retry-failed only redoes the last run's failures"""
+
+import pytest
+
+from scripts.fetch_journal import FetchJournal, item_key
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "fetch_journal.jsonl")
+
+
+def crashed_run(path, completed=(), failed=(), mode="normal"):
+    """A run that records its items and never reaches finish()."""
+    journal = FetchJournal(path, mode=mode)
+    for player_id in completed:
+        journal.record("playergamelog", {"player_id": player_id}, True)
+    for player_id in failed:
+        journal.record("playergamelog", {"player_id": player_id}, False, error="HTTP 429")
+    return journal
+
+
+def to_run(journal, player_ids):
+    return [p for p in player_ids if journal.should_run("playergamelog", {"player_id": p})]
+
+
+def test_item_key_ignores_parameter_order():
+    assert item_key("playergamelog", {"season": "2025-26", "player_id": 1}) == \
+        item_key("playergamelog", {"player_id": 1, "season": "2025-26"})
+
+
+def test_resume_skips_completed_items(path):
+    crashed_run(path, completed=[1, 2], failed=[3])
+
+    journal = FetchJournal(path, mode="resume")
+
+    assert to_run(journal, [1, 2, 3, 4]) == [3, 4]
+
+
+def test_resume_accumulates_completions_of_crashed_runs(path):
+    crashed_run(path, completed=[1])
+    crashed_run(path, completed=[2], mode="resume")
+
+    journal = FetchJournal(path, mode="resume")
+
+    assert to_run(journal, [1, 2, 3]) == [3]
+
+
+def test_resume_after_a_clean_finish_starts_over(path):
+    crashed_run(path, completed=[1, 2]).finish()
+
+    journal = FetchJournal(path, mode="resume")
+
+    assert to_run(journal, [1, 2]) == [1, 2]
+
+
+def test_retry_failed_only_runs_the_last_runs_failures(path):
+    crashed_run(path, failed=[1])
+    crashed_run(path, completed=[1], failed=[2, 3], mode="resume")
+
+    journal = FetchJournal(path, mode="retry-failed")
+
+    assert journal.failed == {item_key("playergamelog", {"player_id": p}) for p in (2, 3)}
+    assert to_run(journal, [1, 2, 3, 4]) == [2, 3]
+
+
+def test_retry_failed_skips_items_that_completed_later_in_the_run(path):
+    journal = crashed_run(path, failed=[1, 2])
+    journal.record("playergamelog", {"player_id": 1}, True)
+
+    journal = FetchJournal(path, mode="retry-failed")
+
+    assert to_run(journal, [1, 2]) == [2]
+
+
+def test_retry_failed_follows_the_previous_retry(path):
+    crashed_run(path, failed=[1, 2]).finish()
+    crashed_run(path, completed=[1], failed=[2], mode="retry-failed").finish()
+
+    journal = FetchJournal(path, mode="retry-failed")
+
+    assert to_run(journal, [1, 2]) == [2]
+
+
+def test_normal_run_starts_a_new_journal(path):
+    crashed_run(path, completed=[1], failed=[2])
+
+    FetchJournal(path)
+    journal = FetchJournal(path, mode="resume")
+
+    assert journal.completed == set()
+    assert journal.failed == set()
+
+
+def test_half_written_last_line_is_ignored(path):
+    crashed_run(path, completed=[1])
+    with open(path, "a") as f:
+        f.write('{"event": "completed", "key": "playergamelog {\\"player_id\\": 2')
+
+    journal = FetchJournal(path, mode="resume")
+
+    assert to_run(journal, [1, 2]) == [2]
+
+
+def test_unknown_mode(path):
+    with pytest.raises(ValueError):
+        FetchJournal(path, mode="restart")
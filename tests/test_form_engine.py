@@ -0,0 +1,93 @@
+"""The vectorized form engine matches plain per-player means"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stats.form_engine import ewm_means, stack_frame, top_k_indices, trimmed_means, window_stats
+
+
+def stack_of(games_per_player, window):
+    """(players x window x 1) stack, NaN padded, from lists of game values (most recent first)."""
+    stack = np.full((len(games_per_player), window, 1), np.nan)
+    for p, games in enumerate(games_per_player):
+        stack[p, :len(games), 0] = games[:window]
+    return stack, np.array([min(len(games), window) for games in games_per_player])
+
+
+def test_trimmed_means_drop_highest_and_lowest():
+    stack, counts = stack_of([[10, 30, 20, 50, 0], [7, 7, 7]], 5)
+
+    means = trimmed_means(stack, counts, trim=1)
+
+    assert means[:, 0] == pytest.approx([20.0, 7.0])
+
+
+def test_trimmed_means_average_everything_without_enough_games():
+    # 2 * trim + 1 games are needed to trim; fewer are averaged, none is 0
+    stack, counts = stack_of([[10, 30], [4], []], 5)
+
+    means = trimmed_means(stack, counts, trim=1)
+
+    assert means[:, 0] == pytest.approx([20.0, 4.0, 0.0])
+
+
+def test_trimmed_means_without_trim_is_the_plain_mean():
+    games = [[3, 9, 1, 4], [12, 2, 8]]
+    stack, counts = stack_of(games, 4)
+
+    assert trimmed_means(stack, counts, trim=0)[:, 0] == pytest.approx([np.mean(g) for g in games])
+
+
+def test_ewm_means_weigh_recent_games_more():
+    stack, counts = stack_of([[10, 20], [6], []], 3)
+
+    means = ewm_means(stack, counts, halflife=1)
+
+    # The game one back weighs half the latest
+    assert means[:, 0] == pytest.approx([(10 + 20 * 0.5) / 1.5, 6.0, 0.0])
+
+
+def test_ewm_means_ignore_padding():
+    stack, counts = stack_of([[8, 4]], 5)
+
+    assert ewm_means(stack, counts, halflife=2)[0, 0] == pytest.approx((8 + 4 * 0.5 ** 0.5) / (1 + 0.5 ** 0.5))
+
+
+def test_window_stats_slices_a_larger_stack():
+    games = [10, 30, 20, 50, 0, 40, 5]
+    large, large_counts = stack_of([games], 7)
+    small, small_counts = stack_of([games], 5)
+
+    assert window_stats(large, large_counts, n=5) == pytest.approx(window_stats(small, small_counts))
+
+
+def test_window_stats_only_trims_the_chosen_columns():
+    frame = pd.DataFrame({'PTS': [10, 30, 20, 50, 0], 'REB': [1, 2, 3, 4, 10]})
+    stack, counts = stack_frame(frame, ['PTS', 'REB'], 5)
+
+    means = window_stats(stack, counts, trim=1, trim_columns=[0])[0]
+
+    assert means == pytest.approx([20.0, 4.0])
+
+
+def test_top_k_indices_are_largest_first():
+    values = np.array([5.0, 9.0, 1.0, 7.0, 3.0])
+
+    assert top_k_indices(values, 3).tolist() == [1, 3, 0]
+
+
+def test_top_k_indices_with_ties():
+    values = np.array([2.0, 4.0, 4.0, 1.0, 4.0])
+
+    assert top_k_indices(values, 2).tolist() in ([1, 2], [1, 4], [2, 4])
+    assert sorted(top_k_indices(values, 3).tolist()) == [1, 2, 4]
+
+
+@pytest.mark.parametrize("k", [0, -1])
+def test_top_k_indices_of_nothing(k):
+    assert top_k_indices(np.array([1.0, 2.0]), k).tolist() == []
+
+
+def test_top_k_indices_cap_k_at_the_number_of_values():
+    assert top_k_indices(np.array([1.0, 3.0, 2.0]), 10).tolist() == [1, 2, 0]
@@ -0,0 +1,96 @@
+"""Player search finds exact, prefix and misspelled names"""
+
+import pytest
+
+from data.search import PlayerNameIndex, normalize_name
+
+PLAYERS = [
+    {'PERSON_ID': 201939, 'DISPLAY_FIRST_LAST': 'Stephen Curry'},
+    {'PERSON_ID': 203999, 'DISPLAY_FIRST_LAST': 'Nikola Jokić'},
+    {'PERSON_ID': 1628983, 'DISPLAY_FIRST_LAST': 'Shai Gilgeous-Alexander'},
+    {'PERSON_ID': 1626164, 'DISPLAY_FIRST_LAST': 'Devin Booker'},
+    {'PERSON_ID': 1630169, 'DISPLAY_FIRST_LAST': 'Tyrese Haliburton'},
+    {'PERSON_ID': 1631096, 'DISPLAY_FIRST_LAST': 'Seth Curry'},
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return PlayerNameIndex(PLAYERS)
+
+
+def ids(players):
+    return [p['PERSON_ID'] for p in players]
+
+
+def test_normalize_name_strips_accents_case_and_punctuation():
+    assert normalize_name("Nikola Jokić") == "nikola jokic"
+    assert normalize_name("  Shai Gilgeous-Alexander ") == "shai gilgeous alexander"
+
+
+@pytest.mark.parametrize("name", ["Stephen Curry", "stephen curry", "STEPHEN  CURRY"])
+def test_exact(index, name):
+    assert index.exact(name)['PERSON_ID'] == 201939
+
+
+def test_exact_ignores_accents(index):
+    assert index.exact("Nikola Jokic")['PERSON_ID'] == 203999
+
+
+def test_exact_miss(index):
+    assert index.exact("Steph Curry") is None
+
+
+def test_prefix_matches_any_word(index):
+    assert sorted(ids(index.prefix("cur"))) == [201939, 1631096]
+    assert ids(index.prefix("alex")) == [1628983]
+    assert ids(index.prefix("devin b")) == [1626164]
+
+
+def test_prefix_lists_each_player_once(index):
+    # "s" starts the first name and the last name of several players
+    found = ids(index.prefix("s"))
+    assert len(found) == len(set(found))
+    assert set(found) == {201939, 1628983, 1631096}
+
+
+def test_prefix_limit(index):
+    assert len(index.prefix("s", limit=2)) == 2
+
+
+def test_prefix_of_nothing(index):
+    assert index.prefix("") == []
+    assert index.prefix("zz") == []
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Stephn Cury", 201939),
+    ("jokic nikola", 203999),
+    ("haliburtn", 1630169),
+    ("gilgeous alexandr", 1628983),
+])
+def test_fuzzy_tolerates_typos(index, query, expected):
+    assert ids(index.fuzzy(query))[0] == expected
+
+
+def test_fuzzy_needs_some_similarity(index):
+    assert index.fuzzy("xqzv") == []
+
+
+def test_search_prefers_an_exact_match(index):
+    assert ids(index.search("Seth Curry")) == [1631096]
+
+
+def test_search_tops_up_prefix_matches_with_fuzzy_ones(index):
+    found = ids(index.search("bookr"))
+    assert found[0] == 1626164
+
+
+def test_duplicate_players_keep_the_first_entry():
+    newer = {'PERSON_ID': 201939, 'DISPLAY_FIRST_LAST': 'Stephen Curry', 'TEAM_ABBREVIATION': 'GSW'}
+    older = {'PERSON_ID': 201939, 'DISPLAY_FIRST_LAST': 'Stephen Curry', 'TEAM_ABBREVIATION': 'DAV'}
+
+    index = PlayerNameIndex([newer, older])
+
+    assert index.names == ['Stephen Curry']
+    assert index.exact('Stephen Curry')['TEAM_ABBREVIATION'] == 'GSW'
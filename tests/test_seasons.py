@@ -0,0 +1,145 @@
+"""Generations publish atomically, old ones are pruned and a committed cache is flattened"""
+
+import os
+
+import pytest
+
+from data.seasons import (
+    CURRENT_FILE, GENERATIONS_DIR, current_generation, flatten_partition, generation_dir, list_generations,
+    partition_dir, prune_generations, publish_generation, published_season_dir, stage_generation
+)
+
+SEASON = "2025-26"
+
+
+def write(directory, name, text):
+    with open(os.path.join(directory, name), 'w') as f:
+        f.write(text)
+
+
+def read(directory, name):
+    with open(os.path.join(directory, name)) as f:
+        return f.read()
+
+
+def fetch_run(cache_root, players, keep=2):
+    """Stage, write and publish one generation like the fetcher does."""
+    generation, directory = stage_generation(SEASON, cache_root=cache_root)
+    # Cache files are replaced, never written in place
+    write(directory, "players.json.tmp", players)
+    os.replace(os.path.join(directory, "players.json.tmp"), os.path.join(directory, "players.json"))
+    pruned = publish_generation(SEASON, generation, cache_root=cache_root, keep=keep)
+    return generation, pruned
+
+
+@pytest.fixture
+def cache_root(tmp_path):
+    return str(tmp_path)
+
+
+def test_staged_generation_is_invisible_until_published(cache_root):
+    first, _ = fetch_run(cache_root, "first")
+    generation, directory = stage_generation(SEASON, cache_root=cache_root)
+    write(directory, "teams.json", "teams")
+
+    assert current_generation(SEASON, cache_root) == first
+    assert not os.path.exists(os.path.join(published_season_dir(SEASON, cache_root), "teams.json"))
+
+    publish_generation(SEASON, generation, cache_root=cache_root)
+
+    assert current_generation(SEASON, cache_root) == generation
+    assert read(published_season_dir(SEASON, cache_root), "teams.json") == "teams"
+
+
+def test_staging_starts_from_the_published_snapshot(cache_root):
+    first, _ = fetch_run(cache_root, "first")
+    os.makedirs(os.path.join(generation_dir(SEASON, first, cache_root), "player_stats"))
+    write(os.path.join(generation_dir(SEASON, first, cache_root), "player_stats"), "1.json", "player")
+
+    _, directory = stage_generation(SEASON, cache_root=cache_root)
+
+    assert read(directory, "players.json") == "first"
+    assert read(os.path.join(directory, "player_stats"), "1.json") == "player"
+
+
+def test_replacing_a_staged_file_leaves_the_published_one_alone(cache_root):
+    first, _ = fetch_run(cache_root, "first")
+    second, _ = fetch_run(cache_root, "second")
+
+    assert read(generation_dir(SEASON, first, cache_root), "players.json") == "first"
+    assert read(generation_dir(SEASON, second, cache_root), "players.json") == "second"
+
+
+def test_resume_reuses_the_unpublished_generation(cache_root):
+    fetch_run(cache_root, "first")
+    staged, _ = stage_generation(SEASON, cache_root=cache_root)
+
+    assert stage_generation(SEASON, resume=True, cache_root=cache_root)[0] == staged
+
+
+def test_publish_prunes_all_but_the_newest_generations(cache_root):
+    runs = [fetch_run(cache_root, f"run {i}", keep=2) for i in range(4)]
+
+    assert list_generations(SEASON, cache_root) == [runs[2][0], runs[3][0]]
+    assert runs[2][1] == [runs[0][0]]
+    assert runs[3][1] == [runs[1][0]]
+
+
+def test_prune_keeps_unpublished_generations(cache_root):
+    first, _ = fetch_run(cache_root, "first")
+    second, _ = fetch_run(cache_root, "second")
+    staged, _ = stage_generation(SEASON, cache_root=cache_root)
+
+    assert prune_generations(SEASON, cache_root, keep=1) == [first]
+    assert list_generations(SEASON, cache_root) == [second, staged]
+
+
+def test_prune_without_a_published_generation(cache_root):
+    stage_generation(SEASON, cache_root=cache_root)
+
+    assert prune_generations(SEASON, cache_root, keep=1) == []
+
+
+def test_publish_moves_a_pre_generation_partition_into_the_generation(cache_root):
+    partition = partition_dir(SEASON, cache_root)
+    os.makedirs(partition)
+    write(partition, "players.json", "flat")
+    write(partition, "fetch_journal.jsonl", "")
+
+    generation, directory = stage_generation(SEASON, cache_root=cache_root)
+    publish_generation(SEASON, generation, cache_root=cache_root)
+
+    assert read(directory, "players.json") == "flat"
+    assert not os.path.exists(os.path.join(partition, "players.json"))
+    # The journal isn't part of a snapshot
+    assert os.path.exists(os.path.join(partition, "fetch_journal.jsonl"))
+
+
+def test_flatten_moves_the_published_generation_into_the_partition(cache_root):
+    fetch_run(cache_root, "first")
+    second, _ = fetch_run(cache_root, "second")
+    partition = partition_dir(SEASON, cache_root)
+
+    assert flatten_partition(SEASON, cache_root) == second
+
+    assert read(partition, "players.json") == "second"
+    assert not os.path.exists(os.path.join(partition, CURRENT_FILE))
+    assert not os.path.exists(os.path.join(partition, GENERATIONS_DIR))
+    assert current_generation(SEASON, cache_root) is None
+    assert published_season_dir(SEASON, cache_root) == partition
+
+
+def test_flatten_without_generations(cache_root):
+    assert flatten_partition(SEASON, cache_root) is None
+
+
+def test_flattened_partition_is_the_next_runs_starting_point(cache_root):
+    fetch_run(cache_root, "first")
+    flatten_partition(SEASON, cache_root)
+
+    generation, _ = fetch_run(cache_root, "second")
+    flatten_partition(SEASON, cache_root)
+
+    partition = partition_dir(SEASON, cache_root)
+    assert read(partition, "players.json") == "second"
+    assert sorted(os.listdir(partition)) == ["players.json"]
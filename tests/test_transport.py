@@ -0,0 +1,145 @@
+"""The shared transport adapts its rate to throttling and retries throttled requests"""
+
+import nba_api.stats.library.http as nba_http
+import pytest
+
+from data import transport
+from data.transport import ThrottledError, TokenBucket
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self._status_code = status_code
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """
+    Install the transport over a fake nba_api send that answers with the queued
+    status codes; returns the queue and the list of sent endpoints.
+    """
+    statuses, sent = [], []
+
+    def send_api_request(self, endpoint, parameters, **kwargs):
+        sent.append(endpoint)
+        status = statuses.pop(0)
+        if isinstance(status, Exception):
+            raise status
+        return FakeResponse(status)
+
+    monkeypatch.setattr(nba_http.NBAStatsHTTP, "send_api_request", send_api_request)
+    monkeypatch.setitem(transport._installed, "original", None)
+    monkeypatch.setattr(transport, "limiter", TokenBucket(1000, 1000))
+    monkeypatch.setattr(transport, "BACKOFF_SECONDS", 0)
+    transport.install_transport()
+    return statuses, sent
+
+
+def send(endpoint="playergamelog"):
+    return nba_http.NBAStatsHTTP().send_api_request(endpoint, {})
+
+
+def test_penalize_halves_the_rate_down_to_the_minimum():
+    bucket = TokenBucket(8.0, 4, min_rate=1.5)
+
+    bucket.penalize()
+    assert bucket.rate == 4.0
+    bucket.penalize()
+    bucket.penalize()
+    assert bucket.rate == 1.5
+
+
+def test_penalize_drains_the_burst():
+    bucket = TokenBucket(1.0, 4)
+
+    bucket.penalize()
+
+    assert bucket._tokens == 0
+
+
+def test_reward_grows_back_to_the_configured_rate():
+    bucket = TokenBucket(10.0, 4)
+    bucket.penalize()
+
+    bucket.reward()
+    assert bucket.rate == pytest.approx(5.5)
+    for _ in range(20):
+        bucket.reward()
+    assert bucket.rate == 10.0
+
+
+def test_burst_is_available_at_once():
+    bucket = TokenBucket(1000.0, 3)
+    for _ in range(3):
+        bucket.acquire()
+
+    assert bucket._tokens < 1
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_throttled_requests_are_retried(upstream, status):
+    statuses, sent = upstream
+    statuses.extend([status, status, 200])
+    before = transport.request_stats()
+
+    response = send()
+
+    after = transport.request_stats()
+    assert response._status_code == 200
+    assert len(sent) == 3
+    assert after["requests"] - before["requests"] == 3
+    assert after["retries"] - before["retries"] == 2
+    assert transport.limiter.rate < transport.limiter.max_rate
+
+
+def test_timeouts_are_retried(upstream):
+    statuses, sent = upstream
+
+    class ReadTimeout(Exception):
+        pass
+
+    statuses.extend([ReadTimeout("read timed out"), 200])
+
+    assert send()._status_code == 200
+    assert len(sent) == 2
+
+
+def test_gives_up_after_max_retries(upstream):
+    statuses, sent = upstream
+    statuses.extend([429] * (transport.MAX_RETRIES + 1))
+    before = transport.request_stats()
+
+    with pytest.raises(ThrottledError):
+        send()
+
+    assert len(sent) == transport.MAX_RETRIES + 1
+    assert transport.request_stats()["failed"] - before["failed"] == 1
+
+
+def test_other_errors_are_not_retried(upstream):
+    statuses, sent = upstream
+    statuses.extend([ValueError("bad parameters"), 200])
+
+    with pytest.raises(ValueError):
+        send()
+
+    assert len(sent) == 1
+
+
+def test_client_errors_are_not_retried(upstream):
+    statuses, sent = upstream
+    statuses.extend([400, 200])
+
+    assert send()._status_code == 400
+    assert len(sent) == 1
+
+
+def test_success_speeds_the_limiter_back_up(upstream):
+    statuses, _ = upstream
+    transport.limiter.penalize()
+    rate = transport.limiter.rate
+    statuses.append(200)
+
+    send()
+
+    assert transport.limiter.rate > rate
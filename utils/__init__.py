@@ -2,4 +2,11 @@
 
 from .cache import *
 
-__all__ = []
+__all__ = [
+    'cached_player_stats',
+    'cached_team_offense_stats',
+    'cached_team_defense_stats',
+    'cached_top_30_by_category',
+    'cached_leaderboard',
+    'clear_stats_cache'
+]
@@ -1,6 +1,92 @@
-# filepath: /Users/aidan/nba-stats-app/utils/cache.py
+"""Streamlit caching for the stats views
+
+Every wrapper is keyed on its arguments plus the season's data generation
+(the mtimes of the files the fetcher rewrites), so a repeat click for the same player or
+team is served from memory and a new generation is simply a new key. Sessions
+pinned to different generations share the cache without evicting each other;
+entries of old generations are never hit again and age out after
+CACHE_TTL_SECONDS, and each wrapper keeps at most CACHE_MAX_ENTRIES results.
+"""
+
+import os
+
 import streamlit as st
 
-@st.cache_data
-def cache_data(func):
-    return func()
\ No newline at end of file
+from data.loader import get_data_generation
+from data.seasons import CURRENT_SEASON, season_dir
+from stats import get_player_stats, get_team_offense_stats, get_team_defense_stats, get_top_30_by_category, query_leaderboard
+
+CACHE_TTL_SECONDS = int(os.environ.get("NBA_STATS_CACHE_TTL", 3600))
+CACHE_MAX_ENTRIES = int(os.environ.get("NBA_STATS_CACHE_MAX_ENTRIES", 256))
+
+__all__ = [
+    'cached_player_stats',
+    'cached_team_offense_stats',
+    'cached_team_defense_stats',
+    'cached_top_30_by_category',
+    'cached_leaderboard',
+    'clear_stats_cache'
+]
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _player_stats(player_id, season, window, generation):
+    return get_player_stats(player_id, season, **window)
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _team_offense_stats(team_id, season, window, generation):
+    return get_team_offense_stats(team_id, season, **window)
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _team_defense_stats(team_id, season, window, generation):
+    return get_team_defense_stats(team_id, season, **window)
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _top_30_by_category(season, window, generation):
+    return get_top_30_by_category(season, **window)
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _leaderboard(category, k, team, min_games, min_minutes, season, window, generation):
+    return query_leaderboard(category, k, team=team, min_games=min_games, min_minutes=min_minutes, season=season,
+                             **window)
+
+
+def clear_stats_cache():
+    """Drop every cached stats result."""
+    for cached_func in (_player_stats, _team_offense_stats, _team_defense_stats, _top_30_by_category,
+                        _leaderboard):
+        cached_func.clear()
+
+
+def _generation(season=None):
+    """A season's current data generation, part of every cache key."""
+    return get_data_generation(season_dir(season or CURRENT_SEASON))
+
+
+def cached_player_stats(player_id, season, **window):
+    """get_player_stats cached per player, season, form window and data generation."""
+    return _player_stats(str(player_id), season, window, _generation(season))
+
+
+def cached_team_offense_stats(team_id, season, **window):
+    """get_team_offense_stats cached per team, season, form window and data generation."""
+    return _team_offense_stats(str(team_id), season, window, _generation(season))
+
+
+def cached_team_defense_stats(team_id, season, **window):
+    """get_team_defense_stats cached per team, season, form window and data generation."""
+    return _team_defense_stats(str(team_id), season, window, _generation(season))
+
+
+def cached_top_30_by_category(season=None, **window):
+    """get_top_30_by_category cached per season, form window and data generation."""
+    return _top_30_by_category(season, window, _generation(season))
+
+
+def cached_leaderboard(category, k=30, team=None, min_games=3, min_minutes=0, season=None, **window):
+    """query_leaderboard cached per query, season, form window and data generation."""
+    team = tuple(sorted(team)) if team is not None and not isinstance(team, str) else team
+    return _leaderboard(category, k, team, min_games, min_minutes, season, window, _generation(season))